@@ -39,6 +39,7 @@ from waffle.models import Flag, Sample, Switch
 import amo
 import mkt
 from lib.es.management.commands import reindex
+from lib.metrics import reset_monolith_client
 from lib.post_request_task import task as post_request_task
 from mkt.access.acl import check_ownership
 from mkt.access.models import Group, GroupUser
@@ -330,6 +331,7 @@ class TestCase(MockEsMixin, RedisTest, MockBrowserIdMixin, test.TestCase):
         # Clean the slate.
         cache.clear()
         post_request_task._discard_tasks()
+        reset_monolith_client()
 
         trans_real.deactivate()
         trans_real._translations = {}  # Django fails to clear this cache.
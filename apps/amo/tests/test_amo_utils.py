@@ -10,9 +10,13 @@ from django.core.validators import ValidationError
 
 import mock
 from nose.tools import assert_raises, eq_, raises
+from PIL import Image
 
-from amo.utils import (cache_ns_key, escape_all, LocalFileStorage,
-                       resize_image, rm_local_tmp_dir, slugify, slug_validator)
+import amo.tests
+from amo.utils import (bulk_update, cache_ns_key, escape_all,
+                       LocalFileStorage, resize_image, resize_images,
+                       rm_local_tmp_dir, slugify, slug_validator)
+from mkt.webapps.models import Webapp
 
 
 u = u'Ελληνικά'
@@ -71,6 +75,33 @@ def test_resize_transparency():
             os.remove(dest)
 
 
+def test_resize_images():
+    src = os.path.join(settings.ROOT, 'apps', 'amo', 'tests',
+                       'images', 'transparent.png')
+    dests = [tempfile.mkstemp(dir=settings.TMP_PATH)[1] for x in range(3)]
+    try:
+        with mock.patch('amo.utils.Image.open',
+                        wraps=amo.utils.Image.open) as image_open:
+            sizes = resize_images(src, zip(dests, [(16, 16), (32, 32), None]),
+                                  remove_src=False, locally=True)
+            # The source is only decoded once.
+            eq_(image_open.call_count, 1)
+        eq_(sizes[dests[0]], (16, 16))
+        eq_(sizes[dests[1]], (32, 32))
+        for dest in dests:
+            eq_(Image.open(dest).size, sizes[dest])
+
+        # The result is the same as resizing from the source.
+        resize_image(src, dests[2], (32, 32), remove_src=False, locally=True)
+        with open(dests[1]) as fh1:
+            with open(dests[2]) as fh2:
+                assert fh1.read() == fh2.read()
+    finally:
+        for dest in dests:
+            if os.path.exists(dest):
+                os.remove(dest)
+
+
 class TestLocalFileStorage(unittest.TestCase):
 
     def setUp(self):
@@ -228,3 +259,25 @@ class TestEscapeAll(unittest.TestCase):
         eq_(res['dict'], {'x': expected})
         eq_(res['list'], [expected])
         eq_(res['bool'], True)
+
+
+class TestBulkUpdate(amo.tests.TestCase):
+
+    def setUp(self):
+        self.app1 = Webapp.objects.create(status=amo.STATUS_PUBLIC)
+        self.app2 = Webapp.objects.create(status=amo.STATUS_PUBLIC)
+        self.app3 = Webapp.objects.create(status=amo.STATUS_PUBLIC)
+
+    def test_update(self):
+        eq_(bulk_update(Webapp, {
+            self.app1.pk: {'weekly_downloads': 1, 'total_downloads': 10},
+            self.app2.pk: {'weekly_downloads': 2, 'total_downloads': 20},
+        }), 2)
+        values = dict(Webapp.objects.no_cache().values_list(
+            'id', 'weekly_downloads'))
+        eq_(values, {self.app1.pk: 1, self.app2.pk: 2, self.app3.pk: 0})
+        eq_(Webapp.objects.no_cache().get(pk=self.app2.pk).total_downloads,
+            20)
+
+    def test_nothing(self):
+        eq_(bulk_update(Webapp, {}), 0)
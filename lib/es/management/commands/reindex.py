@@ -1,7 +1,7 @@
 """
 Marketplace ElasticSearch Indexer.
 
-Currently creates the indexes and re-indexes apps and feed elements.
+Currently creates the indexes and re-indexes apps, feed elements and users.
 """
 import logging
 import sys
@@ -18,6 +18,7 @@ from django.core.management.base import BaseCommand, CommandError
 import mkt.feed.indexers as f_indexers
 from amo.utils import chunked, timestamp_index
 from lib.es.models import Reindexing
+from mkt.users.indexers import UserProfileIndexer
 from mkt.webapps.indexers import WebappIndexer
 
 
@@ -45,6 +46,9 @@ INDEXES = (
     (ES_INDEXES['mkt_feed_shelf'], f_indexers.FeedShelfIndexer, 500),
     # Currently using 1000 since FeedItem documents are pretty small.
     (ES_INDEXES['mkt_feed_item'], f_indexers.FeedItemIndexer, 1000),
+    # UserProfile documents are tiny, only the fields the lookup tool
+    # searches on.
+    (ES_INDEXES['users'], UserProfileIndexer, 2000),
 )
 
 INDEX_DICT = {
@@ -52,6 +56,7 @@ INDEX_DICT = {
     'apps': [INDEXES[0]],
     'feed': [INDEXES[1], INDEXES[2], INDEXES[3], INDEXES[4], INDEXES[5]],
     'feeditems': [INDEXES[5]],
+    'users': [INDEXES[6]],
 }
 
 ES = elasticsearch.Elasticsearch(hosts=settings.ES_HOSTS)
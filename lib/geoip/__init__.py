@@ -1,38 +1,215 @@
+import bisect
 import logging
+import socket
+import threading
 
 import requests
+from django.utils.module_loading import import_by_path
 from django_statsd.clients import statsd
+from ordereddict import OrderedDict
 
 from mkt import regions
 
 log = logging.getLogger('z.geoip')
 
 
+def parse_ip(address):
+    """
+    Parses an IPv4 or IPv6 address. Returns a (version, int) tuple, or None if
+    the address is invalid. IPv4-mapped IPv6 addresses are returned as IPv4.
+    """
+    for family, version in ((socket.AF_INET, 4), (socket.AF_INET6, 6)):
+        try:
+            packed = socket.inet_pton(family, address)
+        except (socket.error, TypeError, ValueError):
+            continue
+        value = int(packed.encode('hex'), 16)
+        if version == 6 and value >> 32 == 0xffff:
+            return 4, value & 0xffffffff
+        return version, value
+    return None
+
+
+def parse_network(network):
+    """
+    Parses a network in CIDR notation, e.g. "10.0.0.0/8". Returns a
+    (version, first address, last address) tuple as ints.
+    """
+    address, _, prefix = network.partition('/')
+    parsed = parse_ip(address.strip())
+    if parsed is None:
+        raise ValueError('Invalid network: %s' % network)
+    version, start = parsed
+    bits = 32 if version == 4 else 128
+    prefix = int(prefix) if prefix else bits
+    if version == 4 and ':' in address:
+        # An IPv4-mapped network, the prefix is for the IPv6 address.
+        prefix -= 96
+    if not 0 <= prefix <= bits:
+        raise ValueError('Invalid network: %s' % network)
+    host_mask = (1 << (bits - prefix)) - 1
+    start &= ~host_mask
+    return version, start, start | host_mask
+
+
+# Loopback, private, link-local, shared and unspecified addresses, which
+# can't be located.
+PRIVATE_NETWORKS = [parse_network(n) for n in (
+    '0.0.0.0/8', '10.0.0.0/8', '100.64.0.0/10', '127.0.0.0/8',
+    '169.254.0.0/16', '172.16.0.0/12', '192.168.0.0/16',
+    '::/128', '::1/128', 'fc00::/7', 'fe80::/10')]
+
+
 def is_public(ip):
-    parts = map(int, ip.split('.'))
-    # localhost
-    if ip == '127.0.0.1':
-        return False
-    # 10.x.x.x
-    elif parts[0] == 10:
-        return False
-    # 192.168.x.x
-    elif parts[0] == 192 and parts[1] == 168:
-        return False
-    # 172.16-32.x.x
-    elif parts[0] == 172 and 16 <= parts[1] <= 31:
+    parsed = parse_ip(ip)
+    if parsed is None:
         return False
-    return True
+    version, value = parsed
+    return not any(version == v and start <= value <= end
+                   for v, start, end in PRIVATE_NETWORKS)
 
 
-class GeoIP:
+class LRUCache(object):
+    """A thread-safe, size bounded cache dropping the least recently used."""
+
+    def __init__(self, size):
+        self.size = size
+        self.data = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            value = self.data.pop(key, None)
+            if value is not None:
+                self.data[key] = value
+            return value
+
+    def set(self, key, value):
+        if not self.size:
+            return
+        with self.lock:
+            self.data.pop(key, None)
+            self.data[key] = value
+            while len(self.data) > self.size:
+                self.data.popitem(last=False)
+
+
+class RangeFileBackend(object):
+    """
+    Resolves addresses from a local file of IP ranges.
+
+    The file at `settings.GEOIP_DB_PATH` has one "<network>,<country code>"
+    line per range, with the network in CIDR notation, e.g.
+    "2.16.0.0/13,fr". Ranges must not overlap. The file is loaded in memory
+    the first time it is needed, as sorted tables searched with bisect.
+    """
+
+    def __init__(self, settings):
+        self.path = getattr(settings, 'GEOIP_DB_PATH', None)
+        self.tables = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        ranges = {4: [], 6: []}
+        with open(self.path) as fd:
+            for line in fd:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                network, country_code = line.split(',')[:2]
+                version, start, end = parse_network(network)
+                ranges[version].append((start, end,
+                                        country_code.strip().lower()))
+
+        tables = {}
+        for version, rows in ranges.items():
+            rows.sort()
+            tables[version] = ([start for start, end, cc in rows],
+                               [end for start, end, cc in rows],
+                               [cc for start, end, cc in rows])
+        log.info('Loaded {0} IPv4 and {1} IPv6 ranges from {2}'
+                 .format(len(ranges[4]), len(ranges[6]), self.path))
+        return tables
+
+    def get_tables(self):
+        if self.tables is None:
+            with self.lock:
+                if self.tables is None:
+                    try:
+                        self.tables = self.load()
+                    except (IOError, ValueError) as e:
+                        # Don't try again for every lookup, let the next
+                        # backends answer.
+                        statsd.incr('z.geoip.file.error')
+                        log.error('Could not load GeoIP ranges from {0}: {1}'
+                                  .format(self.path, e))
+                        self.tables = {4: ([], [], []), 6: ([], [], [])}
+        return self.tables
+
+    def lookup(self, address):
+        if not self.path:
+            return None
+        version, value = parse_ip(address)
+        starts, ends, country_codes = self.get_tables()[version]
+
+        i = bisect.bisect_right(starts, value) - 1
+        if i >= 0 and value <= ends[i]:
+            statsd.incr('z.geoip.file.success')
+            return country_codes[i]
+        statsd.incr('z.geoip.file.miss')
+        return None
+
+
+class HTTPBackend(object):
     """Call to geodude server to resolve an IP to Geo Info block."""
 
     def __init__(self, settings):
         self.timeout = float(getattr(settings, 'GEOIP_DEFAULT_TIMEOUT', .2))
         self.url = getattr(settings, 'GEOIP_URL', '')
+
+    def lookup(self, address):
+        if not self.url:
+            return None
+
+        with statsd.timer('z.geoip'):
+            res = None
+            try:
+                res = requests.post('{0}/country.json'.format(self.url),
+                                    timeout=self.timeout,
+                                    data={'ip': address})
+            except requests.Timeout:
+                statsd.incr('z.geoip.timeout')
+                log.error(('Geodude timed out looking up: {0}'
+                           .format(address)))
+            except requests.RequestException as e:
+                statsd.incr('z.geoip.error')
+                log.error('Geodude connection error: {0}'.format(str(e)))
+            if res and res.status_code == 200:
+                statsd.incr('z.geoip.success')
+                country_code = res.json().get('country_code')
+                log.info(('Geodude lookup for {0} returned {1}'
+                          .format(address, country_code)))
+                return country_code.lower() if country_code else None
+            elif res is not None:
+                log.info('Geodude lookup returned non-200 response: {0}'
+                         .format(res.status_code))
+        return None
+
+
+class GeoIP:
+    """
+    Resolves an IP to a country code, with the backends listed in
+    `settings.GEOIP_BACKENDS`, tried in order. Results are kept in an
+    in-process LRU cache of `settings.GEOIP_CACHE_SIZE` addresses.
+    """
+
+    def __init__(self, settings):
         self.default_val = getattr(settings, 'GEOIP_DEFAULT_VAL',
                                    regions.RESTOFWORLD.slug).lower()
+        self.backends = [import_by_path(path)(settings) for path in
+                         getattr(settings, 'GEOIP_BACKENDS',
+                                 ['lib.geoip.HTTPBackend'])]
+        self.cache = LRUCache(getattr(settings, 'GEOIP_CACHE_SIZE', 0))
 
     def lookup(self, address):
         """Resolve an IP address to a block of geo information.
@@ -41,35 +218,20 @@ class GeoIP:
         return the default as defined by the settings, or "restofworld".
 
         """
-        public_ip = is_public(address)
-        if self.url and public_ip:
-            with statsd.timer('z.geoip'):
-                res = None
-                try:
-                    res = requests.post('{0}/country.json'.format(self.url),
-                                        timeout=self.timeout,
-                                        data={'ip': address})
-                except requests.Timeout:
-                    statsd.incr('z.geoip.timeout')
-                    log.error(('Geodude timed out looking up: {0}'
-                               .format(address)))
-                except requests.RequestException as e:
-                    statsd.incr('z.geoip.error')
-                    log.error('Geodude connection error: {0}'.format(str(e)))
-                if res and res.status_code == 200:
-                    statsd.incr('z.geoip.success')
-                    country_code = res.json().get('country_code',
-                        self.default_val).lower()
-                    log.info(('Geodude lookup for {0} returned {1}'
-                              .format(address, country_code)))
-                    return country_code
-                    log.info('Geodude lookup returned non-200 response: {0}'
-                             .format(res.status_code))
-        else:
-            if public_ip:
-                log.info('Geodude lookup skipped for public IP: {0}'
-                         .format(address))
-            else:
-                log.info('Geodude lookup skipped for private IP: {0}'
-                         .format(address))
+        if not is_public(address):
+            log.info('GeoIP lookup skipped for private IP: {0}'
+                     .format(address))
+            return self.default_val
+
+        key = parse_ip(address)
+        country_code = self.cache.get(key)
+        if country_code:
+            statsd.incr('z.geoip.cache_hit')
+            return country_code
+
+        for backend in self.backends:
+            country_code = backend.lookup(address)
+            if country_code:
+                self.cache.set(key, country_code)
+                return country_code
         return self.default_val
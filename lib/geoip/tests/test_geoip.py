@@ -1,3 +1,4 @@
+import tempfile
 from random import randint
 
 import mock
@@ -6,12 +7,16 @@ from nose.tools import eq_
 
 import amo.tests
 
-from lib.geoip import GeoIP
+from lib.geoip import GeoIP, is_public, LRUCache, parse_ip
 
 
-def generate_settings(url='', default='restofworld', timeout=0.2):
+def generate_settings(url='', default='restofworld', timeout=0.2,
+                      db_path=None, cache_size=0):
     return mock.Mock(GEOIP_URL=url, GEOIP_DEFAULT_VAL=default,
-                     GEOIP_DEFAULT_TIMEOUT=timeout)
+                     GEOIP_DEFAULT_TIMEOUT=timeout, GEOIP_DB_PATH=db_path,
+                     GEOIP_CACHE_SIZE=cache_size,
+                     GEOIP_BACKENDS=['lib.geoip.RangeFileBackend',
+                                     'lib.geoip.HTTPBackend'])
 
 
 class GeoIPTest(amo.tests.TestCase):
@@ -86,3 +91,98 @@ class GeoIPTest(amo.tests.TestCase):
             result = geoip.lookup(ip)
             assert not mock_post.called
             eq_(result, 'restofworld')
+
+    @mock.patch('requests.post')
+    def test_private_ipv6(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost'))
+        for ip in ('::1', 'fe80::1', 'fd12:3456::1', '::ffff:10.0.0.1',
+                   'not an ip', None):
+            eq_(geoip.lookup(ip), 'restofworld')
+        assert not mock_post.called
+
+    @mock.patch('requests.post')
+    def test_cache(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', cache_size=10))
+        mock_post.return_value = mock.Mock(status_code=200, json=lambda: {
+            'country_code': 'US'})
+        eq_(geoip.lookup('2001:4860::8888'), 'us')
+        # The same address written differently is a cache hit.
+        eq_(geoip.lookup('2001:4860:0:0:0:0:0:8888'), 'us')
+        eq_(mock_post.call_count, 1)
+
+    @mock.patch('requests.post')
+    def test_failures_not_cached(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost', cache_size=10))
+        mock_post.side_effect = requests.Timeout
+        eq_(geoip.lookup('3.3.3.3'), 'restofworld')
+        eq_(geoip.lookup('3.3.3.3'), 'restofworld')
+        eq_(mock_post.call_count, 2)
+
+
+class RangeFileBackendTest(amo.tests.TestCase):
+
+    def setUp(self):
+        self.db = tempfile.NamedTemporaryFile()
+        self.db.write('# Test ranges.\n'
+                      '2.16.0.0/13,FR\n'
+                      '1.0.0.0/24,au\n'
+                      '2001:db8::/32,de\n')
+        self.db.flush()
+
+    def tearDown(self):
+        self.db.close()
+
+    @mock.patch('requests.post')
+    def test_lookup(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost',
+                                        db_path=self.db.name))
+        eq_(geoip.lookup('2.16.0.0'), 'fr')
+        eq_(geoip.lookup('2.23.255.255'), 'fr')
+        eq_(geoip.lookup('1.0.0.200'), 'au')
+        eq_(geoip.lookup('::ffff:1.0.0.1'), 'au')
+        eq_(geoip.lookup('2001:db8:ffff::1'), 'de')
+        assert not mock_post.called
+
+    @mock.patch('requests.post')
+    def test_fallback(self, mock_post):
+        geoip = GeoIP(generate_settings(url='localhost',
+                                        db_path=self.db.name))
+        mock_post.return_value = mock.Mock(status_code=200, json=lambda: {
+            'country_code': 'US'})
+        eq_(geoip.lookup('2.24.0.0'), 'us')
+        eq_(geoip.lookup('1.0.1.0'), 'us')
+        eq_(geoip.lookup('2001:db9::1'), 'us')
+        eq_(mock_post.call_count, 3)
+
+    @mock.patch('requests.post')
+    def test_missing_file(self, mock_post):
+        geoip = GeoIP(generate_settings(db_path='/does/not/exist'))
+        eq_(geoip.lookup('2.16.0.0'), 'restofworld')
+
+
+def test_parse_ip():
+    eq_(parse_ip('1.2.3.4'), (4, 0x01020304))
+    eq_(parse_ip('::ffff:1.2.3.4'), (4, 0x01020304))
+    eq_(parse_ip('2001:db8::1'), (6, 0x20010db8 << 96 | 1))
+    eq_(parse_ip('1.2.3'), None)
+    eq_(parse_ip(''), None)
+
+
+def test_is_public():
+    assert is_public('8.8.8.8')
+    assert is_public('2001:4860::8888')
+    assert not is_public('100.64.0.1')
+    assert not is_public('169.254.1.1')
+    assert not is_public('::')
+
+
+def test_lru_cache():
+    cache = LRUCache(2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    eq_(cache.get('a'), 1)
+    cache.set('c', 3)
+    # "b" was the least recently used.
+    eq_(cache.get('b'), None)
+    eq_(cache.get('a'), 1)
+    eq_(cache.get('c'), 3)
@@ -2,12 +2,17 @@
 import base64
 import functools
 import os
+import threading
+from StringIO import StringIO
 
 from django.conf import settings
 
 import commonware.log
+import requests
 from django_statsd.clients import statsd
 from suds import client as sudsclient
+from suds.transport import Reply, TransportError
+from suds.transport.http import HttpTransport
 
 
 log = commonware.log.getLogger('z.iarc')
@@ -21,6 +26,49 @@ wsdl = {
 # Add in the whitelist of supported methods here.
 services = ['Get_App_Info', 'Set_Storefront_Data', 'Get_Rating_Changes']
 
+# Parsed suds clients and IARC clients, kept for the life of the thread.
+# Celery workers and web heads run one thread per process so in practice the
+# WSDL is parsed once per process.
+_local = threading.local()
+
+
+class RequestsTransport(HttpTransport):
+    """
+    suds transport sending SOAP requests through a `requests` session, so
+    that the HTTP connection to IARC is kept alive between calls.
+
+    Opening the WSDL (a local file) is still done by the default transport.
+    """
+
+    def __init__(self, **kwargs):
+        HttpTransport.__init__(self, **kwargs)
+        self.session = requests.Session()
+
+    def send(self, request):
+        res = self.session.post(request.url, data=request.message,
+                                headers=request.headers,
+                                timeout=self.options.timeout)
+        if res.status_code in (202, 204):
+            return None
+        if res.status_code >= 400:
+            # suds reads SOAP faults out of the error body.
+            raise TransportError(res.reason, res.status_code,
+                                 StringIO(res.content))
+        return Reply(200, dict(res.headers), res.content)
+
+
+def get_suds_client(wsdl_name):
+    """
+    Returns the suds client for `wsdl_name`, parsing the WSDL only the first
+    time it is requested in this thread.
+    """
+    suds_clients = _local.__dict__.setdefault('suds_clients', {})
+    if wsdl_name not in suds_clients:
+        log.info('IARC parsing wsdl: {0}'.format(wsdl[wsdl_name]))
+        suds_clients[wsdl_name] = sudsclient.Client(
+            wsdl[wsdl_name], cache=None, transport=RequestsTransport())
+    return suds_clients[wsdl_name]
+
 
 class Client(object):
     """
@@ -49,7 +97,7 @@ class Client(object):
         log.info('IARC client call: {0} from wsdl: {1}'.format(name, wsdl))
 
         if self.client is None:
-            self.client = sudsclient.Client(wsdl[self.wsdl_name], cache=None)
+            self.client = get_suds_client(self.wsdl_name)
 
         # IARC requires messages be base64 encoded and base64 requires
         # byte-strings.
@@ -64,6 +112,20 @@ class Client(object):
 
         return base64.b64decode(response)
 
+    def call_many(self, name, data_list):
+        """
+        Make the same call for each dict of data in `data_list`, over the
+        same client and HTTP connection. Returns the list of responses.
+
+        Example usage::
+
+            client = get_iarc_client('services')
+            responses = client.call_many(
+                'Set_Storefront_Data', [{'XMLString': xml} for xml in xmls])
+
+        """
+        return [self.call(name, **data) for data in data_list]
+
 
 class MockClient(Client):
     """
@@ -83,10 +145,16 @@ class MockClient(Client):
 def get_iarc_client(wsdl):
     """
     Use this to get the right client and communicate with IARC.
+
+    Clients are reused for the life of the thread, pass the same client
+    around when making calls for many apps.
     """
-    if settings.IARC_MOCK:
-        return MockClient(wsdl)
-    return Client(wsdl)
+    client_class = MockClient if settings.IARC_MOCK else Client
+    clients = _local.__dict__.setdefault('clients', {})
+    key = (client_class, wsdl)
+    if key not in clients:
+        clients[key] = client_class(wsdl)
+    return clients[key]
 
 
 MOCK_GET_APP_INFO = '''<?xml version="1.0" encoding="utf-16"?>
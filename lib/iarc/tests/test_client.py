@@ -1,6 +1,13 @@
+import threading
+
 from django.test import TestCase
 
-from lib.iarc.client import Client, get_iarc_client, MockClient
+import mock
+from nose.tools import eq_
+from suds.transport import Request, TransportError
+
+from lib.iarc.client import (Client, get_iarc_client, get_suds_client,
+                             MockClient, RequestsTransport)
 
 
 class TestClient(TestCase):
@@ -27,6 +34,14 @@ class TestClient(TestCase):
         assert xml.startswith('<?xml version="1.0" encoding="utf-16"?>')
         assert ' SERVICE_NAME="GET_RATING_CHANGES"' in xml
 
+    def test_call_many(self):
+        responses = self.client.call_many(
+            'Set_Storefront_Data', [{'XMLString': 'One'},
+                                    {'XMLString': 'Two'}])
+        eq_(len(responses), 2)
+        for xml in responses:
+            assert ' SERVICE_NAME="SET_STOREFRONT_DATA"' in xml
+
 
 class TestRightClient(TestCase):
 
@@ -37,3 +52,56 @@ class TestRightClient(TestCase):
     def test_mock(self):
         with self.settings(IARC_MOCK=True):
             assert isinstance(get_iarc_client('services'), MockClient)
+
+    def test_reused(self):
+        with self.settings(IARC_MOCK=False):
+            client = get_iarc_client('services')
+            assert get_iarc_client('services') is client
+            assert not isinstance(client, MockClient)
+
+    def test_reused_mock(self):
+        with self.settings(IARC_MOCK=True):
+            client = get_iarc_client('services')
+            assert get_iarc_client('services') is client
+
+
+class TestSudsClient(TestCase):
+
+    @mock.patch('lib.iarc.client.sudsclient.Client')
+    @mock.patch('lib.iarc.client._local', threading.local())
+    def test_wsdl_parsed_once(self, suds):
+        client = get_suds_client('services')
+        eq_(get_suds_client('services'), client)
+        eq_(suds.call_count, 1)
+        assert isinstance(suds.call_args[1]['transport'], RequestsTransport)
+
+
+class TestRequestsTransport(TestCase):
+
+    def setUp(self):
+        self.transport = RequestsTransport()
+        self.session = mock.Mock()
+        self.transport.session = self.session
+        self.request = Request('https://iarc/', '<xml/>')
+
+    def response(self, status_code, content=''):
+        return mock.Mock(status_code=status_code, content=content,
+                         headers={'content-type': 'text/xml'}, reason='')
+
+    def test_send(self):
+        self.session.post.return_value = self.response(200, '<ok/>')
+        reply = self.transport.send(self.request)
+        eq_(reply.code, 200)
+        eq_(reply.message, '<ok/>')
+        eq_(self.session.post.call_args[1]['data'], '<xml/>')
+
+    def test_send_no_content(self):
+        self.session.post.return_value = self.response(204)
+        eq_(self.transport.send(self.request), None)
+
+    def test_send_error(self):
+        self.session.post.return_value = self.response(500, '<fault/>')
+        with self.assertRaises(TransportError) as e:
+            self.transport.send(self.request)
+        eq_(e.exception.httpcode, 500)
+        eq_(e.exception.fp.read(), '<fault/>')
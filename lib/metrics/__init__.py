@@ -1,4 +1,6 @@
+import os
 import threading
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
 
@@ -30,9 +32,20 @@ def record_action(action, request, data=None):
     record_stat(action, request, **data)
 
 
+# Monolith clients are kept per thread and reused between requests. Bumping
+# the generation makes every thread build a new client.
+_locals = threading.local()
+_generation = 0
+
+# Threads used to query Monolith concurrently, created lazily in each process.
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
 def get_monolith_client():
-    _locals = threading.local()
-    if not hasattr(_locals, 'monolith'):
+    if (getattr(_locals, 'monolith', None) is None or
+            getattr(_locals, 'generation', None) != _generation):
         server = getattr(settings, 'MONOLITH_SERVER', None)
         index = getattr(settings, 'MONOLITH_INDEX', 'time_*')
         if server is None:
@@ -43,5 +56,40 @@ def get_monolith_client():
 
         from monolith.client import Client as MonolithClient
         _locals.monolith = MonolithClient(server, index, **statsd)
+        _locals.generation = _generation
 
     return _locals.monolith
+
+
+def reset_monolith_client():
+    """Forget the Monolith clients of all threads, e.g. between tests."""
+    global _generation
+    _generation += 1
+
+
+def get_monolith_pool():
+    """
+    Returns the pool of threads used to make Monolith queries concurrently.
+    Each of these threads keeps its own client, see `get_monolith_client`.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        # Threads don't survive a fork, create a new pool in each process.
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ThreadPool(getattr(settings, 'MONOLITH_POOL_SIZE', 4))
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def monolith_map(func, iterable):
+    """
+    Calls `func` for each item of `iterable` in the Monolith threads and
+    returns the list of results. `func` should get its client from
+    `get_monolith_client`.
+
+    Exceptions raised by `func` are raised again in the calling thread.
+    """
+    items = list(iterable)
+    if len(items) < 2:
+        return map(func, items)
+    return get_monolith_pool().map(func, items)
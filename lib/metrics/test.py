@@ -1,8 +1,10 @@
 # -*- coding: utf8 -*-
 import mock
+from nose.tools import eq_
 
 import amo.tests
-from lib.metrics import record_action
+from lib.metrics import (get_monolith_client, monolith_map, record_action,
+                         reset_monolith_client)
 
 
 class TestMetrics(amo.tests.TestCase):
@@ -16,3 +18,27 @@ class TestMetrics(amo.tests.TestCase):
         record_action('install', request, {})
         record_stat.assert_called_with('install', request,
             **{'locale': 'en', 'src': 'foo', 'user-agent': 'py'})
+
+
+class TestMonolithClient(amo.tests.TestCase):
+
+    @mock.patch('monolith.client.Client')
+    def test_reused(self, client):
+        with self.settings(MONOLITH_SERVER='http://0.0.0.0:0'):
+            eq_(get_monolith_client(), get_monolith_client())
+            eq_(client.call_count, 1)
+
+            reset_monolith_client()
+            get_monolith_client()
+            eq_(client.call_count, 2)
+
+    def test_map(self):
+        eq_(monolith_map(lambda x: x * 2, [1, 2, 3]), [2, 4, 6])
+        eq_(monolith_map(lambda x: x * 2, [1]), [2])
+
+    def test_map_error(self):
+        def fail(x):
+            raise ValueError
+
+        with self.assertRaises(ValueError):
+            monolith_map(fail, [1, 2])
@@ -1,12 +1,22 @@
 import datetime
 import decimal
+import hashlib
 import json
 import logging
+import threading
+import time
 import urllib
+import urlparse
+import uuid
 
 from django.conf import settings
+from django.core.cache import cache
 
+import requests
 from curling.lib import API
+from django_statsd.clients import statsd
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 
 from tower import ugettext_lazy as _
 
@@ -49,12 +59,165 @@ class Encoder(json.JSONEncoder):
 
 general_error = _('Oops, we had an error processing that.')
 
+# Methods that don't change anything in solitude.
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class CircuitBreaker(object):
+    """
+    Counts the consecutive failures of calls to a service. Once there are
+    `failures` of them the circuit is open and calls should fail fast, until
+    `reset` seconds later when a single call is let through to see if the
+    service is back.
+    """
+
+    def __init__(self, name, failures, reset):
+        self.name = name
+        self.failures = failures
+        self.reset = reset
+        self.count = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at >= self.reset:
+                # Other calls keep failing fast while this one is tried.
+                self.opened_at = time.time()
+                statsd.incr('%s.circuit.half_open' % self.name)
+                return True
+            statsd.incr('%s.circuit.rejected' % self.name)
+            return False
+
+    def success(self):
+        with self.lock:
+            if self.opened_at is not None:
+                log.info('Circuit to %s closed' % self.name)
+                statsd.incr('%s.circuit.closed' % self.name)
+            self.count = 0
+            self.opened_at = None
+
+    def failure(self):
+        with self.lock:
+            self.count += 1
+            if self.count < self.failures:
+                return
+            if self.opened_at is None:
+                log.error('Circuit to %s opened after %s failures'
+                          % (self.name, self.count))
+                statsd.incr('%s.circuit.open' % self.name)
+            self.opened_at = time.time()
+
+
+circuit = CircuitBreaker('solitude', settings.SOLITUDE_CIRCUIT_FAILURES,
+                         settings.SOLITUDE_CIRCUIT_RESET)
+
+
+class SolitudeSession(requests.Session):
+    """
+    The session used for all the calls to solitude. It keeps a pool of
+    keep-alive connections, applies the timeout of each endpoint, fails fast
+    when solitude is down and caches the read-only lookups.
+    """
+    version_key = 'solitude:get:version'
+
+    def __init__(self, server):
+        super(SolitudeSession, self).__init__()
+        adapter = HTTPAdapter(pool_maxsize=settings.SOLITUDE_POOL_SIZE)
+        self.mount('http://', adapter)
+        self.mount('https://', adapter)
+        self.base_path = urlparse.urlparse(server).path.rstrip('/')
+
+    def endpoint(self, url):
+        path = urlparse.urlparse(url).path
+        if path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        return path
+
+    def timeout(self, endpoint):
+        timeouts = settings.SOLITUDE_ENDPOINT_TIMEOUTS
+        prefixes = [p for p in timeouts if endpoint.startswith(p)]
+        if prefixes:
+            return timeouts[max(prefixes, key=len)]
+        return settings.SOLITUDE_TIMEOUT
+
+    def shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version,
+                             settings.SOLITUDE_CACHE_TIMEOUT):
+                version = cache.get(self.version_key) or version
+        return version
+
+    def invalidate(self):
+        cache.delete(self.version_key)
+
+    def cache_key(self, url, params, data):
+        if isinstance(params, dict):
+            params = sorted(params.items())
+        query = hashlib.md5(repr((url, params, data))).hexdigest()
+        return 'solitude:get:%s:%s' % (self.shared_version(), query)
+
+    def cached_response(self, url, cached):
+        res = requests.Response()
+        res.status_code = 200
+        res.url = url
+        res.headers = CaseInsensitiveDict(cached['headers'])
+        res.encoding = cached['encoding']
+        res._content = cached['content']
+        return res
+
+    def request(self, method, url, **kw):
+        endpoint = self.endpoint(url)
+        cached_endpoints = tuple(settings.SOLITUDE_CACHED_ENDPOINTS)
+        key = None
+        if method.upper() == 'GET' and endpoint.startswith(cached_endpoints):
+            key = self.cache_key(url, kw.get('params'), kw.get('data'))
+            cached = cache.get(key)
+            if cached is not None:
+                statsd.incr('solitude.cache.hit')
+                return self.cached_response(url, cached)
+            statsd.incr('solitude.cache.miss')
+
+        if not circuit.allow():
+            raise SolitudeOffline('Solitude is unavailable, not calling %s'
+                                  % endpoint)
+        if kw.get('timeout') is None:
+            kw['timeout'] = self.timeout(endpoint)
+
+        try:
+            with statsd.timer('solitude.request'):
+                res = super(SolitudeSession, self).request(method, url, **kw)
+        except requests.RequestException:
+            circuit.failure()
+            raise
+        finally:
+            if method.upper() not in SAFE_METHODS:
+                self.invalidate()
+
+        if res.status_code >= 500:
+            circuit.failure()
+        else:
+            circuit.success()
+
+        if key and res.status_code == 200:
+            cache.set(key, {'headers': dict(res.headers),
+                            'encoding': res.encoding,
+                            'content': res.content},
+                      settings.SOLITUDE_CACHE_TIMEOUT)
+        return res
+
 
 class Client(object):
 
     def __init__(self, config=None):
         self.config = self.parse(config)
         self.api = API(config['server'])
+        # Replace the session slumber made with our pooled one.
+        self.api._store['session'] = SolitudeSession(config['server'])
         self.api.activate_oauth(settings.SOLITUDE_OAUTH.get('key'),
                                 settings.SOLITUDE_OAUTH.get('secret'))
         self.encoder = None
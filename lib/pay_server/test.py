@@ -1,13 +1,17 @@
 import datetime
 import json
+import time
 
 from django.conf import settings
+from django.core.cache import cache
 from django.test import TestCase
 
+import requests
 from mock import patch
-from nose.tools import eq_
+from nose.tools import eq_, ok_
 
 from lib.pay_server import filter_encoder, model_to_uid, ZamboniEncoder
+from lib.pay_server.base import circuit, SolitudeOffline, SolitudeSession
 from mkt.webapps.models import Webapp
 from mkt.users.models import UserProfile
 
@@ -33,3 +37,117 @@ class TestUtils(TestCase):
     def test_filter_encoder(self):
         eq_(filter_encoder({'uuid': self.user, 'bar': 'bar'}),
             'bar=bar&uuid=testy%%3Ausers%%3A%s' % self.user.pk)
+
+
+@patch.object(settings, 'SOLITUDE_TIMEOUT', 10)
+@patch.object(settings, 'SOLITUDE_ENDPOINT_TIMEOUTS',
+              {'/bango/': 20, '/bango/status/': 2})
+@patch.object(settings, 'SOLITUDE_CACHED_ENDPOINTS', ('/generic/seller/',))
+@patch('requests.Session.request')
+class TestSolitudeSession(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.session = SolitudeSession('http://solitude/')
+        circuit.count = 0
+        circuit.opened_at = None
+        self.addCleanup(circuit.success)
+
+    def response(self, status_code=200, content='{"uuid": "foo"}'):
+        res = requests.Response()
+        res.status_code = status_code
+        res.headers['content-type'] = 'application/json'
+        res._content = content
+        return res
+
+    def test_timeout(self, request):
+        request.return_value = self.response()
+        for path, timeout in (('/generic/buyer/', 10), ('/bango/package/', 20),
+                              ('/bango/status/', 2)):
+            self.session.request('GET', 'http://solitude' + path)
+            eq_(request.call_args[1]['timeout'], timeout)
+
+    def test_explicit_timeout(self, request):
+        request.return_value = self.response()
+        self.session.request('GET', 'http://solitude/bango/', timeout=1)
+        eq_(request.call_args[1]['timeout'], 1)
+
+    def test_cached(self, request):
+        request.return_value = self.response()
+        url = 'http://solitude/generic/seller/1/'
+        eq_(self.session.request('GET', url).json(), {'uuid': 'foo'})
+        res = self.session.request('GET', url)
+        eq_(request.call_count, 1)
+        eq_(res.status_code, 200)
+        eq_(res.headers['content-type'], 'application/json')
+        eq_(res.json(), {'uuid': 'foo'})
+
+        self.session.request('GET', url, params={'uuid': 'bar'})
+        eq_(request.call_count, 2)
+
+    def test_not_cached(self, request):
+        request.return_value = self.response()
+        url = 'http://solitude/generic/transaction/1/'
+        self.session.request('GET', url)
+        self.session.request('GET', url)
+        eq_(request.call_count, 2)
+
+    def test_errors_not_cached(self, request):
+        request.return_value = self.response(status_code=404)
+        url = 'http://solitude/generic/seller/1/'
+        self.session.request('GET', url)
+        self.session.request('GET', url)
+        eq_(request.call_count, 2)
+
+    def test_write_invalidates(self, request):
+        request.return_value = self.response()
+        url = 'http://solitude/generic/seller/1/'
+        self.session.request('GET', url)
+        self.session.request('PATCH', url, data='{}')
+        self.session.request('GET', url)
+        eq_(request.call_count, 3)
+
+    def test_circuit_opens(self, request):
+        request.side_effect = requests.ConnectionError
+        url = 'http://solitude/generic/buyer/'
+        for i in range(settings.SOLITUDE_CIRCUIT_FAILURES):
+            with self.assertRaises(requests.ConnectionError):
+                self.session.request('GET', url)
+        with self.assertRaises(SolitudeOffline):
+            self.session.request('GET', url)
+        eq_(request.call_count, settings.SOLITUDE_CIRCUIT_FAILURES)
+
+    def test_server_errors_open_circuit(self, request):
+        request.return_value = self.response(status_code=500)
+        url = 'http://solitude/generic/buyer/'
+        for i in range(settings.SOLITUDE_CIRCUIT_FAILURES):
+            self.session.request('GET', url)
+        with self.assertRaises(SolitudeOffline):
+            self.session.request('GET', url)
+
+    def test_circuit_resets(self, request):
+        request.return_value = self.response(status_code=500)
+        url = 'http://solitude/generic/buyer/'
+        for i in range(settings.SOLITUDE_CIRCUIT_FAILURES):
+            self.session.request('GET', url)
+
+        later = time.time() + settings.SOLITUDE_CIRCUIT_RESET
+        with patch('lib.pay_server.base.time.time') as now:
+            now.return_value = later
+            request.return_value = self.response()
+            eq_(self.session.request('GET', url).status_code, 200)
+        ok_(circuit.opened_at is None)
+        eq_(circuit.count, 0)
+
+    def test_circuit_stays_open(self, request):
+        request.return_value = self.response(status_code=500)
+        url = 'http://solitude/generic/buyer/'
+        for i in range(settings.SOLITUDE_CIRCUIT_FAILURES):
+            self.session.request('GET', url)
+
+        later = time.time() + settings.SOLITUDE_CIRCUIT_RESET
+        with patch('lib.pay_server.base.time.time') as now:
+            now.return_value = later
+            self.session.request('GET', url)
+            with self.assertRaises(SolitudeOffline):
+                self.session.request('GET', url)
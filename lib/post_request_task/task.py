@@ -68,6 +68,41 @@ class PostRequestTask(Task):
 task = partial(base_task, base=PostRequestTask)
 
 
+class _PostRequestCall(object):
+    """A function call queued along with the post-request tasks."""
+
+    def __init__(self, func):
+        self.func = func
+
+    def __eq__(self, other):
+        return (isinstance(other, _PostRequestCall) and
+                self.func == other.func)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def original_apply_async(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+
+def call_after_request(func, *args, **kwargs):
+    """Calls `func` once the request, and its transaction, are finished.
+
+    Like the post-request tasks, the call is discarded if the request fails.
+    Use it e.g. to invalidate a cache again once a change is committed, when
+    another process may have cached the data before the commit.
+
+    A call that is already queued is moved to the end of the queue, so that
+    the last of opposite changes queued during the request wins.
+
+    """
+    t = (_PostRequestCall(func), args, kwargs)
+    queue = _get_task_queue()
+    if t in queue:
+        queue.remove(t)
+    queue.append(t)
+
+
 # Hook the signal handlers up.
 # Send the tasks to celery when the request is finished.
 request_finished.connect(_send_tasks,
@@ -5,7 +5,8 @@ from celery.signals import task_postrun
 from mock import Mock, patch
 from nose.tools import eq_
 
-from lib.post_request_task.task import task, _get_task_queue, _discard_tasks
+from lib.post_request_task.task import (call_after_request, task,
+                                       _get_task_queue, _discard_tasks)
 
 
 task_mock = Mock()
@@ -93,3 +94,22 @@ class TestTask(TestCase):
             test_task.delay()
 
         self._verify_task_filled()
+
+    def test_call_after_request(self):
+        func = Mock()
+        call_after_request(func, 1, a=2)
+        call_after_request(func, 1, a=2)
+        assert not func.called
+
+        request_finished.send(sender=self)
+        func.assert_called_once_with(1, a=2)
+        self._verify_task_empty()
+
+    def test_call_after_request_order(self):
+        func = Mock()
+        call_after_request(func, True)
+        call_after_request(func, False)
+        call_after_request(func, True)
+
+        request_finished.send(sender=self)
+        eq_(func.call_args_list, [((False,), {}), ((True,), {})])
@@ -0,0 +1,7 @@
+CREATE TABLE `cached_validation` (
+    `id` int(11) unsigned AUTO_INCREMENT NOT NULL PRIMARY KEY,
+    `created` datetime NOT NULL,
+    `modified` datetime NOT NULL,
+    `key` varchar(64) NOT NULL UNIQUE,
+    `validation` longtext NOT NULL
+) ENGINE=InnoDB CHARACTER SET utf8 COLLATE utf8_general_ci;
@@ -0,0 +1,19 @@
+CREATE TABLE `purchase_fulfillments` (
+    `id` int(11) unsigned NOT NULL AUTO_INCREMENT,
+    `created` datetime NOT NULL,
+    `modified` datetime NOT NULL,
+    `contribution_id` int(11) unsigned NOT NULL,
+    `transaction_id` varchar(255) NOT NULL,
+    `amount` numeric(9, 2) DEFAULT NULL,
+    `currency` varchar(3) NOT NULL,
+    `status` int(11) unsigned NOT NULL,
+    `attempts` int(11) unsigned NOT NULL,
+    `error` longtext NOT NULL,
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `purchase_fulfillments_contribution_id` (`contribution_id`),
+    UNIQUE KEY `purchase_fulfillments_transaction_id` (`transaction_id`),
+    KEY `purchase_fulfillments_status_idx` (`status`),
+    CONSTRAINT `purchase_fulfillments_contribution_id_fk`
+        FOREIGN KEY (`contribution_id`)
+        REFERENCES `stats_contributions` (`id`)
+) ENGINE=InnoDB CHARACTER SET utf8 COLLATE utf8_general_ci;
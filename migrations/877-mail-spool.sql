@@ -0,0 +1,28 @@
+CREATE TABLE `mail_batches` (
+    `id` int(11) unsigned NOT NULL AUTO_INCREMENT,
+    `created` datetime NOT NULL,
+    `modified` datetime NOT NULL,
+    `subject` varchar(255) NOT NULL,
+    `message` longtext NOT NULL,
+    `html_message` longtext,
+    `from_email` varchar(255) NOT NULL,
+    PRIMARY KEY (`id`)
+) ENGINE=InnoDB CHARACTER SET utf8 COLLATE utf8_general_ci;
+
+CREATE TABLE `mail_spool` (
+    `id` int(11) unsigned NOT NULL AUTO_INCREMENT,
+    `created` datetime NOT NULL,
+    `modified` datetime NOT NULL,
+    `batch_id` int(11) unsigned NOT NULL,
+    `recipient` varchar(255) NOT NULL,
+    `real_email` bool NOT NULL,
+    `status` smallint(5) unsigned NOT NULL,
+    `attempts` smallint(5) unsigned NOT NULL,
+    `error` longtext NOT NULL,
+    PRIMARY KEY (`id`),
+    KEY `mail_spool_status_idx` (`status`),
+    CONSTRAINT `mail_spool_batch_id_fk`
+        FOREIGN KEY (`batch_id`)
+        REFERENCES `mail_batches` (`id`)
+        ON DELETE CASCADE
+) ENGINE=InnoDB CHARACTER SET utf8 COLLATE utf8_general_ci;
@@ -83,8 +83,7 @@ def check_addon_ownership(request, addon, viewer=False, dev=False,
     # Support can do support.
     elif support:
         roles += (amo.AUTHOR_ROLE_SUPPORT,)
-    return addon.authors.filter(pk=request.user.pk,
-                                addonuser__role__in=roles).exists()
+    return addon.has_author(request.user, roles)
 
 
 def check_reviewer(request, region=None):
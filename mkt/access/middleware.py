@@ -8,6 +8,7 @@ import commonware.log
 
 import amo
 from mkt.access import acl
+from mkt.access.models import get_user_groups
 
 
 log = commonware.log.getLogger('z.access')
@@ -22,7 +23,7 @@ class ACLMiddleware(object):
         # figure out our list of groups...
         if request.user.is_authenticated():
             amo.set_user(request.user)
-            request.groups = request.user.groups.all()
+            request.groups = get_user_groups(request.user)
 
     def process_response(self, request, response):
         amo.set_user(None)
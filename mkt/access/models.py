@@ -1,4 +1,6 @@
 from django import dispatch
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.db.models import signals
 
@@ -25,6 +27,31 @@ class Group(ModelBase):
         return self.name
 
 
+def user_groups_key(user_id):
+    return 'access:groups:%s' % user_id
+
+
+def get_user_groups(user):
+    """
+    Returns the list of groups `user` belongs to, cached for
+    `settings.API_AUTH_CACHE_TIMEOUT` seconds. The cache is invalidated when
+    the user joins or leaves a group, or when a group changes.
+    """
+    key = user_groups_key(user.pk)
+    groups = cache.get(key)
+    if groups is None:
+        groups = list(user.groups.all())
+        cache.set(key, groups, settings.API_AUTH_CACHE_TIMEOUT)
+    return groups
+
+
+@dispatch.receiver(signals.post_save, sender=Group,
+                   dispatch_uid='group.post_save')
+def group_post_save(sender, instance, **kw):
+    cache.delete_many([user_groups_key(pk) for pk in
+                       instance.users.values_list('pk', flat=True)])
+
+
 class GroupUser(models.Model):
 
     group = models.ForeignKey(Group)
@@ -37,6 +64,7 @@ class GroupUser(models.Model):
 @dispatch.receiver(signals.post_save, sender=GroupUser,
                    dispatch_uid='groupuser.post_save')
 def groupuser_post_save(sender, instance, **kw):
+    cache.delete(user_groups_key(instance.user_id))
     if kw.get('raw'):
         return
 
@@ -47,6 +75,7 @@ def groupuser_post_save(sender, instance, **kw):
 @dispatch.receiver(signals.post_delete, sender=GroupUser,
                    dispatch_uid='groupuser.post_delete')
 def groupuser_post_delete(sender, instance, **kw):
+    cache.delete(user_groups_key(instance.user_id))
     if kw.get('raw'):
         return
 
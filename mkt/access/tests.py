@@ -2,7 +2,7 @@ from django.contrib.auth.models import AnonymousUser
 from django.http import HttpRequest
 
 import mock
-from nose.tools import assert_false
+from nose.tools import assert_false, eq_
 
 import amo
 import amo.tests
@@ -12,6 +12,7 @@ from mkt.users.models import UserProfile
 
 from .acl import (action_allowed, check_addon_ownership, check_ownership,
                   check_reviewer, match_rules)
+from .models import get_user_groups, Group, GroupUser
 
 
 class ACLTestCase(amo.tests.TestCase):
@@ -69,6 +70,11 @@ class TestHasPerm(amo.tests.TestCase):
         self.request.groups = ()
         self.request.user = self.user
 
+    def set_role(self, role):
+        addon_user = self.app.addonuser_set.get(user=self.user)
+        addon_user.role = role
+        addon_user.save()
+
     def login_admin(self):
         user = UserProfile.objects.get(email='admin@mozilla.com')
         self.login(user)
@@ -123,54 +129,54 @@ class TestHasPerm(amo.tests.TestCase):
         self.login(self.user)
         assert check_addon_ownership(self.request, self.app)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_DEV)
+        self.set_role(amo.AUTHOR_ROLE_DEV)
         assert not check_addon_ownership(self.request, self.app)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_VIEWER)
+        self.set_role(amo.AUTHOR_ROLE_VIEWER)
         assert not check_addon_ownership(self.request, self.app)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_SUPPORT)
+        self.set_role(amo.AUTHOR_ROLE_SUPPORT)
         assert not check_addon_ownership(self.request, self.app)
 
     def test_dev(self):
         self.login(self.user)
         assert check_addon_ownership(self.request, self.app, dev=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_DEV)
+        self.set_role(amo.AUTHOR_ROLE_DEV)
         assert check_addon_ownership(self.request, self.app, dev=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_VIEWER)
+        self.set_role(amo.AUTHOR_ROLE_VIEWER)
         assert not check_addon_ownership(self.request, self.app, dev=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_SUPPORT)
+        self.set_role(amo.AUTHOR_ROLE_SUPPORT)
         assert not check_addon_ownership(self.request, self.app, dev=True)
 
     def test_viewer(self):
         self.login(self.user)
         assert check_addon_ownership(self.request, self.app, viewer=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_DEV)
+        self.set_role(amo.AUTHOR_ROLE_DEV)
         assert check_addon_ownership(self.request, self.app, viewer=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_VIEWER)
+        self.set_role(amo.AUTHOR_ROLE_VIEWER)
         assert check_addon_ownership(self.request, self.app, viewer=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_SUPPORT)
+        self.set_role(amo.AUTHOR_ROLE_SUPPORT)
         assert check_addon_ownership(self.request, self.app, viewer=True)
 
     def test_support(self):
         self.login(self.user)
         assert check_addon_ownership(self.request, self.app, viewer=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_DEV)
+        self.set_role(amo.AUTHOR_ROLE_DEV)
         assert not check_addon_ownership(self.request, self.app,
                                          support=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_VIEWER)
+        self.set_role(amo.AUTHOR_ROLE_VIEWER)
         assert not check_addon_ownership(self.request, self.app,
                                          support=True)
 
-        self.app.addonuser_set.update(role=amo.AUTHOR_ROLE_SUPPORT)
+        self.set_role(amo.AUTHOR_ROLE_SUPPORT)
         assert check_addon_ownership(self.request, self.app, support=True)
 
 
@@ -188,3 +194,24 @@ class TestCheckReviewer(amo.tests.TestCase):
         self.grant_permission(self.user, 'Apps:Review')
         req = amo.tests.req_factory_factory('noop', user=self.user)
         assert check_reviewer(req)
+
+
+class TestGetUserGroups(amo.tests.TestCase):
+    fixtures = fixture('user_2519')
+
+    def setUp(self):
+        self.user = UserProfile.objects.get(pk=2519)
+        self.group = Group.objects.create(name='Test', rules='Apps:Review')
+
+    def test_membership_change(self):
+        eq_(get_user_groups(self.user), [])
+        GroupUser.objects.create(user=self.user, group=self.group)
+        eq_(get_user_groups(self.user), [self.group])
+        GroupUser.objects.filter(user=self.user).delete()
+        eq_(get_user_groups(self.user), [])
+
+    def test_group_change(self):
+        GroupUser.objects.create(user=self.user, group=self.group)
+        eq_(get_user_groups(self.user)[0].rules, 'Apps:Review')
+        self.group.update(rules='Apps:Edit')
+        eq_(get_user_groups(self.user)[0].rules, 'Apps:Edit')
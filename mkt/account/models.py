@@ -0,0 +1,190 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import signals
+from django.dispatch import receiver
+
+from django_statsd.clients import statsd
+
+import amo
+from lib.post_request_task.task import call_after_request
+from mkt.prices.models import AddonPurchase
+from mkt.webapps.models import (AddonUser, get_author_roles, get_installed,
+                                Installed)
+
+
+# How long, in seconds, the relevant apps of a user are kept for.
+RELEVANT_APPS_TIMEOUT = 60 * 60 * 24
+# How many changes are kept to answer sync requests. Clients that are further
+# behind get the full lists again.
+RELEVANT_APPS_CHANGES = 100
+RELEVANT_APPS_LISTS = ('developed', 'installed', 'purchased')
+
+
+class RelevantApps(object):
+    """
+    The ids of the apps a user developed, installed and purchased, kept up to
+    date in the cache by the AddonUser, Installed and AddonPurchase signals,
+    once the request that changed them is over.
+
+    Every change gets a new version, a timestamp in milliseconds so that
+    versions keep increasing when the record is rebuilt, and the last changes
+    are kept so that clients can only fetch what changed since the version
+    they have.
+    """
+
+    def key(self, user_id):
+        return 'account:relevant_apps:%s' % user_id
+
+    def lock_key(self, user_id):
+        return 'account:relevant_apps:lock:%s' % user_id
+
+    def next_version(self, version=0):
+        return max(version + 1, int(time.time() * 1000))
+
+    def build(self, user, version=0):
+        roles = get_author_roles(user)
+        version = self.next_version(version)
+        return {
+            'version': version,
+            # The oldest version the changes can be computed from.
+            'since': version,
+            'apps': {
+                'developed': [app_id for app_id, role in roles.items()
+                              if role == amo.AUTHOR_ROLE_OWNER],
+                'installed': sorted(set(app_id for app_id, install_type
+                                        in get_installed(user))),
+                'purchased': list(user.purchase_ids()),
+            },
+            'changes': [],
+        }
+
+    def get(self, user):
+        key = self.key(user.pk)
+        record = cache.get(key)
+        if record is None or 'apps' not in record:
+            statsd.incr('account.relevant_apps.build')
+            # A stale record only keeps its version, so that the new one
+            # gets a newer version even within the same millisecond.
+            record = self.build(user, record['version'] if record else 0)
+            cache.set(key, record, RELEVANT_APPS_TIMEOUT)
+        return record
+
+    def change(self, user_id, name, app_id, added):
+        """Adds or removes `app_id` from the `name` list of the user."""
+        key = self.key(user_id)
+        record = cache.get(key)
+        if record is None or 'apps' not in record:
+            # It will be built with a newer version when needed.
+            return
+        if not cache.add(self.lock_key(user_id), 1, 10):
+            # Someone else is changing it, rather than losing a change start
+            # over with a newer version.
+            cache.set(key, {'version': record['version']},
+                      RELEVANT_APPS_TIMEOUT)
+            return
+        try:
+            record = cache.get(key)
+            if record is None or 'apps' not in record:
+                return
+            apps = record['apps'][name]
+            if added == (app_id in apps):
+                return
+            if added:
+                apps.append(app_id)
+            else:
+                apps.remove(app_id)
+            record['version'] = self.next_version(record['version'])
+            record['changes'].append((record['version'], name, app_id, added))
+            if len(record['changes']) > RELEVANT_APPS_CHANGES:
+                dropped = record['changes'].pop(0)
+                record['since'] = dropped[0]
+            cache.set(key, record, RELEVANT_APPS_TIMEOUT)
+        finally:
+            cache.delete(self.lock_key(user_id))
+
+    def lists(self, user):
+        return self.get(user)['apps']
+
+    def changes_since(self, user, version):
+        """
+        Returns what changed in the lists of the user since `version`: the
+        added and removed app ids of each list. If `version` is None or too
+        old, the full lists are returned instead, with `full` set.
+        """
+        record = self.get(user)
+        if (version is None or
+                not record['since'] <= version <= record['version']):
+            return {'version': record['version'], 'full': True,
+                    'apps': record['apps']}
+
+        added = dict((name, set()) for name in RELEVANT_APPS_LISTS)
+        removed = dict((name, set()) for name in RELEVANT_APPS_LISTS)
+        for change_version, name, app_id, is_added in record['changes']:
+            if change_version <= version:
+                continue
+            if is_added:
+                added[name].add(app_id)
+                removed[name].discard(app_id)
+            else:
+                removed[name].add(app_id)
+                added[name].discard(app_id)
+        return {'version': record['version'], 'full': False,
+                'added': dict((k, sorted(v)) for k, v in added.items()),
+                'removed': dict((k, sorted(v)) for k, v in removed.items())}
+
+
+relevant_apps = RelevantApps()
+
+
+@receiver(signals.post_save, sender=AddonUser,
+          dispatch_uid='relevant_apps.addonuser_save')
+def addonuser_saved(sender, instance, **kw):
+    if (instance._original_user_id and
+            instance._original_user_id != instance.user_id):
+        call_after_request(relevant_apps.change,
+                           instance._original_user_id, 'developed',
+                           instance.addon_id, False)
+    call_after_request(relevant_apps.change, instance.user_id, 'developed',
+                       instance.addon_id,
+                       instance.role == amo.AUTHOR_ROLE_OWNER)
+
+
+@receiver(signals.post_delete, sender=AddonUser,
+          dispatch_uid='relevant_apps.addonuser_delete')
+def addonuser_deleted(sender, instance, **kw):
+    call_after_request(relevant_apps.change, instance.user_id, 'developed',
+                       instance.addon_id, False)
+
+
+@receiver(signals.post_save, sender=Installed,
+          dispatch_uid='relevant_apps.installed_save')
+def installed_saved(sender, instance, **kw):
+    call_after_request(relevant_apps.change, instance.user_id, 'installed',
+                       instance.addon_id, True)
+
+
+@receiver(signals.post_delete, sender=Installed,
+          dispatch_uid='relevant_apps.installed_delete')
+def installed_deleted(sender, instance, **kw):
+    # The app may still be installed with another install type.
+    if not (Installed.objects.no_cache()
+                             .filter(user=instance.user_id,
+                                     addon=instance.addon_id).exists()):
+        call_after_request(relevant_apps.change, instance.user_id,
+                           'installed', instance.addon_id, False)
+
+
+@receiver(signals.post_save, sender=AddonPurchase,
+          dispatch_uid='relevant_apps.addonpurchase_save')
+def addonpurchase_saved(sender, instance, **kw):
+    call_after_request(relevant_apps.change, instance.user_id, 'purchased',
+                       instance.addon_id,
+                       instance.type == amo.CONTRIB_PURCHASE)
+
+
+@receiver(signals.post_delete, sender=AddonPurchase,
+          dispatch_uid='relevant_apps.addonpurchase_delete')
+def addonpurchase_deleted(sender, instance, **kw):
+    call_after_request(relevant_apps.change, instance.user_id, 'purchased',
+                       instance.addon_id, False)
@@ -0,0 +1,135 @@
+from mock import patch
+from nose.tools import eq_, ok_
+
+import amo
+from amo.tests import TestCase, app_factory
+from lib.post_request_task.task import _discard_tasks, _send_tasks
+from mkt.account.models import relevant_apps
+from mkt.constants.apps import INSTALL_TYPE_REVIEWER
+from mkt.prices.models import AddonPurchase
+from mkt.users.models import UserProfile
+
+
+class TestRelevantApps(TestCase):
+
+    def setUp(self):
+        self.user = UserProfile.objects.create(email='relevant@mozilla.com')
+        self.app = app_factory()
+
+    def test_build(self):
+        self.app.addonuser_set.create(user=self.user)
+        self.app.installed.create(user=self.user)
+        eq_(relevant_apps.lists(self.user),
+            {'developed': [self.app.pk], 'installed': [self.app.pk],
+             'purchased': []})
+
+    def test_cached(self):
+        relevant_apps.lists(self.user)
+        with self.assertNumQueries(0):
+            relevant_apps.lists(self.user)
+
+    def test_change_before_build(self):
+        self.app.installed.create(user=self.user)
+        eq_(relevant_apps.lists(self.user)['installed'], [self.app.pk])
+
+    def test_installed(self):
+        version = relevant_apps.get(self.user)['version']
+        installed = self.app.installed.create(user=self.user)
+        _send_tasks()
+        eq_(relevant_apps.lists(self.user)['installed'], [self.app.pk])
+        record = relevant_apps.get(self.user)
+        ok_(record['version'] > version)
+
+        installed.delete()
+        _send_tasks()
+        eq_(relevant_apps.lists(self.user)['installed'], [])
+
+    def test_rolled_back(self):
+        relevant_apps.lists(self.user)
+        self.app.installed.create(user=self.user)
+        # The request failed and its transaction was rolled back.
+        _discard_tasks()
+        eq_(relevant_apps.lists(self.user)['installed'], [])
+
+    def test_installed_other_type(self):
+        relevant_apps.lists(self.user)
+        self.app.installed.create(user=self.user)
+        self.app.installed.create(user=self.user,
+                                  install_type=INSTALL_TYPE_REVIEWER).delete()
+        _send_tasks()
+        eq_(relevant_apps.lists(self.user)['installed'], [self.app.pk])
+
+    def test_developed(self):
+        relevant_apps.lists(self.user)
+        addon_user = self.app.addonuser_set.create(user=self.user)
+        _send_tasks()
+        eq_(relevant_apps.lists(self.user)['developed'], [self.app.pk])
+
+        addon_user.role = amo.AUTHOR_ROLE_DEV
+        addon_user.save()
+        _send_tasks()
+        eq_(relevant_apps.lists(self.user)['developed'], [])
+
+    def test_purchased(self):
+        relevant_apps.lists(self.user)
+        purchase = AddonPurchase.objects.create(user=self.user,
+                                                addon=self.app)
+        _send_tasks()
+        eq_(relevant_apps.lists(self.user)['purchased'], [self.app.pk])
+
+        purchase.delete()
+        _send_tasks()
+        eq_(relevant_apps.lists(self.user)['purchased'], [])
+
+    def test_changes_since(self):
+        version = relevant_apps.get(self.user)['version']
+        other = app_factory()
+        self.app.installed.create(user=self.user)
+        other.installed.create(user=self.user)
+        other.installed.get(user=self.user).delete()
+        _send_tasks()
+
+        data = relevant_apps.changes_since(self.user, version)
+        eq_(data['full'], False)
+        eq_(data['version'], relevant_apps.get(self.user)['version'])
+        eq_(data['added'],
+            {'developed': [], 'installed': [self.app.pk], 'purchased': []})
+        eq_(data['removed'],
+            {'developed': [], 'installed': [other.pk], 'purchased': []})
+
+    def test_changes_since_current(self):
+        version = relevant_apps.get(self.user)['version']
+        data = relevant_apps.changes_since(self.user, version)
+        eq_(data['full'], False)
+        eq_(data['added'],
+            {'developed': [], 'installed': [], 'purchased': []})
+
+    def test_changes_since_none(self):
+        data = relevant_apps.changes_since(self.user, None)
+        eq_(data['full'], True)
+        eq_(data['apps'],
+            {'developed': [], 'installed': [], 'purchased': []})
+
+    @patch('mkt.account.models.RELEVANT_APPS_CHANGES', 1)
+    def test_changes_since_too_old(self):
+        version = relevant_apps.get(self.user)['version']
+        self.app.installed.create(user=self.user)
+        app_factory().installed.create(user=self.user)
+        _send_tasks()
+
+        data = relevant_apps.changes_since(self.user, version)
+        eq_(data['full'], True)
+        eq_(len(data['apps']['installed']), 2)
+
+    def test_changes_since_rebuilt(self):
+        version = relevant_apps.get(self.user)['version']
+        relevant_apps.change(self.user.pk, 'installed', self.app.pk, True)
+        # Failing to get the lock marks the record as stale, clients start
+        # over.
+        with patch('mkt.account.models.cache.add') as add:
+            add.return_value = False
+            relevant_apps.change(self.user.pk, 'installed', self.app.pk,
+                                 False)
+        data = relevant_apps.changes_since(self.user, version)
+        eq_(data['full'], True)
+        ok_(data['version'] > version)
@@ -18,7 +18,7 @@ from nose.tools import eq_, ok_
 import amo
 from amo.tests import TestCase, app_factory
 from amo.utils import urlparams
-
+from lib.post_request_task.task import _send_tasks
 from mkt.account.views import MineMixin
 from mkt.api.tests.test_oauth import RestOAuth
 from mkt.constants.apps import INSTALL_TYPE_REVIEWER
@@ -341,6 +341,49 @@ class TestInstalled(RestOAuth):
         self.not_there()
 
 
+class TestRelevantApps(RestOAuth):
+    fixtures = fixture('user_2519', 'webapp_337141')
+
+    def setUp(self):
+        super(TestRelevantApps, self).setUp()
+        self.url = reverse('account-relevant-apps')
+        self.user = UserProfile.objects.get(pk=2519)
+
+    def test_has_cors(self):
+        self.assertCORS(self.client.get(self.url), 'get')
+
+    def test_verbs(self):
+        self._allowed_verbs(self.url, ('get'))
+
+    def test_not_allowed(self):
+        eq_(self.anon.get(self.url).status_code, 403)
+
+    def test_full(self):
+        Installed.objects.create(user=self.user, addon_id=337141)
+        res = self.client.get(self.url)
+        eq_(res.status_code, 200, res.content)
+        data = json.loads(res.content)
+        eq_(data['full'], True)
+        eq_(data['apps'],
+            {'developed': [], 'installed': [337141], 'purchased': []})
+
+    def test_since(self):
+        version = json.loads(self.client.get(self.url).content)['version']
+        Installed.objects.create(user=self.user, addon_id=337141)
+        # As at the end of the request that installed the app.
+        _send_tasks()
+        res = self.client.get(self.url, {'since': version})
+        eq_(res.status_code, 200, res.content)
+        data = json.loads(res.content)
+        eq_(data['full'], False)
+        ok_(data['version'] > version)
+        eq_(data['added']['installed'], [337141])
+        eq_(data['removed']['installed'], [])
+
+    def test_since_invalid(self):
+        eq_(self.client.get(self.url, {'since': 'x'}).status_code, 400)
+
+
 class FakeUUID(object):
     hex = '000000'
 
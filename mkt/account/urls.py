@@ -4,7 +4,8 @@ from mkt.account.views import (fxa_preverify_view, fxa_preverify_key,
                                AccountView, AccountInfoView,
                                ConfirmFxAVerificationView, FeedbackView,
                                FxALoginView, InstalledView, LoginView,
-                               LogoutView, NewsletterView, PermissionsView)
+                               LogoutView, NewsletterView, PermissionsView,
+                               RelevantAppsView)
 from mkt.feed.views import FeedShelfViewSet
 from mkt.users import views
 
@@ -23,6 +24,8 @@ drf_patterns = patterns('',
     url('^newsletter/$', NewsletterView.as_view(), name='account-newsletter'),
     url('^permissions/(?P<pk>[^/]+)/$', PermissionsView.as_view(),
         name='account-permissions'),
+    url('^relevant-apps/$', RelevantAppsView.as_view(),
+        name='account-relevant-apps'),
     url('^settings/(?P<pk>[^/]+)/$', AccountView.as_view(),
         name='account-settings'),
     url('^info/(?P<email>[^/]+)$', AccountInfoView.as_view(),
@@ -20,10 +20,11 @@ from requests_oauthlib import OAuth2Session
 from rest_framework import status
 from rest_framework.decorators import (authentication_classes,
                                        permission_classes)
-from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.exceptions import AuthenticationFailed, ParseError
 from rest_framework.generics import (CreateAPIView, DestroyAPIView,
-                                     ListAPIView, RetrieveAPIView,
-                                     RetrieveUpdateAPIView, UpdateAPIView)
+                                     GenericAPIView, ListAPIView,
+                                     RetrieveAPIView, RetrieveUpdateAPIView,
+                                     UpdateAPIView)
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.throttling import UserRateThrottle
@@ -39,6 +40,7 @@ from mkt.account.serializers import (AccountSerializer, AccountInfoSerializer,
                                      FeedbackSerializer, FxALoginSerializer,
                                      LoginSerializer, NewsletterSerializer,
                                      PermissionsSerializer)
+from mkt.account.models import relevant_apps
 from mkt.account.utils import PREVERIFY_KEY, fxa_preverify_token
 from mkt.api.authentication import (RestAnonymousAuthentication,
                                     RestOAuthAuthentication,
@@ -55,13 +57,7 @@ log = commonware.log.getLogger('z.account')
 
 
 def user_relevant_apps(user):
-    return {
-        'developed': list(user.addonuser_set.filter(
-            role=amo.AUTHOR_ROLE_OWNER).values_list('addon_id', flat=True)),
-        'installed': list(user.installed_set.values_list('addon_id',
-            flat=True)),
-        'purchased': list(user.purchase_ids()),
-    }
+    return relevant_apps.lists(user)
 
 
 class MineMixin(object):
@@ -86,6 +82,26 @@ class InstalledView(CORSMixin, MarketplaceView, ListAPIView):
                 '-installed__created')
 
 
+class RelevantAppsView(CORSMixin, MarketplaceView, GenericAPIView):
+    """
+    The apps the user developed, installed and purchased. With a `since`
+    version, only returns what changed since then.
+    """
+    cors_allowed_methods = ['get']
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [RestOAuthAuthentication,
+                              RestSharedSecretAuthentication]
+
+    def get(self, request, *args, **kwargs):
+        since = request.QUERY_PARAMS.get('since')
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                raise ParseError('Invalid since version.')
+        return Response(relevant_apps.changes_since(request.user, since))
+
+
 class CreateAPIViewWithoutModel(MarketplaceView, CreateAPIView):
     """
     A base class for APIs that need to support a create-like action, but
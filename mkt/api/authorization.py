@@ -82,7 +82,7 @@ class AllowAppOwner(BasePermission):
         return request.user.is_authenticated()
 
     def has_object_permission(self, request, view, obj):
-        return obj.authors.filter(pk=request.user.pk).exists()
+        return obj.has_author(request.user)
 
 
 class AllowRelatedAppOwner(BasePermission):
@@ -22,7 +22,8 @@ from multidb.middleware import PinningRouterMiddleware
 from oauthlib.common import Request
 from oauthlib.oauth1.rfc5849 import signature
 
-from mkt.api.models import Access, ACCESS_TOKEN, Token
+from mkt.access.models import get_user_groups
+from mkt.api.models import Access, ACCESS_TOKEN, auth_cache_key, Token
 from mkt.api.oauth import server, validator
 from mkt.carriers import get_carrier
 from mkt.users.models import UserProfile
@@ -31,6 +32,26 @@ from mkt.users.models import UserProfile
 log = commonware.log.getLogger('z.api')
 
 
+def cached_user_id(kind, credential, user_ids):
+    """
+    Returns the id of the user a credential belongs to. It is cached for
+    `settings.API_AUTH_CACHE_TIMEOUT` seconds, or looked up as the first row
+    of `user_ids`, a lazy queryset.
+
+    This only saves the lookup of the user, the credential must still be
+    verified on every request.
+    """
+    key = auth_cache_key(kind, credential)
+    uid = cache.get(key)
+    if uid is None:
+        statsd.incr('api.auth.cache.miss')
+        uid = user_ids[0]
+        cache.set(key, uid, settings.API_AUTH_CACHE_TIMEOUT)
+    else:
+        statsd.incr('api.auth.cache.hit')
+    return uid
+
+
 class RestOAuthMiddleware(object):
     """
     This is based on https://github.com/amrox/django-tastypie-two-legged-oauth
@@ -77,10 +98,12 @@ class RestOAuthMiddleware(object):
                 log.error(u'Cannot find APIAccess token with that key: %s'
                           % oauth_req.attempted_key)
                 return
-            uid = Token.objects.filter(
-                token_type=ACCESS_TOKEN,
-                key=oauth_req.resource_owner_key).values_list(
-                    'user_id', flat=True)[0]
+            uid = cached_user_id(
+                'oauth-3legged', oauth_req.resource_owner_key,
+                Token.objects.filter(
+                    token_type=ACCESS_TOKEN,
+                    key=oauth_req.resource_owner_key).values_list(
+                        'user_id', flat=True))
             request.user = UserProfile.objects.select_related(
                 'user').get(pk=uid)
         else:
@@ -97,15 +120,17 @@ class RestOAuthMiddleware(object):
             except ValueError:
                 log.error('ValueError on verifying_request', exc_info=True)
                 return
-            uid = Access.objects.filter(
-                key=client_key).values_list(
-                    'user_id', flat=True)[0]
+            uid = cached_user_id(
+                'oauth-2legged', client_key,
+                Access.objects.filter(
+                    key=client_key).values_list(
+                        'user_id', flat=True))
             request.user = UserProfile.objects.select_related(
                 'user').get(pk=uid)
 
         # But you cannot have one of these roles.
         denied_groups = set(['Admins'])
-        roles = set(request.user.groups.values_list('name', flat=True))
+        roles = set(group.name for group in get_user_groups(request.user))
         if roles and roles.intersection(denied_groups):
             log.info(u'Attempt to use API with denied role, user: %s'
                      % request.user.pk)
@@ -175,13 +200,30 @@ class RestSharedSecretMiddleware(object):
             return
         try:
             email, hm, unique_id = str(auth).split(',')
-            consumer_id = hashlib.sha1(
-                email + settings.SECRET_KEY).hexdigest()
-            matches = hmac.new(unique_id + settings.SECRET_KEY,
-                               consumer_id, hashlib.sha512).hexdigest() == hm
+            # Tokens are only cached once verified, a cached one doesn't
+            # need to be hashed again.
+            cache_key = auth_cache_key('shared-secret', auth)
+            uid = cache.get(cache_key)
+            if uid is None:
+                consumer_id = hashlib.sha1(
+                    email + settings.SECRET_KEY).hexdigest()
+                matches = hmac.new(unique_id + settings.SECRET_KEY,
+                                   consumer_id,
+                                   hashlib.sha512).hexdigest() == hm
+            else:
+                statsd.incr('api.auth.cache.hit')
+                matches = True
             if matches:
                 try:
-                    request.user = UserProfile.objects.get(email=email)
+                    if uid is None:
+                        statsd.incr('api.auth.cache.miss')
+                        request.user = UserProfile.objects.get(email=email)
+                        cache.set(cache_key, request.user.pk,
+                                  settings.API_AUTH_CACHE_TIMEOUT)
+                    else:
+                        # The token stops working if the email changes.
+                        request.user = UserProfile.objects.get(pk=uid,
+                                                               email=email)
                     request.authed_from.append('RestSharedSecret')
                 except UserProfile.DoesNotExist:
                     log.info('Auth token matches absent user (%s)' % email)
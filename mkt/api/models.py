@@ -1,7 +1,12 @@
+import hashlib
 import os
 import time
 
+from django.core.cache import cache
 from django.db import models
+from django.db.models import signals
+from django.dispatch import receiver
+from django.utils.encoding import smart_str
 
 from aesfield.field import AESField
 
@@ -62,5 +67,27 @@ class Nonce(ModelBase):
                            'request_token', 'access_token')
 
 
+def auth_cache_key(kind, credential):
+    """
+    Key of the cached result of a successful API authentication, see
+    mkt.api.middleware. Only a digest of the credential is used.
+    """
+    return 'api-auth:%s:%s' % (kind,
+                               hashlib.sha256(smart_str(credential)).hexdigest())
+
+
+@receiver(signals.post_save, sender=Access, dispatch_uid='access.post_save')
+@receiver(signals.post_delete, sender=Access,
+          dispatch_uid='access.post_delete')
+def invalidate_access(sender, instance, **kw):
+    cache.delete(auth_cache_key('oauth-2legged', instance.key))
+
+
+@receiver(signals.post_save, sender=Token, dispatch_uid='token.post_save')
+@receiver(signals.post_delete, sender=Token, dispatch_uid='token.post_delete')
+def invalidate_token(sender, instance, **kw):
+    cache.delete(auth_cache_key('oauth-3legged', instance.key))
+
+
 def generate():
     return os.urandom(64).encode('hex')
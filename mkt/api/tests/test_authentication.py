@@ -2,6 +2,7 @@ from datetime import datetime
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.test.client import RequestFactory
 
 from mock import Mock, patch
@@ -14,7 +15,7 @@ from mkt.access.models import Group, GroupUser
 from mkt.api import authentication
 from mkt.api.middleware import (APIBaseMiddleware, RestOAuthMiddleware,
                                 RestSharedSecretMiddleware)
-from mkt.api.models import Access, generate
+from mkt.api.models import Access, auth_cache_key, generate
 from mkt.api.tests.test_oauth import OAuthClient
 from mkt.site.fixtures import fixture
 from mkt.site.helpers import absolutify
@@ -73,6 +74,24 @@ class TestRestOAuthAuthentication(TestCase):
         self.add_group_user(self.profile, 'App Reviewers')
         ok_(self.auth.authenticate(Request(self.call())))
 
+    def test_cached(self):
+        key = auth_cache_key('oauth-2legged', self.access.key)
+        ok_(self.auth.authenticate(Request(self.call())))
+        eq_(cache.get(key), self.profile.pk)
+        ok_(self.auth.authenticate(Request(self.call())))
+
+    def test_cache_invalidated_on_revoke(self):
+        key = auth_cache_key('oauth-2legged', self.access.key)
+        ok_(self.auth.authenticate(Request(self.call())))
+        self.access.delete()
+        eq_(cache.get(key), None)
+        ok_(not self.auth.authenticate(Request(self.call())))
+
+    def test_cache_invalidated_on_group_change(self):
+        ok_(self.auth.authenticate(Request(self.call())))
+        self.add_group_user(self.profile, 'Admins')
+        ok_(not self.auth.authenticate(Request(self.call())))
+
 
 class TestRestAnonymousAuthentication(TestCase):
 
@@ -136,6 +155,28 @@ class TestSharedSecretAuthentication(TestCase):
         ok_(req.user.is_authenticated())
         eq_(self.profile.pk, req.user.pk)
 
+    def test_session_auth_cached(self):
+        auth = ('cfinke@m.com,56b6f1a3dd735d962c56ce7d8f46e02ec1d4748d2c00c40'
+                '7d75f0969d08bb9c68c31b3371aa8130317815c89e5072e31bb94b4121c5c'
+                '165f3515838d4d6c60c4,165d631d3c3045458b4516242dad7ae')
+        for i in range(2):
+            req = RequestFactory().post(
+                '/api/', HTTP_AUTHORIZATION='mkt-shared-secret ' + auth)
+            req.user = AnonymousUser()
+            for m in self.middlewares:
+                m().process_request(req)
+            eq_(req.user.pk, self.profile.pk)
+        eq_(cache.get(auth_cache_key('shared-secret', auth)), self.profile.pk)
+
+        # Changing the email invalidates the token, even if it was cached.
+        self.profile.update(email='changed@m.com')
+        req = RequestFactory().post(
+            '/api/', HTTP_AUTHORIZATION='mkt-shared-secret ' + auth)
+        req.user = AnonymousUser()
+        for m in self.middlewares:
+            m().process_request(req)
+        ok_(not req.user.is_authenticated())
+
     def test_failed_session_auth(self):
         req = RequestFactory().post(
             '/api/',
@@ -1,11 +1,12 @@
 import os
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 
 import amo
 import mkt.carriers
 import mkt.regions
+from amo.utils import bulk_update
 from mkt.constants.categories import CATEGORY_CHOICES
 from mkt.site.decorators import use_master
 from mkt.site.models import ManagerBase, ModelBase
@@ -19,6 +20,25 @@ from .fields import ColorField
 from .managers import PublicCollectionsManager
 
 
+def reorder_memberships(qs, new_order):
+    """
+    Passed the memberships of a single collection and a list of app IDs,
+    gives each of these apps its position in the list, in a single UPDATE
+    and with a single cache invalidation. Returns the IDs of the apps whose
+    position changed, the only ones that need to be reindexed.
+    """
+    position = dict((pk, order) for order, pk in enumerate(new_order))
+    with transaction.atomic():
+        memberships = list(qs.no_cache().select_for_update()
+                             .filter(app__in=new_order))
+        changed = [m for m in memberships if m.order != position[m.app_id]]
+        bulk_update(qs.model, dict((m.pk, {'order': position[m.app_id]})
+                                   for m in changed))
+    if changed:
+        qs.model.objects.invalidate(*memberships)
+    return [m.app_id for m in changed]
+
+
 class Collection(ModelBase):
     # `collection_type` for rocketfuel, not transonic.
     collection_type = models.IntegerField(choices=COLLECTION_TYPES)
@@ -134,10 +154,10 @@ class Collection(ModelBase):
         existing_pks = self.apps().no_cache().values_list('pk', flat=True)
         if set(existing_pks) != set(new_order):
             raise ValueError('Not all apps included')
-        for order, pk in enumerate(new_order):
-            CollectionMembership.objects.get(collection=self,
-                                             app_id=pk).update(order=order)
-        index_webapps.delay(new_order)
+        changed = reorder_memberships(
+            CollectionMembership.objects.filter(collection=self), new_order)
+        if changed:
+            index_webapps.delay(changed)
 
     def has_curator(self, userprofile):
         """
@@ -3,8 +3,9 @@ import hashlib
 import StringIO
 import uuid
 
+import commonware.log
+from django_statsd.clients import statsd
 from rest_framework import serializers
-from rest_framework.fields import get_component
 from rest_framework.reverse import reverse
 from tower import ugettext_lazy as _
 
@@ -21,10 +22,105 @@ from mkt.constants.categories import CATEGORY_CHOICES
 from mkt.features.utils import get_feature_profile
 from mkt.users.models import UserProfile
 from mkt.webapps.indexers import WebappIndexer
+from mkt.webapps.models import Webapp
 from mkt.webapps.serializers import SimpleAppSerializer, SimpleESAppSerializer
 
 from .constants import COLLECTIONS_TYPE_FEATURED, COLLECTIONS_TYPE_OPERATOR
-from .models import Collection
+from .models import Collection, CollectionMembership
+
+
+log = commonware.log.getLogger('z.collections')
+
+# To work around elasticsearch default limit of 10, hardcode a higher limit
+# of apps per collection.
+COLLECTION_APPS_LIMIT = 100
+
+
+class CollectionAppResolver(object):
+    """
+    Fetches the apps of every collection on a page at once, instead of
+    making one query per collection: a single `_msearch` with ES, or a single
+    membership query and a single app query without. Apps belonging to
+    several collections are only serialized once.
+    """
+
+    def __init__(self, field, collections, request, use_es=False):
+        self.field = field
+        self.collections = collections
+        self.request = request
+        self.use_es = use_es
+        # Collection pk -> list of serialized apps.
+        self.apps = None
+
+    def covers(self, collection, request, use_es):
+        return (self.request is request and self.use_es == use_es and
+                any(c.pk == collection.pk for c in self.collections))
+
+    def get_apps(self, collection):
+        if self.apps is None:
+            if self.use_es:
+                self.apps = self.fetch_es()
+            else:
+                self.apps = self.fetch_db()
+        return self.apps.get(collection.pk, [])
+
+    def serialize(self, app_ids, apps):
+        """
+        Serializes the unique apps of `apps`, a dict of app id to app, once.
+        Then returns the serialized apps of each collection from `app_ids`, a
+        dict of collection pk to the list of its app ids.
+        """
+        unique_ids = apps.keys()
+        data = self.field.to_native([apps[app_id] for app_id in unique_ids],
+                                    use_es=self.use_es)
+        serialized = dict(zip(unique_ids, data))
+        return dict((pk, [serialized[app_id] for app_id in ids
+                          if app_id in serialized])
+                    for pk, ids in app_ids.items())
+
+    def fetch_es(self):
+        index = WebappIndexer.get_index()
+        doc_type = WebappIndexer.get_mapping_type_name()
+        body = []
+        for collection in self.collections:
+            sq = self.field.get_app_filter(collection, self.request)
+            body.append({'index': index, 'type': doc_type})
+            body.append(sq[:COLLECTION_APPS_LIMIT].to_dict())
+
+        with statsd.timer('mkt.collections.apps_msearch'):
+            responses = WebappIndexer.get_es().msearch(body=body)['responses']
+
+        app_ids, hits = {}, {}
+        for collection, response in zip(self.collections, responses):
+            if 'error' in response:
+                statsd.incr('mkt.collections.apps_msearch.error')
+                log.error('Searching the apps of collection {0} failed: {1}'
+                          .format(collection.pk, response['error']))
+                continue
+            ids = app_ids[collection.pk] = []
+            for hit in response['hits']['hits']:
+                app_id = int(hit['_id'])
+                ids.append(app_id)
+                hits.setdefault(app_id, hit)
+        return self.serialize(app_ids, hits)
+
+    def fetch_db(self):
+        memberships = (CollectionMembership.objects
+                       .filter(collection__in=[c.pk for c in self.collections])
+                       .order_by('order')
+                       .values_list('collection_id', 'app_id'))
+        app_ids = dict((c.pk, []) for c in self.collections)
+        for collection_id, app_id in memberships:
+            app_ids[collection_id].append(app_id)
+
+        all_app_ids = set(app_id for ids in app_ids.values() for app_id in ids)
+        if not all_app_ids:
+            return app_ids
+        apps = self.field.filter_apps(
+            Webapp.objects.filter(pk__in=all_app_ids, disabled_by_user=False,
+                                  status=amo.STATUS_PUBLIC),
+            self.request)
+        return self.serialize(app_ids, dict((app.pk, app) for app in apps))
 
 
 class CollectionMembershipField(serializers.RelatedField):
@@ -41,15 +137,26 @@ class CollectionMembershipField(serializers.RelatedField):
         'normal': SimpleAppSerializer,
     }
 
-    def to_native(self, qs, use_es=False):
-        if use_es:
-            serializer_class = self.app_serializer_classes['es']
-            # To work around elasticsearch default limit of 10, hardcode a
-            # higher limit.
-            qs = qs[:100].execute()
-        else:
-            serializer_class = self.app_serializer_classes['normal']
-        return serializer_class(qs, context=self.context, many=True).data
+    def to_native(self, apps, use_es=False):
+        serializer_class = self.app_serializer_classes[
+            'es' if use_es else 'normal']
+        return serializer_class(apps, context=self.context, many=True).data
+
+    def get_resolver(self, obj, request, use_es=False):
+        """
+        Returns the CollectionAppResolver for the page `obj` is on, the
+        collections of the page being in self.context['collections'] if the
+        view put them there.
+        """
+        resolver = self.context.get('collection-app-resolver')
+        if resolver is None or not resolver.covers(obj, request, use_es):
+            collections = self.context.get('collections') or []
+            if not any(c.pk == obj.pk for c in collections):
+                collections = [obj]
+            resolver = CollectionAppResolver(self, collections, request,
+                                             use_es=use_es)
+            self.context['collection-app-resolver'] = resolver
+        return resolver
 
     def field_to_native(self, obj, field_name):
         if not hasattr(self, 'context') or 'request' not in self.context:
@@ -66,9 +173,10 @@ class CollectionMembershipField(serializers.RelatedField):
         if self.context.get('use-es-for-apps') and self.context.get('view'):
             return self.field_to_native_es(obj, request)
 
-        qs = get_component(obj, self.source)
+        return self.get_resolver(obj, request).get_apps(obj)
 
-        # Filter apps based on device and feature profiles.
+    def filter_apps(self, qs, request):
+        """Filter apps based on device and feature profiles."""
         device = get_device(request)
         profile = get_feature_profile(request)
         if device and device != amo.DEVICE_DESKTOP:
@@ -76,8 +184,7 @@ class CollectionMembershipField(serializers.RelatedField):
         if profile:
             qs = qs.filter(**profile.to_kwargs(
                 prefix='_current_version__features__has_'))
-
-        return self.to_native(qs)
+        return qs
 
     def field_to_native_es(self, obj, request):
         """
@@ -87,6 +194,13 @@ class CollectionMembershipField(serializers.RelatedField):
         Relies on a FeaturedSearchView instance in self.context['view']
         to properly rehydrate results returned by ES.
         """
+        return self.get_resolver(obj, request, use_es=True).get_apps(obj)
+
+    def get_app_filter(self, obj, request):
+        """
+        Returns the ES query for the apps of the collection `obj`, in their
+        order in the collection.
+        """
         device = get_device(request)
 
         app_filters = {'profile': get_feature_profile(request)}
@@ -104,8 +218,7 @@ class CollectionMembershipField(serializers.RelatedField):
                 }
             }
         })
-
-        return self.to_native(qs, use_es=True)
+        return qs
 
 
 class CollectionImageField(serializers.HyperlinkedRelatedField):
@@ -1,5 +1,8 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from mock import patch
-from nose.tools import eq_
+from nose.tools import eq_, ok_
 
 import amo.tests
 from mkt.collections.constants import COLLECTIONS_TYPE_FEATURED
@@ -118,7 +121,31 @@ class TestCollection(amo.tests.TestCase):
         self.collection.reorder(reordered_pks)
         self.assertSetEqual(self.collection.apps().values_list('pk', flat=True),
             reordered_pks)
-        mocked_index_webapps.assert_called_with(reordered_pks)
+        self.assertSetEqual(mocked_index_webapps.call_args[0][0],
+                            reordered_pks)
+
+    @patch('mkt.collections.models.index_webapps.delay')
+    def test_apps_reorder_only_moved(self, mocked_index_webapps):
+        self._generate_apps()
+        self._add_apps()
+        reordered_pks = [self.apps[1].pk, self.apps[0].pk,
+                         self.apps[2].pk, self.apps[3].pk]
+        with CaptureQueriesContext(connection) as queries:
+            self.collection.reorder(reordered_pks)
+        updates = [q['sql'] for q in queries.captured_queries
+                   if q['sql'].startswith('UPDATE')]
+        eq_(len(updates), 1)
+        eq_(list(self.collection.apps().no_cache()
+                 .values_list('pk', flat=True)), reordered_pks)
+        self.assertSetEqual(mocked_index_webapps.call_args[0][0],
+                            [self.apps[0].pk, self.apps[1].pk])
+
+    @patch('mkt.collections.models.index_webapps.delay')
+    def test_apps_reorder_unchanged(self, mocked_index_webapps):
+        self._generate_apps()
+        self._add_apps()
+        self.collection.reorder([app.pk for app in self.apps])
+        ok_(not mocked_index_webapps.called)
 
     def test_app_deleted(self):
         collection = self.collection
@@ -6,6 +6,7 @@ from django.contrib.auth.models import AnonymousUser
 from django.test.client import RequestFactory
 from django.test.utils import override_settings
 
+from mock import patch
 from nose.tools import eq_, ok_
 from rest_framework import serializers
 
@@ -22,6 +23,7 @@ from mkt.constants.features import FeatureProfile
 from mkt.search.views import FeaturedSearchView
 from mkt.site.fixtures import fixture
 from mkt.users.models import UserProfile
+from mkt.webapps.indexers import WebappIndexer
 from mkt.webapps.models import AddonUser
 from mkt.webapps.serializers import SimpleAppSerializer
 
@@ -82,6 +84,43 @@ class BaseTestCollectionMembershipField(object):
 
         return self.field.field_to_native(self.collection, 'apps')
 
+    def _get_apps(self, collection, request):
+        self.field.context['request'] = request
+        return self.field.field_to_native(collection, 'apps')
+
+    def refresh_apps(self):
+        pass
+
+    def test_batched(self):
+        self.app2 = amo.tests.app_factory()
+        other = Collection.objects.create(**self.collection_data)
+        other.add_app(self.app2)
+        other.add_app(self.app)
+        self.refresh_apps()
+
+        request = self.get_request()
+        self.field.context['collections'] = [self.collection, other]
+        result = self._get_apps(self.collection, request)
+        eq_([int(app['id']) for app in result], [self.app.pk])
+
+        # The apps of the other collection were fetched at the same time.
+        with self.assertNumQueries(0):
+            with patch.object(WebappIndexer, 'get_es') as get_es:
+                other_result = self._get_apps(other, request)
+        ok_(not get_es.called)
+        eq_([int(app['id']) for app in other_result],
+            [self.app2.pk, self.app.pk])
+        # Apps are only serialized once.
+        ok_(other_result[1] is result[0])
+
+    def test_not_batched_with_another_request(self):
+        request = self.get_request()
+        self.field.context['collections'] = [self.collection]
+        eq_(len(self._get_apps(self.collection, request)), 1)
+        self.app.update(status=amo.STATUS_PENDING)
+        self.refresh_apps()
+        eq_(len(self._get_apps(self.collection, self.get_request())), 0)
+
     def test_ordering(self):
         self.app2 = amo.tests.app_factory()
         self.app2.addondevicetype_set.get_or_create(
@@ -168,6 +207,13 @@ class TestCollectionMembershipFieldES(BaseTestCollectionMembershipField,
         self.field.context['request'] = request
         return self.field.field_to_native_es(self.collection, request)
 
+    def _get_apps(self, collection, request):
+        self.field.context['request'] = request
+        return self.field.field_to_native_es(collection, request)
+
+    def refresh_apps(self):
+        self.refresh('webapp')
+
     def test_field_to_native_profile_mismatch(self):
         self.app.current_version.features.update(has_geolocation=True)
         # FIXME: a simple refresh() wasn't enough, don't we reindex apps when
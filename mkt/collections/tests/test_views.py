@@ -12,6 +12,7 @@ from django.http import QueryDict
 from django.test.utils import override_settings
 from django.utils import translation
 
+from mock import patch
 from nose import SkipTest
 from nose.tools import eq_, ok_
 from PIL import Image
@@ -26,6 +27,7 @@ from mkt.collections.constants import (COLLECTIONS_TYPE_BASIC,
                                        COLLECTIONS_TYPE_FEATURED,
                                        COLLECTIONS_TYPE_OPERATOR)
 from mkt.collections.models import Collection
+from mkt.collections.serializers import CollectionAppResolver
 from mkt.collections.tests.test_serializers import (CollectionDataMixin,
                                                     IMAGE_DATA)
 from mkt.collections.views import CollectionViewSet
@@ -177,6 +179,26 @@ class TestCollectionViewSetListing(BaseCollectionViewSetTest):
         self.make_publisher()
         self.listing(self.client)
 
+    def test_listing_batched(self):
+        self.create_apps(number=2)
+        self.add_apps_to_collection(*self.apps)
+        other = Collection.objects.create(**self.collection_data)
+        other.add_app(self.apps[1])
+        other.add_app(self.apps[0])
+
+        fetch_db = CollectionAppResolver.fetch_db
+        with patch.object(CollectionAppResolver, 'fetch_db', autospec=True,
+                          side_effect=fetch_db) as mock_fetch_db:
+            res = self.anon.get(self.list_url)
+        eq_(res.status_code, 200)
+        # The apps of both collections were fetched at once.
+        eq_(mock_fetch_db.call_count, 1)
+        data = json.loads(res.content)['objects']
+        eq_([app['slug'] for app in data[0]['apps']],
+            [self.apps[1].app_slug, self.apps[0].app_slug])
+        eq_([app['slug'] for app in data[1]['apps']],
+            [app.app_slug for app in self.apps])
+
     def test_options_has_perms(self):
         self.make_publisher()
         res = self.client.options(self.list_url)
@@ -81,6 +81,17 @@ class CollectionViewSet(CORSMixin, SlugOrIdMixin, MarketplaceView,
                 response.status_code = status.HTTP_400_BAD_REQUEST
         return response
 
+    def get_pagination_serializer(self, page):
+        """
+        Pass the collections of the page to the serializer, so that their
+        apps are fetched all at once.
+        """
+        page.object_list = list(page.object_list)
+        serializer = super(CollectionViewSet, self).get_pagination_serializer(
+            page)
+        serializer.context['collections'] = page.object_list
+        return serializer
+
     def get_object(self, queryset=None):
         """
         Custom get_object implementation to prevent DRF from filtering when we
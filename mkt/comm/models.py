@@ -14,7 +14,7 @@ from mkt.access import acl
 from mkt.constants import comm
 from mkt.site.models import ModelBase
 from mkt.translations.fields import save_signal
-from mkt.webapps.models import AddonUser
+from mkt.webapps.models import get_author_roles
 
 
 class CommunicationPermissionModel(ModelBase):
@@ -105,9 +105,8 @@ def user_has_perm_thread(thread, profile):
         return True
 
     # User is a developer of the add-on and has the permission to read.
-    user_is_author = AddonUser.objects.filter(addon_id=thread._addon_id,
-                                              user=profile)
-    if thread.read_permission_developer and user_is_author.exists():
+    user_is_author = thread._addon_id in get_author_roles(profile)
+    if thread.read_permission_developer and user_is_author:
         return True
 
     return check_acls_comm_obj(thread, profile)
@@ -128,8 +127,8 @@ def user_has_perm_note(note, profile):
         return True
 
     # User is a developer of the add-on and has the permission to read.
-    user_is_author = profile.addons.filter(pk=note.thread._addon_id)
-    if note.read_permission_developer and user_is_author.exists():
+    user_is_author = note.thread._addon_id in get_author_roles(profile)
+    if note.read_permission_developer and user_is_author:
         return True
 
     return check_acls_comm_obj(note, profile)
@@ -75,6 +75,19 @@ REFUND_STATUSES = {
     REFUND_FAILED: _('Failed'),
 }
 
+# Webpay postbacks are recorded then fulfilled asynchronously, see
+# mkt.purchase.models.Fulfillment.
+FULFILLMENT_PENDING = 0
+FULFILLMENT_COMPLETE = 1
+# Gave up after retrying, needs to be looked at.
+FULFILLMENT_FAILED = 2
+
+FULFILLMENT_STATUSES = {
+    FULFILLMENT_PENDING: _('Pending'),
+    FULFILLMENT_COMPLETE: _('Complete'),
+    FULFILLMENT_FAILED: _('Failed'),
+}
+
 PAYMENT_DETAILS_ERROR = {
     'CREATED': _('The payment was received, but not completed.'),
     'INCOMPLETE': _('The payment was received, but not completed.'),
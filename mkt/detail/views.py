@@ -29,7 +29,7 @@ def manifest(request, uuid):
     addon = get_object_or_404(Webapp, guid=uuid, is_packaged=True)
     is_avail = addon.status in [amo.STATUS_PUBLIC, amo.STATUS_UNLISTED,
                                 amo.STATUS_BLOCKED]
-    is_owner = addon.authors.filter(pk=request.user.pk).exists()
+    is_owner = addon.has_author(request.user)
     is_owner_avail = addon.status == amo.STATUS_APPROVED
     package_etag = hashlib.sha256()
 
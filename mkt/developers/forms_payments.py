@@ -462,8 +462,8 @@ class AccountListForm(happyforms.Form):
 
         self.is_owner = None
         if self.addon:
-            self.is_owner = self.addon.authors.filter(pk=self.user.pk,
-                addonuser__role=amo.AUTHOR_ROLE_OWNER).exists()
+            self.is_owner = self.addon.has_author(self.user,
+                                                  [amo.AUTHOR_ROLE_OWNER])
 
         self.fields['accounts'].queryset = self.agreed_payment_accounts
 
@@ -12,12 +12,15 @@ import urlparse
 import uuid
 import zipfile
 from datetime import date
+from multiprocessing.pool import ThreadPool
 
 from django import forms
 from django.conf import settings
 from django.core.files.storage import default_storage as storage
+from django.db import IntegrityError, transaction
 from django.utils.http import urlencode
 
+import pkg_resources
 import requests
 from appvalidator import validate_app, validate_packaged_app
 from celery_tasktree import task_with_callbacks
@@ -27,10 +30,12 @@ from PIL import Image
 from tower import ugettext as _
 
 import amo
-from amo.utils import remove_icons, resize_image, strip_bom
+from amo.utils import remove_icons, resize_images, strip_bom
+from lib.iarc.client import get_iarc_client
 from mkt.constants import APP_PREVIEW_SIZES
-from mkt.files.models import File, FileUpload, FileValidation
-from mkt.files.utils import SafeUnzip
+from mkt.files.models import (CachedValidation, File, FileUpload,
+                              FileValidation)
+from mkt.files.utils import _get_hash, SafeUnzip
 from mkt.site.decorators import set_modified_on, write
 from mkt.site.helpers import absolutify
 from mkt.site.mail import send_mail_jinja
@@ -49,6 +54,9 @@ REQUESTS_HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Mobile; rv:18.0) Gecko/18.0 Firefox/18.0'
 }
 
+# Part of the image cache keys, since they change the output of Pngcrush.
+PNGCRUSH_ARGS = ['-q', '-rem', 'alla', '-brute', '-reduce']
+
 
 @task
 @write
@@ -112,50 +120,194 @@ def file_validator(file_id, **kw):
     return FileValidation.from_json(file, result)
 
 
+# The validator doesn't change while the process runs.
+_validator_version_cache = {}
+
+# The id of the errors the validator reports for its own failures.
+VALIDATOR_SYSTEM_ERROR = ['validator', 'unexpected_exception']
+
+
+def _validator_version():
+    """
+    Returns the version of the app-validator in use. Upgrades that don't
+    change it must bump VALIDATION_CACHE_VERSION.
+    """
+    if 'version' not in _validator_version_cache:
+        try:
+            version = pkg_resources.get_distribution('app-validator').version
+        except pkg_resources.DistributionNotFound:
+            version = None
+        _validator_version_cache['version'] = version
+    return _validator_version_cache['version']
+
+
+def _is_transient_failure(validation):
+    """
+    Whether `validation` failed because of the validator itself, e.g. it
+    timed out, rather than because of the content validated. These results
+    aren't cached.
+    """
+    try:
+        messages = json.loads(validation).get('messages', [])
+    except (TypeError, ValueError):
+        return True
+    for message in messages:
+        if (list(message.get('id', []))[:2] == VALIDATOR_SYSTEM_ERROR or
+                message.get('message') == 'Validation timed out'):
+            return True
+    return False
+
+
+def _validation_cache_key(file_path, is_packaged, url=None):
+    """
+    Returns the key the validation of `file_path` is cached under: the sha256
+    of its content, the validator version and the settings the validation
+    depends on. Returns None if `file_path` can't be read.
+    """
+    try:
+        file_hash = _get_hash(file_path, hash=hashlib.sha256)
+    except IOError, e:
+        log.warning(u'Could not hash %s for validation cache: %s'
+                    % (file_path, e))
+        return None
+    key = [file_hash, is_packaged, _validator_version(),
+           settings.VALIDATION_CACHE_VERSION, settings.VALIDATOR_IAF_URLS]
+    if is_packaged:
+        key += [settings.VALIDATOR_TIMEOUT, settings.SPIDERMONKEY]
+    else:
+        key += [url]
+    return hashlib.sha256(json.dumps(key)).hexdigest()
+
+
 def run_validator(file_path, url=None):
-    """A pre-configured wrapper around the app validator."""
+    """
+    A pre-configured wrapper around the app validator.
+
+    Results are cached in `CachedValidation`, content that was already
+    validated isn't validated again. Failures of the validator itself aren't
+    cached.
+    """
 
     with statsd.timer('mkt.developers.validator'):
         is_packaged = zipfile.is_zipfile(file_path)
+        cache_key = _validation_cache_key(file_path, is_packaged, url=url)
+        cached = (CachedValidation.objects.filter(key=cache_key)
+                  .values_list('validation', flat=True) if cache_key else [])
+        if cached:
+            log.info(u'Using cached validation for path: %s' % file_path)
+            statsd.incr('mkt.developers.validator.cache_hit')
+            return cached[0]
+        statsd.incr('mkt.developers.validator.cache_miss')
+
         if is_packaged:
             log.info(u'Running `validate_packaged_app` for path: %s'
                      % (file_path))
             with statsd.timer('mkt.developers.validate_packaged_app'):
-                return validate_packaged_app(file_path,
+                validation = validate_packaged_app(file_path,
                     market_urls=settings.VALIDATOR_IAF_URLS,
                     timeout=settings.VALIDATOR_TIMEOUT,
                     spidermonkey=settings.SPIDERMONKEY)
         else:
             log.info(u'Running `validate_app` for path: %s' % (file_path))
             with statsd.timer('mkt.developers.validate_app'):
-                return validate_app(storage.open(file_path).read(),
-                                    market_urls=settings.VALIDATOR_IAF_URLS,
-                                    url=url)
+                validation = validate_app(
+                    storage.open(file_path).read(),
+                    market_urls=settings.VALIDATOR_IAF_URLS, url=url)
+
+        if cache_key and not _is_transient_failure(validation):
+            try:
+                with transaction.atomic():
+                    CachedValidation.objects.create(key=cache_key,
+                                                    validation=validation)
+            except IntegrityError:
+                # Validated by another task in the meantime.
+                pass
+        return validation
 
 
 def _hash_file(fd):
     return hashlib.md5(fd.read()).hexdigest()[:8]
 
 
+def _image_cache_path(src_hash, size, crushed=True):
+    """
+    Returns the path of the cached output of resizing the image whose content
+    hashes to `src_hash` to `size`, and crushing it with PNGCRUSH_ARGS when
+    `crushed` is True.
+    """
+    key = json.dumps([src_hash, size, PNGCRUSH_ARGS if crushed else None])
+    return os.path.join(settings.IMAGE_CACHE_PATH,
+                        hashlib.sha256(key).hexdigest())
+
+
+def _copy_from_image_cache(src_hash, size_dsts, crushed=True, locally=False):
+    """
+    Copies the cached outputs for the (dst, size) tuples in `size_dsts` to
+    their destination. Returns a dict of {dst: (width, height)} for the ones
+    that were found in the cache.
+    """
+    open_ = open if locally else storage.open
+    found = {}
+    for dst, size in size_dsts:
+        cached = _image_cache_path(src_hash, size, crushed=crushed)
+        try:
+            with open(cached, 'rb') as src:
+                found[dst] = Image.open(src).size
+                src.seek(0)
+                with open_(dst, 'wb') as fd:
+                    shutil.copyfileobj(src, fd)
+            # Keep the entries in use from being garbage collected.
+            os.utime(cached, None)
+        except IOError:
+            continue
+    return found
+
+
+def _store_in_image_cache(path, src_hash, size, crushed=True):
+    """Keeps a copy of the processed image `path` in the image cache."""
+    cached = _image_cache_path(src_hash, size, crushed=crushed)
+    # Copy to a temporary file and rename it so that other workers never see
+    # a partial image.
+    tmp_path = '%s.%s' % (cached, uuid.uuid4().hex)
+    try:
+        if not os.path.exists(settings.IMAGE_CACHE_PATH):
+            os.makedirs(settings.IMAGE_CACHE_PATH)
+        shutil.copyfile(path, tmp_path)
+        os.rename(tmp_path, cached)
+    except (IOError, OSError), e:
+        log.warning('Error caching image: %s; %s' % (path, e))
+
+
 @task
 @set_modified_on
 def resize_icon(src, dst, sizes, locally=False, **kw):
     """Resizes addon icons."""
     log.info('[1@None] Resizing icon: %s' % dst)
     try:
-        for s in sizes:
-            size_dst = '%s-%s.png' % (dst, s)
-            resize_image(src, size_dst, (s, s),
-                         remove_src=False, locally=locally)
-            pngcrush_image.delay(size_dst, **kw)
-
         if locally:
             with open(src) as fd:
-                icon_hash = _hash_file(fd)
-            os.remove(src)
+                content = fd.read()
         else:
             with storage.open(src) as fd:
-                icon_hash = _hash_file(fd)
+                content = fd.read()
+        icon_hash = hashlib.md5(content).hexdigest()[:8]
+        src_hash = hashlib.sha256(content).hexdigest()
+
+        # Icons already generated from the same image are copied from the
+        # image cache, only the other sizes are resized and crushed.
+        size_dsts = [('%s-%s.png' % (dst, s), (s, s)) for s in sizes]
+        cached = _copy_from_image_cache(src_hash, size_dsts, locally=locally)
+        size_dsts = [(d, s) for d, s in size_dsts if d not in cached]
+        if size_dsts:
+            resize_images(src, size_dsts, remove_src=False, locally=locally)
+            pngcrush_images.delay(
+                [size_dst for size_dst, s in size_dsts],
+                image_cache=[(src_hash, s) for size_dst, s in size_dsts],
+                **kw)
+
+        if locally:
+            os.remove(src)
+        else:
             storage.delete(src)
 
         log.info('Icon resizing completed for: %s' % dst)
@@ -164,6 +316,26 @@ def resize_icon(src, dst, sizes, locally=False, **kw):
         log.error("Error saving addon icon: %s; %s" % (e, dst))
 
 
+def _pngcrush(src):
+    """
+    Runs Pngcrush on `src`, replacing it with the optimized image. Returns
+    an error message if that failed.
+    """
+    # pngcrush -ow has some issues, use a temporary file and do the final
+    # renaming ourselves.
+    suffix = '.opti.png'
+    tmp_path = '%s%s' % (os.path.splitext(src)[0], suffix)
+    cmd = [settings.PNGCRUSH_BIN] + PNGCRUSH_ARGS + ['-e', suffix, src]
+    sp = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    stdout, stderr = sp.communicate()
+
+    if sp.returncode != 0:
+        return stderr.strip() or 'Pngcrush exited with %s' % sp.returncode
+
+    shutil.move(tmp_path, src)
+
+
 @task
 @set_modified_on
 def pngcrush_image(src, hash_field='image_hash', **kw):
@@ -176,22 +348,12 @@ def pngcrush_image(src, hash_field='image_hash', **kw):
     """
     log.info('[1@None] Optimizing image: %s' % src)
     try:
-        # pngcrush -ow has some issues, use a temporary file and do the final
-        # renaming ourselves.
-        suffix = '.opti.png'
-        tmp_path = '%s%s' % (os.path.splitext(src)[0], suffix)
-        cmd = [settings.PNGCRUSH_BIN, '-q', '-rem', 'alla', '-brute',
-               '-reduce', '-e', suffix, src]
-        sp = subprocess.Popen(cmd, stdin=subprocess.PIPE,
-                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = sp.communicate()
-
-        if sp.returncode != 0:
-            log.error('Error optimizing image: %s; %s' % (src, stderr.strip()))
+        error = _pngcrush(src)
+        if error:
+            log.error('Error optimizing image: %s; %s' % (src, error))
             pngcrush_image.retry(args=[src], kwargs=kw, max_retries=3)
             return False
 
-        shutil.move(tmp_path, src)
         log.info('Image optimization completed for: %s' % src)
 
         # Return hash for set_modified_on.
@@ -206,6 +368,50 @@ def pngcrush_image(src, hash_field='image_hash', **kw):
         log.error('Error optimizing image: %s; %s' % (src, e))
 
 
+@task
+@set_modified_on
+def pngcrush_images(srcs, image_cache=None, **kw):
+    """
+    Optimizes several PNG images, running up to `settings.PNGCRUSH_WORKERS`
+    Pngcrush processes at the same time.
+
+    srcs -- filesystem image paths
+    image_cache -- (source hash, size) tuples matching `srcs`, the optimized
+                   images are kept in the image cache under them
+    """
+    log.info('[1@None] Optimizing images: %s' % ', '.join(srcs))
+
+    def crush(src):
+        try:
+            return _pngcrush(src)
+        except Exception, e:
+            return e
+
+    pool = ThreadPool(min(len(srcs), settings.PNGCRUSH_WORKERS) or 1)
+    try:
+        errors = pool.map(crush, srcs)
+    finally:
+        pool.close()
+
+    image_cache = image_cache or [None] * len(srcs)
+    failed, failed_cache = [], []
+    for src, error, cache_key in zip(srcs, errors, image_cache):
+        if error:
+            log.error('Error optimizing image: %s; %s' % (src, error))
+            failed.append(src)
+            failed_cache.append(cache_key)
+        elif cache_key:
+            _store_in_image_cache(src, *cache_key)
+    if failed:
+        if any(failed_cache):
+            kw['image_cache'] = failed_cache
+        pngcrush_images.retry(args=[failed], kwargs=kw, max_retries=3)
+        return False
+
+    log.info('Image optimization completed for: %s' % ', '.join(srcs))
+    return True
+
+
 @task
 @set_modified_on
 def resize_preview(src, instance, **kw):
@@ -225,14 +431,26 @@ def resize_preview(src, instance, **kw):
             thumbnail_size = thumbnail_size[::-1]
             image_size = image_size[::-1]
 
+        size_dsts = []
         if kw.get('generate_thumbnail', True):
-            sizes['thumbnail'] = resize_image(src, thumb_dst,
-                                              thumbnail_size,
-                                              remove_src=False)
+            size_dsts.append((thumb_dst, thumbnail_size))
         if kw.get('generate_image', True):
-            sizes['image'] = resize_image(src, full_dst,
-                                          image_size,
-                                          remove_src=False)
+            size_dsts.append((full_dst, image_size))
+
+        # Previews are not crushed. Sizes missing from the image cache are
+        # generated from a single decoding of src.
+        with storage.open(src, 'rb') as fp:
+            src_hash = hashlib.sha256(fp.read()).hexdigest()
+        resized = _copy_from_image_cache(src_hash, size_dsts, crushed=False)
+        size_dsts = [(d, s) for d, s in size_dsts if d not in resized]
+        if size_dsts:
+            resized.update(resize_images(src, size_dsts, remove_src=False))
+            for dst, s in size_dsts:
+                _store_in_image_cache(dst, src_hash, s, crushed=False)
+        if thumb_dst in resized:
+            sizes['thumbnail'] = resized[thumb_dst]
+        if full_dst in resized:
+            sizes['image'] = resized[full_dst]
         instance.sizes = sizes
         instance.save()
         log.info('Preview resized to: %s' % thumb_dst)
@@ -272,11 +490,20 @@ def get_preview_sizes(ids, **kw):
                           % (addon.pk, err))
 
 
-def _fetch_content(url):
+def _fetch_content(url, headers=None):
+    """
+    Fetches `url`. Extra `headers` can make the request conditional, in which
+    case a 304 response is returned as well.
+    """
     with statsd.timer('developers.tasks.fetch_content'):
         try:
             res = requests.get(url, timeout=30, stream=True,
-                               headers=REQUESTS_HEADERS)
+                               headers=dict(REQUESTS_HEADERS,
+                                            **(headers or {})))
+
+            if res.status_code == 304 and headers:
+                statsd.incr('developers.tasks.fetch_content.not_modified')
+                return res
 
             if not 200 <= res.status_code < 300:
                 statsd.incr('developers.tasks.fetch_content.error')
@@ -412,7 +639,15 @@ def failed_validation(*messages, **kwargs):
                        'prelim': True})
 
 
-def _fetch_manifest(url, upload=None):
+def _fetch_manifest(url, upload=None, validators=None):
+    """
+    Fetches and checks the manifest at `url`.
+
+    `validators` can be a dict with the 'etag' and 'last_modified' of a
+    previous response, used to make a conditional request. It is updated with
+    those of the new response. None is returned if the manifest was not
+    modified.
+    """
     def fail(message, upload=None):
         if upload is None:
             # If `upload` is None, that means we're using one of @washort's old
@@ -420,14 +655,28 @@ def _fetch_manifest(url, upload=None):
             raise Exception(message)
         upload.update(validation=failed_validation(message, upload=upload))
 
+    headers = {}
+    if validators and validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators and validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+
     try:
-        response = _fetch_content(url)
+        response = _fetch_content(url, headers=headers)
     except Exception, e:
         log.error('Failed to fetch manifest from %r: %s' % (url, e))
         fail(_('No manifest was found at that URL. Check the address and try '
                'again.'), upload=upload)
         return
 
+    if validators is not None:
+        for key, header in (('etag', 'etag'),
+                            ('last_modified', 'last-modified')):
+            if response.headers.get(header):
+                validators[key] = response.headers[header]
+        if response.status_code == 304:
+            return
+
     ct = response.headers.get('content-type', '')
     if not ct.startswith('application/x-web-app-manifest+json'):
         fail(_('Manifests must be served with the HTTP header '
@@ -586,8 +835,10 @@ def refresh_iarc_ratings(ids, **kw):
     """
     Refresh old or corrupt IARC ratings by re-fetching the certificate.
     """
+    # Share the client, and its parsed WSDL and connection, for all the apps.
+    client = get_iarc_client('services')
     for app in Webapp.objects.filter(id__in=ids):
-        data = iarc_get_app_info(app)
+        data = iarc_get_app_info(app, client=client)
 
         if data.get('rows'):
             row = data['rows'][0]
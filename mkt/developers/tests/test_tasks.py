@@ -24,7 +24,7 @@ import mkt
 from mkt.users.models import UserProfile
 from amo.utils import ImageCheck
 from mkt.developers import tasks
-from mkt.files.models import FileUpload
+from mkt.files.models import CachedValidation, FileUpload
 from mkt.site.fixtures import fixture
 from mkt.site.tests.test_utils_ import get_image_path
 from mkt.submit.tests.test_views import BaseWebAppTest
@@ -149,6 +149,126 @@ class TestPngcrushImage(amo.tests.TestCase):
         ok_('modified' in update_mock.call_args_list[0][1])
 
 
+class TestPngcrushImages(amo.tests.TestCase):
+
+    def setUp(self):
+        img = get_image_path('mozilla.png')
+        self.srcs = []
+        for x in range(3):
+            src = tempfile.NamedTemporaryFile(mode='r+w+b', suffix='.png',
+                                              delete=False)
+            shutil.copyfile(img, src.name)
+            self.srcs.append(src.name)
+        self.orig_size = os.path.getsize(img)
+        shutil.rmtree(settings.IMAGE_CACHE_PATH, ignore_errors=True)
+
+    def tearDown(self):
+        for src in self.srcs:
+            os.remove(src)
+
+    def test_pngcrush_images(self):
+        ok_(tasks.pngcrush_images(self.srcs))
+        for src in self.srcs:
+            assert os.path.getsize(src) < self.orig_size
+
+    @mock.patch('mkt.developers.tasks.pngcrush_images.retry')
+    @mock.patch('mkt.developers.tasks._pngcrush')
+    def test_retry_failed(self, _pngcrush, retry):
+        _pngcrush.side_effect = lambda src: (
+            'Error' if src == self.srcs[1] else None)
+        eq_(tasks.pngcrush_images(self.srcs), False)
+        eq_(retry.call_args[1]['args'], [[self.srcs[1]]])
+
+    @mock.patch('mkt.developers.tasks.pngcrush_images.delay')
+    @mock.patch('mkt.developers.tasks.pngcrush_image.delay')
+    def test_resize_icon_crushes_once(self, pngcrush_image, pngcrush_images):
+        src = tempfile.NamedTemporaryFile(mode='r+w+b', suffix='.png',
+                                          delete=False)
+        shutil.copyfile(self.srcs[0], src.name)
+        dest_name = os.path.join(settings.ADDON_ICONS_PATH, '1234')
+        tasks.resize_icon(src.name, dest_name, [32, 64], locally=True)
+
+        assert not pngcrush_image.called
+        eq_(pngcrush_images.call_count, 1)
+        eq_(pngcrush_images.call_args[0][0],
+            ['%s-32.png' % dest_name, '%s-64.png' % dest_name])
+
+
+@mock.patch('mkt.developers.tasks._pngcrush', lambda src: None)
+class TestImageCache(amo.tests.TestCase):
+
+    def setUp(self):
+        shutil.rmtree(settings.IMAGE_CACHE_PATH, ignore_errors=True)
+        self.dest_name = os.path.join(settings.ADDON_ICONS_PATH, '1234')
+
+    def tearDown(self):
+        for size in (32, 64):
+            if os.path.exists('%s-%s.png' % (self.dest_name, size)):
+                os.remove('%s-%s.png' % (self.dest_name, size))
+
+    def resize_icon(self, sizes):
+        src = tempfile.NamedTemporaryFile(mode='r+w+b', suffix='.png',
+                                          delete=False)
+        shutil.copyfile(get_image_path('mozilla.png'), src.name)
+        return tasks.resize_icon(src.name, self.dest_name, sizes,
+                                 locally=True)
+
+    @mock.patch('mkt.developers.tasks.resize_images',
+                wraps=tasks.resize_images)
+    @mock.patch('mkt.developers.tasks.pngcrush_images.delay',
+                wraps=tasks.pngcrush_images.delay)
+    def test_resize_icon(self, pngcrush_images, resize_images):
+        eq_(self.resize_icon([32]), {'icon_hash': 'bb362450'})
+        eq_(resize_images.call_count, 1)
+        eq_(pngcrush_images.call_count, 1)
+        os.remove('%s-32.png' % self.dest_name)
+
+        # Only the size that isn't cached yet is processed.
+        eq_(self.resize_icon([32, 64]), {'icon_hash': 'bb362450'})
+        eq_(resize_images.call_count, 2)
+        eq_(resize_images.call_args[0][1],
+            [('%s-64.png' % self.dest_name, (64, 64))])
+        eq_(pngcrush_images.call_count, 2)
+        eq_(pngcrush_images.call_args[0][0], ['%s-64.png' % self.dest_name])
+
+        # Everything comes from the cache now.
+        eq_(self.resize_icon([32, 64]), {'icon_hash': 'bb362450'})
+        eq_(resize_images.call_count, 2)
+        eq_(pngcrush_images.call_count, 2)
+        eq_(Image.open('%s-32.png' % self.dest_name).size, (32, 12))
+        eq_(Image.open('%s-64.png' % self.dest_name).size, (64, 24))
+
+    def test_pngcrush_images_stores(self):
+        src = '%s-32.png' % self.dest_name
+        shutil.copyfile(get_image_path('mozilla.png'), src)
+        ok_(tasks.pngcrush_images([src], image_cache=[('abc', (32, 32))]))
+        cached = tasks._image_cache_path('abc', (32, 32))
+        with open(cached) as fd1:
+            with open(src) as fd2:
+                eq_(fd1.read(), fd2.read())
+
+    @mock.patch('mkt.developers.tasks.pngcrush_images.retry')
+    @mock.patch('mkt.developers.tasks._pngcrush')
+    def test_pngcrush_images_failed(self, _pngcrush, retry):
+        _pngcrush.return_value = 'Error'
+        src = '%s-32.png' % self.dest_name
+        shutil.copyfile(get_image_path('mozilla.png'), src)
+        eq_(tasks.pngcrush_images([src], image_cache=[('abc', (32, 32))]),
+            False)
+        assert not os.path.exists(tasks._image_cache_path('abc', (32, 32)))
+        eq_(retry.call_args[1]['kwargs'], {'image_cache': [('abc', (32, 32))]})
+
+    def test_cache_path(self):
+        path = tasks._image_cache_path('abc', (32, 32))
+        eq_(path, tasks._image_cache_path('abc', [32, 32]))
+        assert path != tasks._image_cache_path('abd', (32, 32))
+        assert path != tasks._image_cache_path('abc', (64, 64))
+        assert path != tasks._image_cache_path('abc', (32, 32),
+                                               crushed=False)
+        with mock.patch('mkt.developers.tasks.PNGCRUSH_ARGS', ['-q']):
+            assert path != tasks._image_cache_path('abc', (32, 32))
+
+
 class TestValidator(amo.tests.TestCase):
 
     def setUp(self):
@@ -196,6 +316,111 @@ class TestValidator(amo.tests.TestCase):
         assert _mock.called
 
 
+class TestRunValidator(amo.tests.TestCase):
+
+    def setUp(self):
+        self.manifest = tempfile.NamedTemporaryFile(suffix='.webapp',
+                                                    delete=False)
+        self.manifest.write('{"name": "Test App"}')
+        self.manifest.close()
+        self.packaged = os.path.join(settings.ROOT, 'mkt', 'submit', 'tests',
+                                     'packaged', 'mozball.zip')
+
+    def tearDown(self):
+        os.remove(self.manifest.name)
+
+    @mock.patch('mkt.developers.tasks.validate_app')
+    def test_cached(self, validate_app):
+        validate_app.return_value = '{"errors": 0}'
+        eq_(tasks.run_validator(self.manifest.name, url='http://a.com'),
+            '{"errors": 0}')
+        eq_(tasks.run_validator(self.manifest.name, url='http://a.com'),
+            '{"errors": 0}')
+        eq_(validate_app.call_count, 1)
+        eq_(CachedValidation.objects.count(), 1)
+
+    @mock.patch('mkt.developers.tasks.validate_app')
+    def test_different_content(self, validate_app):
+        validate_app.return_value = '{"errors": 0}'
+        tasks.run_validator(self.manifest.name)
+        with open(self.manifest.name, 'w') as fd:
+            fd.write('{"name": "Other App"}')
+        tasks.run_validator(self.manifest.name)
+        eq_(validate_app.call_count, 2)
+
+    @mock.patch('mkt.developers.tasks.validate_app')
+    def test_different_url(self, validate_app):
+        validate_app.return_value = '{"errors": 0}'
+        tasks.run_validator(self.manifest.name, url='http://a.com')
+        tasks.run_validator(self.manifest.name, url='http://b.com')
+        eq_(validate_app.call_count, 2)
+
+    @mock.patch('mkt.developers.tasks.validate_app')
+    def test_different_settings(self, validate_app):
+        validate_app.return_value = '{"errors": 0}'
+        tasks.run_validator(self.manifest.name)
+        with self.settings(VALIDATOR_IAF_URLS=['https://m.com']):
+            tasks.run_validator(self.manifest.name)
+        with self.settings(VALIDATION_CACHE_VERSION=2):
+            tasks.run_validator(self.manifest.name)
+        eq_(validate_app.call_count, 3)
+
+    @mock.patch('mkt.developers.tasks._validator_version')
+    @mock.patch('mkt.developers.tasks.validate_app')
+    def test_different_validator_version(self, validate_app, version):
+        validate_app.return_value = '{"errors": 0}'
+        version.return_value = '1.0'
+        tasks.run_validator(self.manifest.name)
+        version.return_value = '1.1'
+        tasks.run_validator(self.manifest.name)
+        eq_(validate_app.call_count, 2)
+
+    @mock.patch('mkt.developers.tasks.validate_packaged_app')
+    def test_system_error_not_cached(self, validate_packaged_app):
+        validate_packaged_app.return_value = json.dumps({
+            'errors': 1,
+            'messages': [{'id': ['validator', 'unexpected_exception'],
+                          'type': 'error',
+                          'message': 'Validation timed out'}]})
+        tasks.run_validator(self.packaged)
+        tasks.run_validator(self.packaged)
+        eq_(validate_packaged_app.call_count, 2)
+        eq_(CachedValidation.objects.count(), 0)
+
+    @mock.patch('mkt.developers.tasks.validate_packaged_app')
+    def test_packaged(self, validate_packaged_app):
+        validate_packaged_app.return_value = '{"errors": 0}'
+        tasks.run_validator(self.packaged)
+        tasks.run_validator(self.packaged)
+        eq_(validate_packaged_app.call_count, 1)
+
+    @mock.patch('mkt.developers.tasks.validate_app')
+    def test_upload_validated_again(self, validate_app):
+        validate_app.return_value = '{"errors": 0}'
+        upload = FileUpload.objects.create(path=self.manifest.name)
+        tasks.validator(upload.pk)
+        eq_(FileUpload.objects.get(pk=upload.pk).validation, '{"errors": 0}')
+        tasks.validator(upload.pk)
+        eq_(validate_app.call_count, 1)
+
+
+class TestValidatorVersion(amo.tests.TestCase):
+
+    def setUp(self):
+        tasks._validator_version_cache.clear()
+
+    def tearDown(self):
+        tasks._validator_version_cache.clear()
+
+    @mock.patch('mkt.developers.tasks.pkg_resources.get_distribution')
+    def test_version(self, get_distribution):
+        get_distribution.return_value.version = '1.2'
+        eq_(tasks._validator_version(), '1.2')
+        # Only looked up once.
+        tasks._validator_version()
+        eq_(get_distribution.call_count, 1)
+
+
 storage_open = storage.open
 
 
@@ -264,6 +489,23 @@ class TestResizePreview(amo.tests.TestCase):
             im = Image.open(fp)
             eq_(list(im.size), [533, 400])
 
+    def test_preview_cached(self):
+        shutil.rmtree(settings.IMAGE_CACHE_PATH, ignore_errors=True)
+        addon = Webapp.objects.get(pk=337141)
+        tasks.resize_preview(self.get_image('preview.jpg'),
+                             Preview.objects.create(addon=addon))
+
+        preview = Preview.objects.create(addon=addon)
+        with mock.patch('mkt.developers.tasks.resize_images') as resize:
+            tasks.resize_preview(self.get_image('preview.jpg'), preview)
+            assert not resize.called
+        preview = preview.reload()
+        eq_(preview.image_size, [400, 533])
+        eq_(preview.thumbnail_size, [100, 133])
+        with storage.open(preview.thumbnail_path) as fp:
+            im = Image.open(fp)
+            eq_(list(im.size), [100, 133])
+
     def test_preview_dont_generate_image(self):
         addon = Webapp.objects.get(pk=337141)
         preview = Preview.objects.create(addon=addon)
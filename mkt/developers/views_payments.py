@@ -473,8 +473,7 @@ def bango_portal_from_addon(request, addon_id, addon, webapp=True):
     else:
         account = bango.payment_account
 
-    if not ((addon.authors.filter(pk=request.user.pk,
-                addonuser__role=amo.AUTHOR_ROLE_OWNER).exists()) and
+    if not (addon.has_author(request.user, [amo.AUTHOR_ROLE_OWNER]) and
             (account.solitude_seller.user.id == request.user.id)):
         log.error(('User not allowed to reach the Bango portal; '
                    'pk=%s') % request.user.pk)
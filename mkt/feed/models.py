@@ -14,7 +14,7 @@ import os
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_delete
 from django.dispatch import receiver
 
@@ -22,6 +22,7 @@ import amo
 import mkt.carriers
 import mkt.regions
 from mkt.collections.fields import ColorField
+from mkt.collections.models import reorder_memberships
 from mkt.constants.categories import CATEGORY_CHOICES
 from mkt.feed import indexers
 from mkt.ratings.validators import validate_rating
@@ -138,13 +139,34 @@ class BaseFeedCollection(ModelBase):
 
     def set_apps(self, new_apps):
         """
-        Passed a list of app IDs, will remove all existing members on the
-        collection and create new ones for each of the passed apps, in order.
+        Passed a list of app IDs, will make them the members of the
+        collection, in order. Apps already in the collection are only moved,
+        the new ones are inserted at once, and the apps that were added,
+        removed or moved are reindexed by a single task.
         """
-        self.remove_apps()
-        for app_id in new_apps:
-            self.add_app(Webapp.objects.get(pk=app_id))
-        index_webapps.delay(new_apps)
+        qs = self.membership_class.objects.filter(obj=self)
+        with transaction.atomic():
+            existing = set(qs.no_cache().values_list('app_id', flat=True))
+            removed = existing - set(new_apps)
+            if removed:
+                qs.filter(app__in=removed).delete()
+            changed = reorder_memberships(qs, new_apps)
+            added = [(order, app_id) for order, app_id in enumerate(new_apps)
+                     if app_id not in existing]
+            if added:
+                ids = set(app_id for order, app_id in added)
+                if Webapp.objects.filter(pk__in=ids).count() != len(ids):
+                    raise Webapp.DoesNotExist(
+                        'Some of the apps %s do not exist.' % sorted(ids))
+                self.membership_class.objects.bulk_create(
+                    [self.membership_class(obj=self, app_id=app_id,
+                                           order=order)
+                     for order, app_id in added])
+                # Help django-cache-machine, as in add_app().
+                self.membership_class.objects.invalidate(*qs)
+        changed = list(removed) + [app_id for order, app_id in added] + changed
+        if changed:
+            index_webapps.delay(changed)
 
 
 class BaseFeedImage(models.Model):
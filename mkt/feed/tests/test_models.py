@@ -4,6 +4,8 @@ import string
 from itertools import cycle
 
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import mock
 from nose.tools import eq_, ok_
@@ -259,6 +261,48 @@ class TestFeedBrand(amo.tests.TestCase):
         with self.assertRaises(Webapp.DoesNotExist):
             self.brand.set_apps([99999])
 
+    @mock.patch('mkt.feed.models.index_webapps.delay')
+    def test_set_apps_moves_existing(self, index_webapps):
+        self.test_add_app_sort_order_respected()
+        memberships = dict(self.brand.membership_class.objects
+                           .values_list('app_id', 'pk'))
+        new_apps = [self.apps[0].pk, self.apps[1].pk]
+        self.brand.set_apps(new_apps)
+        eq_(new_apps, [app.pk for app in self.brand.apps().no_cache()])
+        # The memberships were updated rather than recreated.
+        eq_(dict(self.brand.membership_class.objects
+                 .values_list('app_id', 'pk')), memberships)
+        # Only the app that moved is reindexed.
+        index_webapps.assert_called_once_with([self.apps[0].pk])
+
+    @mock.patch('mkt.feed.models.index_webapps.delay')
+    def test_set_apps_removes_and_adds(self, index_webapps):
+        self.test_add_app_sort_order_respected()
+        new_apps = [self.apps[1].pk, self.apps[2].pk]
+        self.brand.set_apps(new_apps)
+        eq_(new_apps, [app.pk for app in self.brand.apps().no_cache()])
+        # The removed, added and moved apps are reindexed at once.
+        index_webapps.assert_called_once_with(
+            [self.apps[0].pk, self.apps[2].pk, self.apps[1].pk])
+
+    @mock.patch('mkt.feed.models.index_webapps.delay')
+    def test_set_apps_adds_at_once(self, index_webapps):
+        self.test_create()
+        new_apps = [app.pk for app in self.apps]
+        with CaptureQueriesContext(connection) as queries:
+            self.brand.set_apps(new_apps)
+        eq_(len([q for q in queries.captured_queries
+                 if q['sql'].startswith('INSERT')]), 1)
+        eq_(new_apps, [app.pk for app in self.brand.apps().no_cache()])
+        index_webapps.assert_called_once_with(new_apps)
+
+    def test_set_apps_nonexistant_rollback(self):
+        self.test_add_app_sort_order_respected()
+        with self.assertRaises(Webapp.DoesNotExist):
+            self.brand.set_apps([self.apps[0].pk, 99999])
+        eq_([self.apps[1].pk, self.apps[0].pk],
+            [app.pk for app in self.brand.apps().no_cache()])
+
 
 class TestESReceivers(FeedTestMixin, amo.tests.TestCase):
 
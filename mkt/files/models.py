@@ -327,6 +327,21 @@ class FileValidation(ModelBase):
         return new
 
 
+class CachedValidation(ModelBase):
+    """
+    Validation results of previously validated packages and manifests, so
+    that identical content isn't validated again. See `run_validator`.
+    """
+    key = models.CharField(max_length=64, unique=True)
+    validation = models.TextField()
+
+    # Validation results can be too large for memcached.
+    objects = UncachedManagerBase()
+
+    class Meta(ModelBase.Meta):
+        db_table = 'cached_validation'
+
+
 def nfd_str(u):
     """Uses NFD to normalize unicode strings."""
     if isinstance(u, unicode):
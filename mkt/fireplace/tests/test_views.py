@@ -2,10 +2,8 @@ import json
 from urlparse import urlparse
 
 from django.core.urlresolvers import reverse
-from django.db.models.query import QuerySet
 from django.test.client import RequestFactory
 
-from elasticsearch_dsl.search import Search
 from mock import patch
 from nose.tools import eq_, ok_
 
@@ -107,29 +105,29 @@ class TestCollectionViewSet(RestOAuth, ESTestCase):
         data = res.json['apps'][0]
         assert_fireplace_app(data)
 
-    @patch('mkt.collections.serializers.CollectionMembershipField.to_native')
-    def test_get_preview(self, mock_field_to_native):
-        mock_field_to_native.return_value = []
+    @patch('mkt.collections.serializers.CollectionAppResolver.fetch_es')
+    @patch('mkt.collections.serializers.CollectionAppResolver.fetch_db')
+    def test_get_preview(self, mock_fetch_db, mock_fetch_es):
+        mock_fetch_db.return_value = {}
         res = self.client.get(self.url, {'preview': 1})
         eq_(res.status_code, 200)
         eq_(res.json['name'], {u'en-US': u'Hi'})
         eq_(res.json['apps'], [])
 
-        eq_(mock_field_to_native.call_count, 1)
-        ok_(isinstance(mock_field_to_native.call_args[0][0], QuerySet))
-        eq_(mock_field_to_native.call_args[1].get('use_es', False), False)
+        eq_(mock_fetch_db.call_count, 1)
+        ok_(not mock_fetch_es.called)
 
-    @patch('mkt.collections.serializers.CollectionMembershipField.to_native')
-    def test_no_get_preview(self, mock_field_to_native):
-        mock_field_to_native.return_value = []
+    @patch('mkt.collections.serializers.CollectionAppResolver.fetch_es')
+    @patch('mkt.collections.serializers.CollectionAppResolver.fetch_db')
+    def test_no_get_preview(self, mock_fetch_db, mock_fetch_es):
+        mock_fetch_es.return_value = {}
         res = self.client.get(self.url)
         eq_(res.status_code, 200)
         eq_(res.json['name'], {u'en-US': u'Hi'})
         eq_(res.json['apps'], [])
 
-        eq_(mock_field_to_native.call_count, 1)
-        ok_(isinstance(mock_field_to_native.call_args[0][0], Search))
-        eq_(mock_field_to_native.call_args[1].get('use_es', False), True)
+        eq_(mock_fetch_es.call_count, 1)
+        ok_(not mock_fetch_db.called)
 
 
 class TestSearchView(RestOAuth, ESTestCase):
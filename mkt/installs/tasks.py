@@ -0,0 +1,24 @@
+import commonware.log
+
+import amo
+from lib.post_request_task.task import task as post_request_task
+from mkt.site.decorators import write
+from mkt.users.models import UserProfile
+from mkt.webapps.models import Webapp
+
+
+log = commonware.log.getLogger('z.task')
+
+
+@post_request_task
+@write
+def log_install(app_id, user_id, **kw):
+    """Writes the activity log of an install, once the request is over."""
+    try:
+        app = Webapp.objects.get(pk=app_id)
+        user = UserProfile.objects.get(pk=user_id)
+    except (Webapp.DoesNotExist, UserProfile.DoesNotExist):
+        log.info('Not logging install of app %s by user %s, not found'
+                 % (app_id, user_id))
+        return
+    amo.log(amo.LOG.INSTALL_ADDON, app, user=user)
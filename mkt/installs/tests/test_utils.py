@@ -0,0 +1,122 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from mock import patch
+from nose.tools import eq_, ok_
+
+import amo
+import amo.tests
+from lib.post_request_task.task import _discard_tasks, _send_tasks
+from mkt.constants.apps import INSTALL_TYPE_DEVELOPER, INSTALL_TYPE_USER
+from mkt.developers.models import AppLog
+from mkt.installs.tasks import log_install
+from mkt.installs.utils import add_installed, record
+from mkt.regions import RESTOFWORLD
+from mkt.site.fixtures import fixture
+from mkt.users.models import UserProfile
+from mkt.webapps.models import Installed, installed_key
+
+
+class TestAddInstalled(amo.tests.WebappTestCase):
+    fixtures = fixture('webapp_337141', 'user_999')
+
+    def setUp(self):
+        super(TestAddInstalled, self).setUp()
+        self.user = UserProfile.objects.get(pk=999)
+
+    def test_add(self):
+        ok_(add_installed(self.user, self.app, INSTALL_TYPE_USER))
+        installed = Installed.objects.get(addon=self.app, user=self.user)
+        eq_(installed.install_type, INSTALL_TYPE_USER)
+        eq_(installed.premium_type, self.app.premium_type)
+        ok_(installed.uuid)
+        # The cached installs are updated after the request.
+        _send_tasks()
+        ok_(self.app.has_installed(self.user))
+
+    def test_add_rolled_back(self):
+        ok_(add_installed(self.user, self.app, INSTALL_TYPE_USER))
+        # The request failed and its transaction was rolled back: the
+        # install isn't cached.
+        _discard_tasks()
+        eq_(cache.get(installed_key(self.user.pk)), set())
+
+    def test_single_write(self):
+        with CaptureQueriesContext(connection) as queries:
+            ok_(add_installed(self.user, self.app, INSTALL_TYPE_USER))
+        writes = [q['sql'] for q in queries
+                  if q['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+        eq_(len(writes), 1)
+
+    def test_known_install(self):
+        add_installed(self.user, self.app, INSTALL_TYPE_USER)
+        _send_tasks()
+        ok_(self.app.has_installed(self.user))
+        with self.assertNumQueries(0):
+            ok_(not add_installed(self.user, self.app, INSTALL_TYPE_USER))
+
+    def test_other_install_type(self):
+        add_installed(self.user, self.app, INSTALL_TYPE_USER)
+        ok_(add_installed(self.user, self.app, INSTALL_TYPE_DEVELOPER))
+        eq_(Installed.objects.filter(user=self.user).count(), 2)
+
+    def test_stale_cache(self):
+        Installed.objects.create(addon=self.app, user=self.user,
+                                 install_type=INSTALL_TYPE_USER)
+        cache.set(installed_key(self.user.pk), set())
+        ok_(not add_installed(self.user, self.app, INSTALL_TYPE_USER))
+        eq_(Installed.objects.filter(user=self.user).count(), 1)
+        # The stale set was dropped.
+        eq_(cache.get(installed_key(self.user.pk)), None)
+
+    def test_cache_updated_in_place(self):
+        add_installed(self.user, self.app, INSTALL_TYPE_USER)
+        app = amo.tests.app_factory()
+        _send_tasks()
+        with CaptureQueriesContext(connection) as queries:
+            ok_(add_installed(self.user, app, INSTALL_TYPE_USER))
+            _send_tasks()
+        # The installs of the user aren't reloaded.
+        ok_(not [q for q in queries if q['sql'].startswith('SELECT')])
+        eq_(cache.get(installed_key(self.user.pk)),
+            set([(self.app.pk, INSTALL_TYPE_USER),
+                 (app.pk, INSTALL_TYPE_USER)]))
+
+        Installed.objects.get(addon=app).delete()
+        eq_(cache.get(installed_key(self.user.pk)),
+            set([(self.app.pk, INSTALL_TYPE_USER)]))
+
+
+class TestRecord(amo.tests.WebappTestCase):
+    fixtures = fixture('webapp_337141', 'user_999')
+
+    def setUp(self):
+        super(TestRecord, self).setUp()
+        self.request = RequestFactory().post('/')
+        self.request.REGION = RESTOFWORLD
+        self.request.user = UserProfile.objects.get(pk=999)
+
+    @patch('mkt.installs.utils.record_action')
+    @patch('mkt.installs.tasks.log_install.delay')
+    def test_logged(self, log_install, record_action):
+        record(self.request, self.app)
+        log_install.assert_called_with(self.app.pk, self.request.user.pk)
+        eq_(record_action.call_args[0][0], 'install')
+
+    def test_log_install(self):
+        log_install(self.app.pk, self.request.user.pk)
+        logs = AppLog.objects.filter(addon=self.app)
+        eq_(logs.count(), 1)
+        eq_(logs[0].activity_log.action, amo.LOG.INSTALL_ADDON.id)
+        eq_(logs[0].activity_log.user, self.request.user)
+
+    @patch('mkt.installs.utils.record_action')
+    @patch('mkt.installs.tasks.log_install.delay')
+    def test_anonymous(self, log_install, record_action):
+        self.request.user = AnonymousUser()
+        record(self.request, self.app)
+        ok_(not log_install.called)
+        eq_(record_action.call_args[0][2]['anonymous'], True)
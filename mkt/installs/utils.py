@@ -1,7 +1,13 @@
-import amo
+import uuid
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+
 from lib.metrics import record_action
 from mkt.access.acl import check_ownership
 from mkt.constants.apps import INSTALL_TYPE_DEVELOPER, INSTALL_TYPE_USER
+from mkt.installs import tasks
+from mkt.webapps.models import get_installed, Installed, installed_key
 
 
 def install_type(request, app):
@@ -11,8 +17,40 @@ def install_type(request, app):
     return INSTALL_TYPE_USER
 
 
+def add_installed(user, app, install_type):
+    """
+    Adds the Installed row of `user` for `app`, returns True if it didn't
+    exist yet.
+
+    Installs already in the cached set of the user don't touch the database,
+    the others are inserted right away and the unique key takes care of
+    concurrent installs.
+
+    If the unique key shows that the cached set is stale, it is dropped to
+    be rebuilt.
+    """
+    if (app.pk, install_type) in get_installed(user):
+        return False
+    try:
+        with transaction.atomic():
+            # Set what the post_save signal would add, to only write once.
+            Installed.objects.create(addon=app, user=user,
+                                     install_type=install_type,
+                                     uuid=str(uuid.uuid4()),
+                                     premium_type=app.premium_type)
+    except IntegrityError:
+        cache.delete(installed_key(user.pk))
+        return False
+    return True
+
+
 def record(request, app):
-    amo.log(amo.LOG.INSTALL_ADDON, app)
+    """
+    Records the install of `app`. The activity log is written by a task
+    after the request, and the metrics are buffered, see `record_stat`.
+    """
+    if request.user.is_authenticated():
+        tasks.log_install.delay(app.pk, request.user.pk)
     domain = app.domain_from_url(app.origin, allow_none=True)
     record_action('install', request, {
         'app-domain': domain,
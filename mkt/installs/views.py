@@ -12,8 +12,7 @@ from mkt.api.authentication import (RestOAuthAuthentication,
 from mkt.api.base import cors_api_view
 from mkt.constants.apps import INSTALL_TYPE_USER
 from mkt.installs.forms import InstallForm
-from mkt.installs.utils import install_type, record
-from mkt.webapps.models import Installed
+from mkt.installs.utils import add_installed, install_type, record
 
 log = commonware.log.getLogger('z.api')
 
@@ -35,15 +34,11 @@ def install(request):
             log.info('App not public: {0}'.format(app.pk))
             raise PermissionDenied
 
-        if not request.user.is_authenticated():
-            record(request, app)
-        else:
-            installed, created = Installed.objects.get_or_create(
-                addon=app, user=request.user, install_type=type_)
-            record(request, app)
-            if not created:
-                return Response(status=202)
+        created = True
+        if request.user.is_authenticated():
+            created = add_installed(request.user, app, type_)
+        record(request, app)
 
-        return Response(status=201)
+        return Response(status=201 if created else 202)
 
     return Response(status=400)
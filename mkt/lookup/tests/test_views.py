@@ -29,7 +29,7 @@ from mkt.developers.tests.test_views_payments import (setup_payment_account,
 from mkt.lookup.views import (_transaction_summary, app_summary,
                               transaction_refund, user_delete, user_summary)
 from mkt.prices.models import AddonPaymentData, Refund
-from mkt.purchase.models import Contribution
+from mkt.purchase.models import Contribution, Fulfillment
 from mkt.reviewers.models import QUEUE_TARAKO
 from mkt.site.fixtures import fixture
 from mkt.tags.models import Tag
@@ -304,7 +304,7 @@ class SearchTestMixin(object):
         self.assertLoginRedirects(res, self.url)
 
 
-class TestAcctSearch(TestCase, SearchTestMixin):
+class TestAcctSearch(ESTestCase, SearchTestMixin):
     fixtures = fixture('user_10482', 'user_support_staff', 'user_operator')
 
     def setUp(self):
@@ -312,6 +312,7 @@ class TestAcctSearch(TestCase, SearchTestMixin):
         self.url = reverse('lookup.user_search')
         self.user = UserProfile.objects.get(username='clouserw')
         self.login(UserProfile.objects.get(username='support_staff'))
+        self.reindex(UserProfile, 'users')
 
     def verify_result(self, data):
         eq_(data['results'][0]['name'], self.user.username)
@@ -323,25 +324,35 @@ class TestAcctSearch(TestCase, SearchTestMixin):
 
     def test_by_username(self):
         self.user.update(username='newusername')
+        self.refresh('users')
         data = self.search(q='newus')
         self.verify_result(data)
 
     def test_by_username_with_dashes(self):
         self.user.update(username='kr-raj')
+        self.refresh('users')
         data = self.search(q='kr-raj')
         self.verify_result(data)
 
     def test_by_display_name(self):
         self.user.update(display_name='Kumar McMillan')
+        self.refresh('users')
         data = self.search(q='mcmill')
         self.verify_result(data)
 
+    def test_by_display_name_full(self):
+        self.user.update(display_name='Kumar McMillan')
+        self.refresh('users')
+        data = self.search(q='kumar mcmillan')
+        self.verify_result(data)
+
     def test_by_id(self):
         data = self.search(q=self.user.pk)
         self.verify_result(data)
 
     def test_by_email(self):
         self.user.update(email='fonzi@happydays.com')
+        self.refresh('users')
         data = self.search(q='fonzi')
         self.verify_result(data)
 
@@ -352,6 +363,7 @@ class TestAcctSearch(TestCase, SearchTestMixin):
             name = 'chr' + str(x)
             UserProfile.objects.create(username=name, name=name,
                                        email=name + '@gmail.com')
+        self.refresh('users')
 
         # Test not at search limit.
         data = self.search(q='clouserw')
@@ -423,6 +435,20 @@ class TestTransactionSummary(TestCase):
 
         eq_(data['is_refundable'], False)
         eq_(data['contrib'].pk, self.contrib.pk)
+        eq_(data['fulfillment'], None)
+
+    def test_fulfillment(self):
+        Fulfillment.objects.create(
+            contribution=self.contrib, transaction_id=self.transaction_id,
+            currency='USD', status=amo.FULFILLMENT_FAILED, attempts=6,
+            error='Unable to look up buyer')
+        data = _transaction_summary(self.uuid)
+        eq_(data['fulfillment'].attempts, 6)
+        eq_(data['fulfillment_status'],
+            amo.FULFILLMENT_STATUSES[amo.FULFILLMENT_FAILED])
+
+        res = self.client.get(self.url)
+        ok_('Unable to look up buyer' in res.content)
 
     @mock.patch('mkt.lookup.views.client')
     def test_refund_status(self, solitude):
@@ -34,9 +34,10 @@ from mkt.developers.views_payments import _redirect_to_bango_portal
 from mkt.lookup.forms import (APIFileStatusForm, APIStatusForm, DeleteUserForm,
                               TransactionRefundForm, TransactionSearchForm)
 from mkt.prices.models import AddonPaymentData, Refund
-from mkt.purchase.models import Contribution
+from mkt.purchase.models import Contribution, Fulfillment
 from mkt.reviewers.models import QUEUE_TARAKO
 from mkt.site.decorators import json_view, login_required, permission_required
+from mkt.users.indexers import UserProfileIndexer
 from mkt.users.models import UserProfile
 from mkt.webapps.indexers import WebappIndexer
 from mkt.webapps.models import Webapp
@@ -139,6 +140,9 @@ def _transaction_summary(tx_uuid):
         except HttpServerError:
             refund_status = _('Currently unable to retrieve refund status.')
 
+    # Purchases are fulfilled asynchronously after the webpay postback.
+    fulfillment = Fulfillment.objects.filter(contribution=contrib).first()
+
     return {
         # Solitude data.
         'refund_status': refund_status,
@@ -146,6 +150,10 @@ def _transaction_summary(tx_uuid):
         # Zamboni data.
         'app': contrib.addon,
         'contrib': contrib,
+        'fulfillment': fulfillment,
+        'fulfillment_status': (
+            amo.FULFILLMENT_STATUSES.get(fulfillment.status)
+            if fulfillment else None),
         'related': contrib.related,
         'type': amo.CONTRIB_TYPES.get(contrib.type, _('Incomplete')),
         # Whitelist what is refundable.
@@ -360,6 +368,15 @@ def _expand_query(q, fields):
     return query.Bool(should=should)
 
 
+def _expand_user_query(q, fields):
+    should = []
+    for field in fields:
+        should.append(ES_Q('term', **{field: {'value': q, 'boost': 10}}))
+        should.append(ES_Q('match', **{'%s.ngram' % field: {
+            'query': q, 'boost': 3, 'operator': 'and'}}))
+    return query.Bool(should=should)
+
+
 @login_required
 @permission_required([('AccountLookup', 'View')])
 @json_view
@@ -373,14 +390,14 @@ def user_search(request):
         # id is added implictly by the ES filter. Add it explicitly:
         qs = UserProfile.objects.filter(pk=q).values(*fields)
     else:
-        qs = UserProfile.objects.all()
-        filters = Q()
-        for field in search_fields:
-            filters = filters | Q(**{'%s__icontains' % field: q})
-        qs = qs.filter(filters)
-        qs = qs.values(*fields)
-        qs = _slice_results(request, qs)
+        qs = (UserProfileIndexer.search()
+              .query(_expand_user_query(q, search_fields)))
+        qs = _slice_results(request, qs).execute()
     for user in qs:
+        if not isinstance(user, dict):
+            # This is a result from elasticsearch which returns `Result`
+            # objects.
+            user = dict((field, user.get(field)) for field in fields)
         user['url'] = reverse('lookup.user_summary', args=[user['id']])
         user['name'] = user['username']
         results.append(user)
@@ -1,9 +1,20 @@
+import atexit
 import datetime
 import hashlib
 import json
+import threading
+import time
 
+from django.conf import settings
 from django.db import models
 
+import commonware.log
+from celery.signals import worker_shutdown
+from django_statsd.clients import statsd
+
+
+log = commonware.log.getLogger('z.monolith')
+
 
 class MonolithRecord(models.Model):
     """Data stored temporarily for monolith.
@@ -21,6 +32,81 @@ class MonolithRecord(models.Model):
         db_table = 'monolith_record'
 
 
+class RecordBuffer(object):
+    """
+    Buffers the MonolithRecords of a process, to save them in batches.
+
+    The records are saved by a task once there are
+    `settings.MONOLITH_BUFFER_SIZE` of them, or once the oldest one has been
+    waiting for `settings.MONOLITH_BUFFER_TIMEOUT` seconds, even if no other
+    record comes in. What remains is saved when the process exits.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = []
+        self.started = None
+        self.timer = None
+
+    def add(self, record):
+        with self.lock:
+            if not self.records:
+                self.started = time.time()
+            self.records.append(record)
+            full = (len(self.records) >= settings.MONOLITH_BUFFER_SIZE or
+                    time.time() - self.started >=
+                    settings.MONOLITH_BUFFER_TIMEOUT)
+            if not full and self.timer is None:
+                self.timer = threading.Timer(
+                    settings.MONOLITH_BUFFER_TIMEOUT, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if full:
+            self.flush()
+
+    def pop(self):
+        with self.lock:
+            records, self.records = self.records, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return records
+
+    def flush(self):
+        """
+        Saves the buffered records with a task. It is not a post-request
+        task: the records come from other requests than the current one, and
+        must not be discarded if it fails.
+        """
+        from mkt.monolith.tasks import save_records
+
+        records = self.pop()
+        if records:
+            save_records.delay([{'key': r.key, 'recorded': r.recorded,
+                                 'user_hash': r.user_hash, 'value': r.value}
+                                for r in records])
+
+    def save(self, **kw):
+        """Saves the buffered records right away."""
+        records = self.pop()
+        if not records:
+            return
+        try:
+            MonolithRecord.objects.bulk_create(records)
+            statsd.incr('monolith.records.saved', len(records))
+        except Exception:
+            log.exception('Dropped %s monolith records' % len(records))
+            statsd.incr('monolith.records.dropped', len(records))
+
+
+record_buffer = RecordBuffer()
+
+# Don't lose the buffered records when a web process or a worker stops.
+atexit.register(record_buffer.save)
+worker_shutdown.connect(record_buffer.save,
+                        dispatch_uid='monolith_record_buffer')
+
+
 def get_user_hash(request):
     """Get a hash identifying an user.
 
@@ -36,6 +122,8 @@ def get_user_hash(request):
 def record_stat(key, request, **data):
     """Create a new record in the database with the given values.
 
+    Records are buffered and saved in batches, see `RecordBuffer`.
+
     :param key:
         The type of stats you're sending, e.g. "app.install".
 
@@ -57,5 +145,8 @@ def record_stat(key, request, **data):
 
     record = MonolithRecord(key=key, user_hash=get_user_hash(request),
                             recorded=recorded, value=json.dumps(data))
-    record.save()
+    if settings.MONOLITH_BUFFER_SIZE:
+        record_buffer.add(record)
+    else:
+        record.save()
     return record
@@ -0,0 +1,29 @@
+import commonware.log
+from celeryutils import task
+from django_statsd.clients import statsd
+
+from mkt.monolith.models import MonolithRecord
+from mkt.site.decorators import write
+
+
+log = commonware.log.getLogger('z.monolith')
+
+
+@task
+@write
+def save_records(records, **kw):
+    """Saves a batch of buffered MonolithRecords, see `RecordBuffer`."""
+    try:
+        MonolithRecord.objects.bulk_create(
+            [MonolithRecord(**record) for record in records])
+    except Exception, e:
+        statsd.incr('monolith.records.failed')
+        if save_records.request.retries >= 3:
+            log.exception('Dropped %s monolith records' % len(records))
+            statsd.incr('monolith.records.dropped', len(records))
+            return
+        log.error('Failed to save %s monolith records: %s'
+                  % (len(records), e))
+        save_records.retry(args=[records], kwargs=kw, exc=e)
+    else:
+        statsd.incr('monolith.records.saved', len(records))
@@ -13,7 +13,7 @@ from amo.tests import TestCase
 from mkt.api.tests.test_oauth import RestOAuth
 from mkt.site.fixtures import fixture
 
-from .models import MonolithRecord, record_stat
+from .models import MonolithRecord, record_buffer, record_stat
 from .views import daterange
 
 
@@ -66,6 +66,70 @@ class TestModels(TestCase):
             record_stat('app.install', self.request)
 
 
+class TestRecordBuffer(TestCase):
+
+    def setUp(self):
+        super(TestRecordBuffer, self).setUp()
+        self.request = RequestFactory()
+        record_buffer.pop()
+
+    def tearDown(self):
+        record_buffer.pop()
+        super(TestRecordBuffer, self).tearDown()
+
+    def test_buffered(self):
+        with self.settings(MONOLITH_BUFFER_SIZE=2,
+                           MONOLITH_BUFFER_TIMEOUT=60):
+            record_stat('app.install', self.request, value=1)
+            eq_(MonolithRecord.objects.count(), 0)
+
+            record_stat('app.install', self.request, value=2)
+        eq_(sorted(r.value for r in MonolithRecord.objects.all()),
+            [json.dumps({'value': 1}), json.dumps({'value': 2})])
+
+    def test_timeout(self):
+        with self.settings(MONOLITH_BUFFER_SIZE=10,
+                           MONOLITH_BUFFER_TIMEOUT=0):
+            record_stat('app.install', self.request, value=1)
+        eq_(MonolithRecord.objects.count(), 1)
+
+    @mock.patch('mkt.monolith.models.threading.Timer')
+    def test_timer(self, Timer):
+        with self.settings(MONOLITH_BUFFER_SIZE=10,
+                           MONOLITH_BUFFER_TIMEOUT=60):
+            record_stat('app.install', self.request, value=1)
+            record_stat('app.install', self.request, value=2)
+        # A single timer flushes the buffer after the timeout.
+        Timer.assert_called_once_with(60, record_buffer.flush)
+        ok_(Timer.return_value.start.called)
+        eq_(MonolithRecord.objects.count(), 0)
+
+        record_buffer.flush()
+        eq_(MonolithRecord.objects.count(), 2)
+        ok_(Timer.return_value.cancel.called)
+        eq_(record_buffer.timer, None)
+
+    def test_save(self):
+        with self.settings(MONOLITH_BUFFER_SIZE=10,
+                           MONOLITH_BUFFER_TIMEOUT=60):
+            record_stat('app.install', self.request, value=1)
+        eq_(MonolithRecord.objects.count(), 0)
+        record_buffer.save()
+        eq_(MonolithRecord.objects.count(), 1)
+        eq_(record_buffer.records, [])
+
+    @mock.patch('mkt.monolith.models.statsd')
+    @mock.patch.object(MonolithRecord.objects, 'bulk_create')
+    def test_save_failure(self, bulk_create, statsd):
+        bulk_create.side_effect = Exception
+        with self.settings(MONOLITH_BUFFER_SIZE=10,
+                           MONOLITH_BUFFER_TIMEOUT=60):
+            record_stat('app.install', self.request, value=1)
+        record_buffer.save()
+        statsd.incr.assert_called_with('monolith.records.dropped', 1)
+        eq_(record_buffer.records, [])
+
+
 class TestMonolithResource(RestOAuth):
     fixtures = fixture('user_2519')
 
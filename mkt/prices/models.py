@@ -1,3 +1,4 @@
+import threading
 import uuid
 
 from django.conf import settings
@@ -15,6 +16,7 @@ from tower import ugettext_lazy as _
 
 import amo
 from lib.constants import ALL_CURRENCIES
+from lib.post_request_task.task import call_after_request
 from mkt.constants import apps
 from mkt.constants.payments import (CARRIER_CHOICES, PAYMENT_METHOD_ALL,
                                 PAYMENT_METHOD_CHOICES, PROVIDER_BANGO,
@@ -61,10 +63,6 @@ def price_key(data):
 
 class PriceManager(ManagerBase):
 
-    def get_query_set(self):
-        qs = super(PriceManager, self).get_query_set()
-        return qs.transform(Price.transformer)
-
     def active(self):
         return self.filter(active=True).order_by('price')
 
@@ -94,15 +92,6 @@ class Price(ModelBase):
         # Display the price in unamiguous USD, eg: 0.99 USD
         return '{0} USD'.format(self.price)
 
-    @staticmethod
-    def transformer(prices):
-        # There are a constrained number of price currencies, let's just
-        # get them all.
-        Price._currencies = dict(
-            (price_key(model_to_dict(p)), p)
-            for p in PriceCurrency.objects.filter(tier__active=True)
-        )
-
     def get_price_currency(self, carrier=None, region=None, provider=None):
         """
         Returns the PriceCurrency object or none.
@@ -118,20 +107,9 @@ class Price(ModelBase):
         # however we might need to think about this for the long term.
         provider = (provider or
                     ALL_PROVIDERS[settings.DEFAULT_PAYMENT_PROVIDER].provider)
-        if not hasattr(self, '_currencies'):
-            Price.transformer([])
-
-        lookup = price_key({
-            'tier': self.id, 'carrier': carrier,
-            'provider': provider, 'region': region
-        })
-
-        try:
-            price_currency = Price._currencies[lookup]
-        except KeyError:
-            return None
-
-        return price_currency
+        return price_matrix.get_price_currency(self.id, carrier=carrier,
+                                               region=region,
+                                               provider=provider)
 
     def get_price_data(self, carrier=None, region=None, provider=None):
         """
@@ -168,8 +146,7 @@ class Price(ModelBase):
             If not provided it will use settings.PAYMENT_PROVIDERS,
         """
         providers = [provider] if provider else default_providers()
-        return [model_to_dict(o) for o in
-                self.pricecurrency_set.filter(provider__in=providers)]
+        return price_matrix.get_prices(self.id, providers)
 
     def regions_by_name(self, provider=None):
         """A list of price regions sorted by name.
@@ -265,6 +242,101 @@ class PriceCurrency(ModelBase):
         return u'%s, %s: %s' % (self.tier, self.currency, self.price)
 
 
+# How long the version of the price matrix is kept in the cache. When it
+# expires, every process reloads its matrix.
+PRICE_MATRIX_VERSION_TIMEOUT = 60 * 60 * 24
+
+
+class PriceMatrix(object):
+    """
+    A process-local copy of all the price currencies, by tier.
+
+    Price tiers are few and rarely change, so instead of querying the
+    currencies of a tier every time an app price or price regions are needed,
+    each process loads them all at once. Saving or deleting a Price or a
+    PriceCurrency changes a version shared through the cache, which tells
+    every process to reload.
+    """
+    version_key = 'prices:matrix:version'
+
+    def __init__(self):
+        # A (version, prices by tier, price currencies by price_key) tuple.
+        self.data = None
+        self.lock = threading.Lock()
+
+    def shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version,
+                             PRICE_MATRIX_VERSION_TIMEOUT):
+                version = cache.get(self.version_key) or version
+        return version
+
+    def invalidate(self):
+        cache.set(self.version_key, uuid.uuid4().hex,
+                  PRICE_MATRIX_VERSION_TIMEOUT)
+
+    def load(self, version):
+        active = set(Price.objects.no_cache().filter(active=True)
+                                  .values_list('id', flat=True))
+        prices = {}
+        currencies = {}
+        for price_currency in PriceCurrency.objects.no_cache().order_by('pk'):
+            data = model_to_dict(price_currency)
+            prices.setdefault(price_currency.tier_id, []).append(data)
+            # Only active tiers can be bought.
+            if price_currency.tier_id in active:
+                currencies[price_key(data)] = price_currency
+        log.info('Loaded price matrix version {0}'.format(version))
+        return version, prices, currencies
+
+    def get(self):
+        version = self.shared_version()
+        data = self.data
+        if data is None or data[0] != version:
+            with self.lock:
+                data = self.data
+                if data is None or data[0] != version:
+                    data = self.data = self.load(version)
+        return data
+
+    def get_price_currency(self, tier_id, carrier=None, region=None,
+                           provider=None):
+        """Returns the PriceCurrency object or None."""
+        lookup = price_key({
+            'tier': tier_id, 'carrier': carrier,
+            'provider': provider, 'region': region
+        })
+        return self.get()[2].get(lookup)
+
+    def get_prices(self, tier_id, providers):
+        """
+        A list of dicts of the currencies and prices of a tier, for the given
+        providers.
+        """
+        return [dict(data) for data in self.get()[1].get(tier_id, [])
+                if data['provider'] in providers]
+
+
+price_matrix = PriceMatrix()
+
+
+@receiver(models.signals.post_save, sender=Price,
+          dispatch_uid='save_price_matrix')
+@receiver(models.signals.post_delete, sender=Price,
+          dispatch_uid='delete_price_matrix')
+@receiver(models.signals.post_save, sender=PriceCurrency,
+          dispatch_uid='save_price_currency_matrix')
+@receiver(models.signals.post_delete, sender=PriceCurrency,
+          dispatch_uid='delete_price_currency_matrix')
+def invalidate_price_matrix(sender, instance, **kw):
+    # Raw saves are invalidating too, prices are loaded from fixtures.
+    price_matrix.invalidate()
+    # Other processes may load the matrix again before the commit.
+    call_after_request(price_matrix.invalidate)
+
+
 @receiver(models.signals.post_save, sender=PriceCurrency,
           dispatch_uid='save_price_currency')
 @receiver(models.signals.post_delete, sender=PriceCurrency,
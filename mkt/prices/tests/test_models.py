@@ -12,7 +12,8 @@ from mkt.constants import apps
 from mkt.constants.payments import (PROVIDER_BOKU, PROVIDER_REFERENCE)
 from mkt.constants.regions import (ALL_REGION_IDS, BR, HU, RESTOFWORLD, SPAIN,
                                    UK, US)
-from mkt.prices.models import AddonPremium, Price, PriceCurrency, Refund
+from mkt.prices.models import (AddonPremium, Price, PriceCurrency,
+                               price_matrix, Refund)
 from mkt.purchase.models import Contribution
 from mkt.site.fixtures import fixture
 from mkt.users.models import UserProfile
@@ -39,8 +40,6 @@ class TestPrice(amo.tests.TestCase):
 
     def setUp(self):
         self.tier_one = Price.objects.get(pk=1)
-        if hasattr(Price, '_currencies'):
-            del Price._currencies  # needed to pick up fixtures.
 
     def test_active(self):
         Price.objects.get(pk=2).update(active=False)
@@ -86,12 +85,37 @@ class TestPrice(amo.tests.TestCase):
         eq_(Price.objects.get(pk=1).get_price(), Decimal('0.99'))
         eq_(Price.objects.get(pk=1).get_price_locale(), u'$0.99')
 
-    def test_transformer(self):
+    def test_price_matrix(self):
         price = Price.objects.get(pk=1)
+        other = Price.objects.get(pk=2)
+        # Warm up the price matrix.
         price.get_price_locale()
-        # Warm up Price._currencies.
         with self.assertNumQueries(0):
             eq_(price.get_price_locale(), u'$0.99')
+            eq_(len(price.prices()), 2)
+            eq_(other.region_ids_by_name(), [BR.id, SPAIN.id, RESTOFWORLD.id])
+
+    def test_price_matrix_invalidated(self):
+        price = Price.objects.get(pk=1)
+        eq_(price.get_price(), Decimal('0.99'))
+        price.pricecurrency_set.get(region=RESTOFWORLD.id).update(price='1.5')
+        eq_(price.get_price(), Decimal('1.5'))
+        price.update(active=False)
+        eq_(price.get_price(), None)
+
+    @mock.patch('mkt.prices.models.call_after_request')
+    def test_price_matrix_invalidated_after_request(self, call_after_request):
+        Price.objects.get(pk=1).update(active=False)
+        call_after_request.assert_called_with(price_matrix.invalidate)
+
+    def test_price_matrix_shared_version(self):
+        price = Price.objects.get(pk=1)
+        eq_(price.get_price(), Decimal('0.99'))
+        # Another process saved a price currency, bypassing our signals.
+        PriceCurrency.objects.filter(tier=price).update(price='1.5')
+        eq_(price.get_price(), Decimal('0.99'))
+        price_matrix.invalidate()
+        eq_(price.get_price(), Decimal('1.5'))
 
     def test_get_tier_price(self):
         eq_(Price.objects.get(pk=2).get_price_locale(region=BR.id), 'R$1.01')
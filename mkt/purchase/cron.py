@@ -0,0 +1,32 @@
+import datetime
+
+import commonware.log
+import cronjobs
+
+import amo
+from mkt.purchase.models import Fulfillment
+from mkt.purchase.tasks import fulfill_purchase
+
+
+cron_log = commonware.log.getLogger('mkt.purchase.cron')
+
+
+@cronjobs.register
+def retry_fulfillments():
+    """
+    Requeues the fulfillment of the purchases still pending or failed an
+    hour after they were last queued, e.g. because the task was lost or
+    Solitude was down for longer than its retries. Purchases older than a
+    week are left for the transaction lookup.
+    """
+    now = datetime.datetime.now()
+    fulfillments = Fulfillment.objects.filter(
+        status__in=[amo.FULFILLMENT_PENDING, amo.FULFILLMENT_FAILED],
+        modified__lt=now - datetime.timedelta(hours=1),
+        created__gte=now - datetime.timedelta(days=7))
+    for fulfillment in fulfillments:
+        cron_log.info('Requeuing fulfillment %s.' % fulfillment.pk)
+        fulfillment.update(status=amo.FULFILLMENT_PENDING, modified=now)
+        # Outside of a request, post-request tasks have to be sent
+        # explicitly.
+        fulfill_purchase.original_apply_async(args=[fulfillment.pk])
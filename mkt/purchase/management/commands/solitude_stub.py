@@ -0,0 +1,81 @@
+import json
+import re
+import time
+import urlparse
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from optparse import make_option
+from SocketServer import ThreadingMixIn
+
+from django.core.management.base import BaseCommand
+
+
+TRANSACTION_PATH = '/generic/transaction/'
+BUYER_PATH = re.compile(r'^/generic/buyer/(\d+)/$')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers the Solitude calls made when fulfilling a purchase: every
+    transaction exists and is paid by a buyer derived from its uuid.
+    """
+    delay = 0
+
+    def send_json(self, data, status=200):
+        body = json.dumps(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.delay:
+            time.sleep(self.delay)
+
+        url = urlparse.urlparse(self.path)
+        if url.path == TRANSACTION_PATH:
+            uuid = urlparse.parse_qs(url.query).get('uuid', [''])[0]
+            buyer_id = sum(ord(c) for c in uuid) % 1000
+            return self.send_json({
+                'meta': {'total_count': 1},
+                'objects': [{'uuid': uuid,
+                             'buyer': '/generic/buyer/%s/' % buyer_id}]})
+
+        match = BUYER_PATH.match(url.path)
+        if match:
+            return self.send_json(
+                {'email': 'buyer-%s@example.com' % match.group(1)})
+
+        self.send_json({'error': 'Not found: %s' % url.path}, status=404)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Command(BaseCommand):
+    """
+    Runs a fake Solitude server to load test the webpay postback and the
+    purchase fulfillment offline. Point SOLITUDE_URL at it, e.g.
+    SOLITUDE_URL=http://localhost:2602.
+    """
+    option_list = BaseCommand.option_list + (
+        make_option('--port', type='int', default=2602,
+                    help='Port to listen on.'),
+        make_option('--delay', type='float', default=0,
+                    help='Seconds to wait before answering, to simulate a '
+                         'slow Solitude.'),
+    )
+    help = __doc__
+
+    def handle(self, *args, **kw):
+        StubHandler.delay = kw['delay']
+        server = StubServer(('', kw['port']), StubHandler)
+        self.stdout.write('Solitude stub listening on port %s' % kw['port'])
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
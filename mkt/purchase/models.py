@@ -14,7 +14,7 @@ from amo.utils import urlparams
 from mkt.site.fields import DecimalCharField
 from mkt.site.helpers import absolutify
 from mkt.site.mail import send_mail
-from mkt.site.models import ModelBase
+from mkt.site.models import ModelBase, UncachedManagerBase
 from mkt.translations.utils import get_locale_from_lang
 
 
@@ -151,3 +151,30 @@ class Contribution(ModelBase):
                                             type__in=[amo.CONTRIB_REFUND,
                                                       amo.CONTRIB_CHARGEBACK])
                                     .exists())
+
+
+class Fulfillment(ModelBase):
+    """
+    A webpay postback accepted for a contribution, to be fulfilled by
+    `mkt.purchase.tasks.fulfill_purchase`. Webpay retries postbacks, the
+    unique contribution and transaction make recording them idempotent.
+    """
+    contribution = models.OneToOneField(Contribution,
+                                        related_name='fulfillment')
+    transaction_id = models.CharField(max_length=255, unique=True)
+    amount = models.DecimalField(max_digits=9, decimal_places=2, null=True)
+    currency = models.CharField(max_length=3)
+    status = models.PositiveIntegerField(
+        default=amo.FULFILLMENT_PENDING,
+        choices=do_dictsort(amo.FULFILLMENT_STATUSES), db_index=True)
+    attempts = models.PositiveIntegerField(default=0)
+    # The last error, if any.
+    error = models.TextField(blank=True)
+
+    objects = UncachedManagerBase()
+
+    class Meta:
+        db_table = 'purchase_fulfillments'
+
+    def __unicode__(self):
+        return u'%s: %s' % (self.contribution_id, self.transaction_id)
@@ -1,13 +1,27 @@
 import logging
 
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.test.client import RequestFactory
+from django.utils.importlib import import_module
+
 import jingo.helpers
 from celeryutils import task
 from tower import ugettext as _
 
-from mkt.purchase.models import Contribution
+import amo
+from amo.utils import log_cef
+from lib.metrics import record_action
+from lib.pay_server import client as solitude
+from lib.post_request_task.task import task as post_request_task
+from mkt.purchase.models import Contribution, Fulfillment
+from mkt.site.decorators import write
 from mkt.site.helpers import absolutify
 from mkt.site.mail import send_html_mail_jinja
 from mkt.translations.utils import get_locale_from_lang
+from mkt.users.models import UserProfile
+from mkt.users.utils import autocreate_username
 
 
 log = logging.getLogger('z.purchase.webpay')
@@ -47,3 +61,99 @@ def send_purchase_receipt(contrib_id, **kw):
         html_template = 'purchase/receipt.html'
         send_html_mail_jinja(subject, html_template, text_template, data,
                              recipient_list=[contrib.user.email])
+
+
+def get_buyer(trans_id):
+    """Looks up the user who paid for the Solitude transaction `trans_id`."""
+    try:
+        transaction_data = (solitude.api.generic
+                                        .transaction
+                                        .get_object_or_404)(uuid=trans_id)
+    except ObjectDoesNotExist:
+        raise LookupError('Unable to look up transaction: '
+                          '{trans_id} in Solitude'.format(
+                              trans_id=trans_id))
+
+    buyer_uri = transaction_data['buyer']
+    try:
+        buyer_data = solitude.api.by_url(buyer_uri).get_object_or_404()
+    except ObjectDoesNotExist:
+        raise LookupError('Unable to look up buyer: '
+                          '{buyer_uri} in Solitude'.format(
+                              buyer_uri=buyer_uri))
+
+    buyer_email = buyer_data['email']
+
+    user_profile = UserProfile.objects.filter(email=buyer_email)
+    if user_profile.exists():
+        return user_profile.get()
+
+    buyer_username = autocreate_username(buyer_email.partition('@')[0])
+    user_profile = UserProfile.objects.create(
+        display_name=buyer_username,
+        email=buyer_email,
+        is_verified=True,
+        source=amo.LOGIN_SOURCE_WEBPAY,
+        username=buyer_username)
+
+    log_cef('New Account', 5, {}, username=buyer_username,
+            signature='AUTHNOTICE',
+            msg='A new account was created from Webpay (using FxA)')
+    # There is no request from the buyer here, record the new user against
+    # an anonymous one.
+    request = RequestFactory().get('/')
+    request.LANG = settings.LANGUAGE_CODE
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    record_action('new-user', request)
+    return user_profile
+
+
+@post_request_task(default_retry_delay=60, max_retries=5)
+@write
+def fulfill_purchase(fulfillment_id, **kw):
+    """
+    Fulfills a purchase recorded by the webpay postback: finds the buyer in
+    Solitude and marks the contribution as paid. Failures are retried, after
+    the last retry the fulfillment is marked as failed so that it shows up in
+    the transaction lookup.
+    """
+    fulfillment = Fulfillment.objects.get(pk=fulfillment_id)
+    if fulfillment.status == amo.FULFILLMENT_COMPLETE:
+        log.info('Fulfillment %s already complete' % fulfillment_id)
+        return
+
+    contrib = fulfillment.contribution
+    try:
+        user_profile = get_buyer(fulfillment.transaction_id)
+    except Exception, e:
+        fulfillment.update(attempts=fulfillment.attempts + 1, error=str(e))
+        if fulfill_purchase.request.retries >= fulfill_purchase.max_retries:
+            log.exception('Failed to fulfill purchase for contrib %s with '
+                          'transaction %s' % (contrib.pk,
+                                              fulfillment.transaction_id))
+            fulfillment.update(status=amo.FULFILLMENT_FAILED)
+            return
+        log.error('Failed to fulfill purchase for contrib %s, retrying: %s'
+                  % (contrib.pk, e))
+        fulfill_purchase.retry(args=[fulfillment_id], kwargs=kw, exc=e)
+        return
+
+    log.info('webpay postback: fulfilling purchase for contrib %s with '
+             'transaction %s' % (contrib, fulfillment.transaction_id))
+    with transaction.atomic():
+        # Repeated postbacks and the retry_fulfillments cron can run this
+        # task more than once at the same time, only complete it once.
+        if (Fulfillment.objects.select_for_update()
+                       .get(pk=fulfillment_id).status ==
+                amo.FULFILLMENT_COMPLETE):
+            log.info('Fulfillment %s already complete' % fulfillment_id)
+            return
+        contrib.update(transaction_id=fulfillment.transaction_id,
+                       type=amo.CONTRIB_PURCHASE,
+                       user=user_profile,
+                       amount=fulfillment.amount,
+                       currency=fulfillment.currency)
+        fulfillment.update(status=amo.FULFILLMENT_COMPLETE,
+                           attempts=fulfillment.attempts + 1, error='')
+
+    send_purchase_receipt.delay(contrib.pk)
@@ -0,0 +1,63 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+import mock
+from nose.tools import eq_
+
+import amo
+import amo.tests
+from mkt.purchase.cron import retry_fulfillments
+from mkt.purchase.models import Contribution, Fulfillment
+from mkt.site.fixtures import fixture
+
+
+class TestRetryFulfillments(amo.tests.TestCase):
+    fixtures = fixture('webapp_337141')
+
+    def setUp(self):
+        self.contrib = Contribution.objects.create(addon_id=337141,
+                                                   uuid=str(uuid.uuid4()),
+                                                   type=amo.CONTRIB_PENDING)
+        self.fulfillment = Fulfillment.objects.create(
+            contribution=self.contrib, transaction_id='<webpay-trans-id>',
+            amount=Decimal('10.99'), currency='BRL')
+        self.two_hours_ago = (datetime.datetime.now() -
+                              datetime.timedelta(hours=2))
+
+        p = mock.patch('mkt.purchase.cron.fulfill_purchase')
+        self.fulfill_purchase = p.start()
+        self.addCleanup(p.stop)
+
+    def test_stale_pending(self):
+        self.fulfillment.update(modified=self.two_hours_ago)
+        retry_fulfillments()
+        self.fulfill_purchase.original_apply_async.assert_called_with(
+            args=[self.fulfillment.pk])
+        self.assertCloseToNow(
+            Fulfillment.objects.get(pk=self.fulfillment.pk).modified)
+
+    def test_stale_failed(self):
+        self.fulfillment.update(status=amo.FULFILLMENT_FAILED,
+                                modified=self.two_hours_ago)
+        retry_fulfillments()
+        eq_(self.fulfill_purchase.original_apply_async.call_count, 1)
+        eq_(Fulfillment.objects.get(pk=self.fulfillment.pk).status,
+            amo.FULFILLMENT_PENDING)
+
+    def test_recent(self):
+        retry_fulfillments()
+        assert not self.fulfill_purchase.original_apply_async.called
+
+    def test_complete(self):
+        self.fulfillment.update(status=amo.FULFILLMENT_COMPLETE,
+                                modified=self.two_hours_ago)
+        retry_fulfillments()
+        assert not self.fulfill_purchase.original_apply_async.called
+
+    def test_too_old(self):
+        self.fulfillment.update(
+            created=datetime.datetime.now() - datetime.timedelta(days=8),
+            modified=self.two_hours_ago)
+        retry_fulfillments()
+        assert not self.fulfill_purchase.original_apply_async.called
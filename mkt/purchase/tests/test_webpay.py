@@ -4,7 +4,6 @@ import time
 from decimal import Decimal
 
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.urlresolvers import reverse
 
 import jwt
@@ -17,8 +16,7 @@ import amo
 from mkt.api.exceptions import AlreadyPurchased
 from mkt.inapp.models import InAppProduct
 from mkt.prices.models import AddonPurchase, Price
-from mkt.purchase.models import Contribution
-from mkt.users.models import UserProfile
+from mkt.purchase.models import Contribution, Fulfillment
 from utils import PurchaseTest
 
 
@@ -117,25 +115,9 @@ class PostbackTest(PurchaseTest):
             type=amo.CONTRIB_PENDING,
             user=self.user
         )
-        self.buyer_email = 'buyer@example.com'
         self.webpay_dev_id = '<stored in solitude>'
         self.webpay_dev_secret = '<stored in solitude>'
 
-        solitude_patcher = mock.patch('mkt.purchase.webpay.solitude')
-        self.solitude = solitude_patcher.start()
-        self.addCleanup(solitude_patcher.stop)
-
-        (self.solitude.api.generic.transaction.get_object_or_404
-                                              .return_value) = {
-            'buyer': 'buyer-uri',
-        }
-
-        self.solitude_by_url = mock.MagicMock()
-        self.solitude.api.by_url.return_value = self.solitude_by_url
-        self.solitude_by_url.get_object_or_404.return_value = {
-            'email': self.buyer_email,
-        }
-
         p = mock.patch('mkt.purchase.webpay.tasks')
         self.tasks = p.start()
         self.addCleanup(p.stop)
@@ -218,12 +200,16 @@ class TestPostback(PostbackTest):
         self.decode.assert_called_with(jwt_encoded, ANY)
         eq_(resp.status_code, 200)
         eq_(resp.content, '<webpay-trans-id>')
+        fulfillment = Fulfillment.objects.get(contribution=self.contrib)
+        eq_(fulfillment.transaction_id, '<webpay-trans-id>')
+        eq_(fulfillment.amount, Decimal('10.99'))
+        eq_(fulfillment.currency, 'BRL')
+        eq_(fulfillment.status, amo.FULFILLMENT_PENDING)
+        self.tasks.fulfill_purchase.delay.assert_called_with(fulfillment.pk)
+        # The contribution is only updated once fulfilled.
         cn = Contribution.objects.get(pk=self.contrib.pk)
-        eq_(cn.type, amo.CONTRIB_PURCHASE)
-        eq_(cn.transaction_id, '<webpay-trans-id>')
-        eq_(cn.amount, Decimal('10.99'))
-        eq_(cn.currency, 'BRL')
-        self.tasks.send_purchase_receipt.delay.assert_called_with(cn.pk)
+        eq_(cn.type, amo.CONTRIB_PENDING)
+        eq_(cn.transaction_id, None)
 
     def test_simulation(self):
         inapp = InAppProduct.objects.create(
@@ -233,11 +219,6 @@ class TestPostback(PostbackTest):
         self.contrib.update(inapp_product=inapp, addon=None,
                             user=None)
 
-        # Because Webpay doesn't make a real Solitude transaction for
-        # simulations, we'll get a 404 when looking it up by ID.
-        get = self.solitude.api.generic.transaction.get_object_or_404
-        get.side_effect = ObjectDoesNotExist
-
         response_trans_id = '<simulate-uuid>'
         jwt_dict = self.jwt_dict()
         jwt_dict['response']['transactionID'] = response_trans_id
@@ -252,17 +233,8 @@ class TestPostback(PostbackTest):
         eq_(cn.type, amo.CONTRIB_PURCHASE)
 
         assert not self.tasks.send_purchase_receipt.delay.called
-
-    def test_user_created_after_purchase(self):
-        self.contrib.user = None
-        self.contrib.save()
-        eq_(UserProfile.objects.filter(email=self.buyer_email).count(), 0)
-        resp = self.post(fake_decode=True)
-        eq_(resp.status_code, 200)
-        cn = Contribution.objects.get(pk=self.contrib.pk)
-        user = UserProfile.objects.get(email=self.buyer_email)
-        eq_(cn.user, user)
-        eq_(cn.user.source, amo.LOGIN_SOURCE_WEBPAY)
+        assert not self.tasks.fulfill_purchase.delay.called
+        assert not Fulfillment.objects.exists()
 
     def test_valid_duplicate(self):
         self.contrib.update(type=amo.CONTRIB_PURCHASE,
@@ -273,6 +245,39 @@ class TestPostback(PostbackTest):
         eq_(resp.content, '<webpay-trans-id>')
         assert not self.tasks.send_purchase_receipt.delay.called
 
+    def test_duplicate_while_fulfilling(self):
+        self.post(fake_decode=True)
+        eq_(self.tasks.fulfill_purchase.delay.call_count, 1)
+
+        resp = self.post(fake_decode=True)
+        eq_(resp.status_code, 200)
+        eq_(resp.content, '<webpay-trans-id>')
+        eq_(Fulfillment.objects.count(), 1)
+        # The fulfillment is queued again in case the first task was lost.
+        eq_(self.tasks.fulfill_purchase.delay.call_count, 2)
+        self.tasks.fulfill_purchase.delay.assert_called_with(
+            Fulfillment.objects.get().pk)
+
+    def test_duplicate_after_fulfillment(self):
+        self.post(fake_decode=True)
+        Fulfillment.objects.update(status=amo.FULFILLMENT_COMPLETE)
+
+        resp = self.post(fake_decode=True)
+        eq_(resp.status_code, 200)
+        eq_(self.tasks.fulfill_purchase.delay.call_count, 1)
+
+    def test_invalid_duplicate_while_fulfilling(self):
+        self.post(fake_decode=True)
+
+        jwt_dict = self.jwt_dict()
+        jwt_dict['response']['transactionID'] = '<some-other-trans-id>'
+        self.decode.return_value = jwt_dict
+        with self.assertRaises(LookupError):
+            self.post(req=self.jwt(req=jwt_dict))
+
+        eq_(Fulfillment.objects.get().transaction_id, '<webpay-trans-id>')
+        eq_(self.tasks.fulfill_purchase.delay.call_count, 1)
+
     def test_invalid_duplicate(self):
         jwt_dict = self.jwt_dict()
         jwt_dict['response']['transactionID'] = '<some-other-trans-id>'
@@ -285,7 +290,7 @@ class TestPostback(PostbackTest):
         with self.assertRaises(LookupError):
             self.post(req=jwt_encoded)
 
-        assert not self.tasks.send_purchase_receipt.delay.called
+        assert not self.tasks.fulfill_purchase.delay.called
 
     @raises(RequestExpired)
     def test_invalid_claim(self):
@@ -301,15 +306,3 @@ class TestPostback(PostbackTest):
 
         parse_from_webpay.return_value = example
         self.post()
-
-    @raises(LookupError)
-    def test_no_transaction_found_fails(self):
-        (self.solitude.api.generic.transaction
-                                  .get_object_or_404
-                                  .side_effect) = ObjectDoesNotExist
-        self.post(fake_decode=True)
-
-    @raises(LookupError)
-    def test_no_buyer_found_fails(self):
-        self.solitude_by_url.get_object_or_404.side_effect = ObjectDoesNotExist
-        self.post(fake_decode=True)
@@ -1,6 +1,8 @@
 import uuid
+from decimal import Decimal
 
 from django.core import mail
+from django.core.exceptions import ObjectDoesNotExist
 
 from mock import patch
 from nose.tools import eq_, ok_
@@ -8,8 +10,9 @@ from nose.tools import eq_, ok_
 import amo
 
 from mkt.purchase import tasks as tasks
-from mkt.purchase.models import Contribution
+from mkt.purchase.models import Contribution, Fulfillment
 from mkt.purchase.tests.utils import PurchaseTest
+from mkt.users.models import UserProfile
 
 
 class TestReceiptEmail(PurchaseTest):
@@ -47,3 +50,97 @@ class TestReceiptEmail(PurchaseTest):
         eq_(data['developer_name'], self.addon.current_version.developer_name)
         eq_(data['price'], self.contrib.get_amount_locale('en_US'))
         ok_(data['purchases_url'].startswith('http://f.com'))
+
+
+class TestFulfillPurchase(PurchaseTest):
+
+    def setUp(self):
+        super(TestFulfillPurchase, self).setUp()
+        self.contrib = Contribution.objects.create(addon_id=self.addon.id,
+                                                   amount=self.price.price,
+                                                   uuid=str(uuid.uuid4()),
+                                                   type=amo.CONTRIB_PENDING,
+                                                   user=self.user)
+        self.fulfillment = Fulfillment.objects.create(
+            contribution=self.contrib, transaction_id='<webpay-trans-id>',
+            amount=Decimal('10.99'), currency='BRL')
+        self.buyer_email = 'buyer@example.com'
+
+        p = patch('mkt.purchase.tasks.solitude')
+        self.solitude = p.start()
+        self.addCleanup(p.stop)
+
+        (self.solitude.api.generic.transaction.get_object_or_404
+                                              .return_value) = {
+            'buyer': 'buyer-uri',
+        }
+        self.solitude_by_url = self.solitude.api.by_url.return_value
+        self.solitude_by_url.get_object_or_404.return_value = {
+            'email': self.buyer_email,
+        }
+
+        p = patch('mkt.purchase.tasks.send_purchase_receipt')
+        self.send_purchase_receipt = p.start()
+        self.addCleanup(p.stop)
+
+    def fulfill(self):
+        tasks.fulfill_purchase(self.fulfillment.pk)
+        return Fulfillment.objects.get(pk=self.fulfillment.pk)
+
+    def test_fulfill(self):
+        fulfillment = self.fulfill()
+        eq_(fulfillment.status, amo.FULFILLMENT_COMPLETE)
+        eq_(fulfillment.attempts, 1)
+        cn = Contribution.objects.get(pk=self.contrib.pk)
+        eq_(cn.type, amo.CONTRIB_PURCHASE)
+        eq_(cn.transaction_id, '<webpay-trans-id>')
+        eq_(cn.amount, Decimal('10.99'))
+        eq_(cn.currency, 'BRL')
+        eq_(cn.user.email, self.buyer_email)
+        self.send_purchase_receipt.delay.assert_called_with(cn.pk)
+
+    def test_already_complete(self):
+        self.fulfillment.update(status=amo.FULFILLMENT_COMPLETE)
+        self.fulfill()
+        ok_(not self.solitude.api.generic.transaction.get_object_or_404
+                                                       .called)
+        ok_(not self.send_purchase_receipt.delay.called)
+
+    def test_user_created_after_purchase(self):
+        self.contrib.update(user=None)
+        eq_(UserProfile.objects.filter(email=self.buyer_email).count(), 0)
+        self.fulfill()
+        cn = Contribution.objects.get(pk=self.contrib.pk)
+        user = UserProfile.objects.get(email=self.buyer_email)
+        eq_(cn.user, user)
+        eq_(cn.user.source, amo.LOGIN_SOURCE_WEBPAY)
+
+    @patch('mkt.purchase.tasks.fulfill_purchase.retry')
+    def test_no_transaction_found_retries(self, retry):
+        (self.solitude.api.generic.transaction
+                                  .get_object_or_404
+                                  .side_effect) = ObjectDoesNotExist
+        fulfillment = self.fulfill()
+        ok_(retry.called)
+        eq_(fulfillment.status, amo.FULFILLMENT_PENDING)
+        eq_(fulfillment.attempts, 1)
+        ok_('Unable to look up transaction' in fulfillment.error)
+        eq_(Contribution.objects.get(pk=self.contrib.pk).type,
+            amo.CONTRIB_PENDING)
+        ok_(not self.send_purchase_receipt.delay.called)
+
+    @patch('mkt.purchase.tasks.fulfill_purchase.retry')
+    def test_no_buyer_found_retries(self, retry):
+        self.solitude_by_url.get_object_or_404.side_effect = ObjectDoesNotExist
+        fulfillment = self.fulfill()
+        ok_(retry.called)
+        ok_('Unable to look up buyer' in fulfillment.error)
+
+    @patch('mkt.purchase.tasks.fulfill_purchase.retry')
+    def test_failed_after_last_retry(self, retry):
+        self.solitude_by_url.get_object_or_404.side_effect = ObjectDoesNotExist
+        with patch.object(tasks.fulfill_purchase, 'max_retries', 0):
+            fulfillment = self.fulfill()
+        ok_(not retry.called)
+        eq_(fulfillment.status, amo.FULFILLMENT_FAILED)
+        ok_(not self.send_purchase_receipt.delay.called)
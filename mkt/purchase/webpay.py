@@ -4,7 +4,7 @@ import uuid
 from decimal import Decimal
 
 from django import http
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_POST
 
@@ -12,17 +12,12 @@ import commonware.log
 import waffle
 
 import amo
-from amo.utils import log_cef
 from lib.cef_loggers import app_pay_cef
 from lib.crypto.webpay import InvalidSender, parse_from_webpay
-from lib.metrics import record_action
-from lib.pay_server import client as solitude
 from mkt.api.exceptions import AlreadyPurchased
 from mkt.purchase.decorators import can_be_purchased
-from mkt.purchase.models import Contribution
+from mkt.purchase.models import Contribution, Fulfillment
 from mkt.site.decorators import json_view, login_required, write
-from mkt.users.models import UserProfile
-from mkt.users.utils import autocreate_username
 from mkt.webapps.decorators import app_view_factory
 from mkt.webapps.models import Webapp
 from mkt.webpay.webpay_jwt import get_product_jwt, WebAppProduct
@@ -138,58 +133,39 @@ def postback(request):
                                  data['response']['transactionID'],
                                  contrib_uuid, contrib.transaction_id))
 
+    # Record the postback and acknowledge it right away, the purchase is
+    # fulfilled by a task so that Solitude slowness doesn't make webpay time
+    # out and retry.
     try:
-        transaction_data = (solitude.api.generic
-                                        .transaction
-                                        .get_object_or_404)(uuid=trans_id)
-    except ObjectDoesNotExist:
-        raise LookupError('Unable to look up transaction: '
-                          '{trans_id} in Solitude'.format(
-                              trans_id=trans_id))
-
-    buyer_uri = transaction_data['buyer']
-
-    try:
-        buyer_data = solitude.api.by_url(buyer_uri).get_object_or_404()
-    except ObjectDoesNotExist:
-        raise LookupError('Unable to look up buyer: '
-                          '{buyer_uri} in Solitude'.format(
-                              buyer_uri=buyer_uri))
-
-    buyer_email = buyer_data['email']
-
-    user_profile = UserProfile.objects.filter(email=buyer_email)
-
-    if user_profile.exists():
-        user_profile = user_profile.get()
-    else:
-        buyer_username = autocreate_username(buyer_email.partition('@')[0])
-        source = amo.LOGIN_SOURCE_WEBPAY
-        user_profile = UserProfile.objects.create(
-            display_name=buyer_username,
-            email=buyer_email,
-            is_verified=True,
-            source=source,
-            username=buyer_username)
-
-        log_cef('New Account', 5, request, username=buyer_username,
-                signature='AUTHNOTICE',
-                msg='A new account was created from Webpay (using FxA)')
-        record_action('new-user', request)
-
-    log.info('webpay postback: fulfilling purchase for contrib %s with '
+        with transaction.atomic():
+            fulfillment = Fulfillment.objects.create(
+                contribution=contrib, transaction_id=trans_id,
+                amount=Decimal(data['response']['price']['amount']),
+                currency=data['response']['price']['currency'])
+    except IntegrityError:
+        fulfillment = (Fulfillment.objects.filter(contribution=contrib)
+                                          .first())
+        if fulfillment is None or fulfillment.transaction_id != trans_id:
+            raise LookupError('JWT (iss:%s, aud:%s) for trans_id %s '
+                              'conflicts with an existing fulfillment'
+                              % (data['iss'], data['aud'], trans_id))
+        app_pay_cef.log(request, 'Repeat postback', 'repeat_postback',
+                        'Postback sent again for: %s' % (contrib.addon.pk),
+                        severity=4)
+        if fulfillment.status != amo.FULFILLMENT_COMPLETE:
+            # The task queued by the first postback may have been lost, or
+            # it gave up: try again, it's a no-op once the purchase is done.
+            log.info('webpay postback: queuing fulfillment of contrib %s '
+                     'with transaction %s again' % (contrib, trans_id))
+            tasks.fulfill_purchase.delay(fulfillment.pk)
+        return http.HttpResponse(trans_id)
+
+    log.info('webpay postback: queuing fulfillment of contrib %s with '
              'transaction %s' % (contrib, trans_id))
-    app_pay_cef.log(request, 'Purchase complete', 'purchase_complete',
-                    'Purchase complete for: %s' % (contrib.addon.pk),
+    app_pay_cef.log(request, 'Purchase accepted', 'purchase_accepted',
+                    'Purchase accepted for: %s' % (contrib.addon.pk),
                     severity=3)
-
-    contrib.update(transaction_id=trans_id,
-                   type=amo.CONTRIB_PURCHASE,
-                   user=user_profile,
-                   amount=Decimal(data['response']['price']['amount']),
-                   currency=data['response']['price']['currency'])
-
-    tasks.send_purchase_receipt.delay(contrib.pk)
+    tasks.fulfill_purchase.delay(fulfillment.pk)
 
     return http.HttpResponse(trans_id)
 
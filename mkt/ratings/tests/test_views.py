@@ -497,7 +497,9 @@ class TestRatingResource(RestOAuth, amo.tests.AMOPaths):
         eq_(rev.body, 'yes')
 
     def test_delete_app_mine(self):
-        AddonUser.objects.filter(addon=self.app).update(user=self.user)
+        for addon_user in AddonUser.objects.filter(addon=self.app):
+            addon_user.user = self.user
+            addon_user.save()
         rev = Review.objects.create(addon=self.app, user=self.user2,
                                     body='yes')
         url = reverse('ratings-detail', kwargs={'pk': rev.pk})
@@ -3,6 +3,7 @@ import time
 from urllib import urlencode
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.urlresolvers import reverse
 
@@ -127,6 +128,24 @@ def create_inapp_receipt(contrib):
                           flavour='inapp', contrib=contrib)
 
 
+def get_inapp_receipt(contrib):
+    """
+    Returns a receipt for an in-app purchase. Receipts are signed once and
+    kept in the cache for half of their lifetime, at most 30 days, so apps
+    polling for the status of a purchase don't sign a new one each time.
+
+    :params contrib: the Contribution object for the purchase.
+    """
+    key = 'receipts:inapp:%s' % contrib.pk
+    receipt = cache.get(key)
+    if receipt is None:
+        receipt = create_inapp_receipt(contrib)
+        cache.set(key, receipt,
+                  min(settings.WEBAPPS_RECEIPT_EXPIRY_SECONDS / 2,
+                      60 * 60 * 24 * 30))
+    return receipt
+
+
 def reissue_receipt(receipt):
     """
     Reissues and existing receipt by updating the timestamps and resigning
@@ -27,8 +27,9 @@ from mkt.api.base import cors_api_view
 from mkt.constants import apps
 from mkt.constants.payments import CONTRIB_NO_CHARGE
 from mkt.developers.models import AppLog
+from mkt.installs.tasks import log_install
 from mkt.installs.utils import record as utils_record
-from mkt.installs.utils import install_type
+from mkt.installs.utils import add_installed, install_type
 from mkt.prices.models import AddonPurchase
 from mkt.receipts import forms
 from mkt.receipts.utils import (create_receipt, create_test_receipt, get_uuid,
@@ -37,7 +38,7 @@ from mkt.reviewers.views import reviewer_required
 from mkt.site.decorators import json_view, write
 from mkt.users.models import UserProfile
 from mkt.webapps.decorators import app_view_factory
-from mkt.webapps.models import Installed, Webapp
+from mkt.webapps.models import Webapp
 from services.verify import get_headers, Verify
 
 
@@ -75,8 +76,7 @@ def _record(request, addon):
         install = (apps.INSTALL_TYPE_DEVELOPER if is_dev
                    else apps.INSTALL_TYPE_USER)
         # Log the install.
-        installed, c = Installed.objects.get_or_create(addon=addon,
-            user=request.user, install_type=install)
+        add_installed(request.user, addon, install)
 
         # Get a suitable uuid for this receipt.
         uuid = get_uuid(addon, request.user)
@@ -93,7 +93,8 @@ def _record(request, addon):
         if not addon.is_public():
             raise http.Http404
 
-    amo.log(amo.LOG.INSTALL_ADDON, addon)
+    if logged:
+        log_install.delay(addon.pk, request.user.pk)
     record_action('install', request, {
         'app-domain': addon.domain_from_url(addon.origin, allow_none=True),
         'app-id': addon.pk,
@@ -167,8 +168,7 @@ def issue(request, addon):
 
     install, flavour = ((apps.INSTALL_TYPE_REVIEWER, 'reviewer') if review
                         else (apps.INSTALL_TYPE_DEVELOPER, 'developer'))
-    installed, c = Installed.objects.safer_get_or_create(addon=addon,
-        user=request.user, install_type=install)
+    add_installed(request.user, addon, install)
 
     error = ''
     receipt_cef.log(request, addon, 'sign', 'Receipt signing for %s' % flavour)
@@ -273,9 +273,7 @@ def install(request):
 
 def install_record(obj, request, install_type):
     # Generate or re-use an existing install record.
-    installed, created = Installed.objects.get_or_create(
-        addon=obj, user=request.user,
-        install_type=install_type)
+    created = add_installed(request.user, obj, install_type)
 
     log.info('Installed record %s: %s' % (
         'created' if created else 're-used',
@@ -283,8 +281,8 @@ def install_record(obj, request, install_type):
 
     log.info('Creating receipt: %s' % obj.pk)
     receipt_cef.log(request._request, obj, 'sign', 'Receipt signing')
-    uuid = get_uuid(installed.addon, installed.user)
-    return create_receipt(installed.addon, installed.user, uuid)
+    uuid = get_uuid(obj, request.user)
+    return create_receipt(obj, request.user, uuid)
 
 
 @cors_api_view(['POST'])
@@ -73,7 +73,8 @@ from mkt.tags.models import Tag
 from mkt.users.models import UserProfile
 from mkt.webapps.decorators import app_view
 from mkt.webapps.indexers import WebappIndexer
-from mkt.webapps.models import AddonDeviceType, AddonUser, Version, Webapp
+from mkt.webapps.models import (AddonDeviceType, get_author_roles, Version,
+                                 Webapp)
 from mkt.webapps.signals import version_changed
 from mkt.zadmin.models import set_config, unmemoized_get_config
 
@@ -1068,7 +1069,7 @@ class AppOwnerPermission(BasePermission):
         return Webapp.objects.filter(pk=app_id).exists()
 
     def user_is_author(self, app_id, user):
-        return AddonUser.objects.filter(user=user, addon_id=app_id).exists()
+        return int(app_id) in get_author_roles(user)
 
     def has_permission(self, request, view):
         app_id = request.DATA.get('app')
@@ -335,6 +335,11 @@ FEED_SHELF_BG_PATH = UPLOADS_PATH + '/feed_shelf_background'
 GUARDED_ADDONS_PATH = NETAPP_STORAGE + '/guarded-addons'
 IMAGEASSETS_PATH = UPLOADS_PATH + '/imageassets'
 
+# Where resized and crushed images are kept, by hash of the source image, so
+# identical images aren't processed again. Entries that haven't been used for
+# TMP_PATH_DAYS_DELETE are deleted by mkt_gc.
+IMAGE_CACHE_PATH = TMP_PATH + '/image-cache'
+
 # File path for add-on files that get rsynced to mirrors.
 # /mnt/netapp_amo/addons.mozilla.org-remora/public-staging
 PREVIEW_FULL_PATH = PREVIEWS_PATH + '/full/%s/%d.%s'
@@ -502,6 +507,11 @@ API_SHOW_TRACEBACKS = False
 # Whether to throttle API requests. Default is True. Disable where appropriate.
 API_THROTTLE = True
 
+# How long, in seconds, successful API authentications and the groups of the
+# authenticated users are cached for. Revoking a token or changing the groups
+# of a user invalidates the cache.
+API_AUTH_CACHE_TIMEOUT = 60
+
 # The version we append to the app feature profile. Bump when we add new app
 # features to the `AppFeatures` model.
 APP_FEATURES_VERSION = 5
@@ -659,6 +669,14 @@ DUMPED_APPS_DAYS_DELETE = 3600 * 24 * 30
 # Tarballs in DUMPED_USERS_PATH deleted 30 days after they have been written.
 DUMPED_USERS_DAYS_DELETE = 3600 * 24 * 30
 
+# Number of objects serialized by each task of the public data exports.
+EXPORT_CHUNK_SIZE = 500
+
+# Formats the public data exports are written in: 'tar' for a tarball with
+# one JSON file per object, 'ndjson' for a gzipped file per kind of object
+# with one JSON object per line.
+EXPORT_FORMATS = ('tar', 'ndjson')
+
 # Files saved to TMP_PATH deleted 15 days after written.
 TMP_PATH_DAYS_DELETE = 3600 * 24 * 15
 
@@ -685,6 +703,7 @@ ES_INDEXES = {
     'mkt_feed_collection': 'feed_collections',
     'mkt_feed_shelf': 'feed_shelves',
     'mkt_feed_item': 'feed_items',
+    'users': 'users',
     # Adding an index? Don't forget to add the indexer to ESTestCase.
     # Also add the index to reindex.py.
 }
@@ -750,6 +769,14 @@ GEOIP_URL = ''
 GEOIP_DEFAULT_VAL = 'restofworld'
 GEOIP_DEFAULT_TIMEOUT = .2
 
+# GeoIP backends, tried in order until one resolves the address.
+GEOIP_BACKENDS = ['lib.geoip.RangeFileBackend', 'lib.geoip.HTTPBackend']
+# Path to a file of "<network>,<country code>" lines used to resolve addresses
+# locally, see lib.geoip.RangeFileBackend.
+GEOIP_DB_PATH = None
+# Number of resolved addresses each process keeps in memory.
+GEOIP_CACHE_SIZE = 10000
+
 # Credentials for accessing Google Analytics stats.
 GOOGLE_ANALYTICS_CREDENTIALS = {}
 
@@ -919,6 +946,14 @@ MARKETPLACE_GUID = 'e6a59937-29e4-456a-b636-b69afa8693b4'
 MARKETPLACE_USER_AGENT = ('UA for marketplace.firefox.com; '
                           'bug? http://mzl.la/1mZ9F3a')
 
+# Manifests refreshed by update_manifests are fetched concurrently, with at
+# most MANIFEST_FETCH_WORKERS requests at once, MANIFEST_FETCH_PER_HOST of them
+# to the same host. Fetches not done after MANIFEST_FETCH_DEADLINE seconds are
+# retried later.
+MANIFEST_FETCH_WORKERS = 10
+MANIFEST_FETCH_PER_HOST = 2
+MANIFEST_FETCH_DEADLINE = 60 * 5
+
 # Bundles is a dictionary of two dictionaries, css and js, which list css files
 # and js files that can be bundled together by the minify app.
 MINIFY_BUNDLES = {
@@ -932,6 +967,18 @@ MINIFY_MOZMARKET = True
 MONOLITH_SERVER = None
 MONOLITH_INDEX = 'time_*'
 MONOLITH_MAX_DATE_RANGE = 365
+# Number of threads used to query Monolith concurrently, per process.
+MONOLITH_POOL_SIZE = 4
+# How long to cache Monolith results for date ranges that are over and for
+# those that include today.
+MONOLITH_CACHE_TIMEOUT = 60 * 60 * 24
+MONOLITH_CACHE_TIMEOUT_CURRENT = 60 * 5
+
+# MonolithRecords are buffered by each process and saved in batches of
+# MONOLITH_BUFFER_SIZE, or once the oldest one is MONOLITH_BUFFER_TIMEOUT
+# seconds old. A size of 0 saves every record right away.
+MONOLITH_BUFFER_SIZE = 100
+MONOLITH_BUFFER_TIMEOUT = 30
 
 # The issuer for unverified Persona email addresses.
 # We only trust one issuer to grant us unverified emails.
@@ -965,6 +1012,8 @@ PFS_URL = 'https://pfs.mozilla.org/plugins/PluginFinderService.php'
 
 # Path to pngcrush (for image optimization).
 PNGCRUSH_BIN = 'pngcrush'
+# Maximum number of pngcrush processes run at the same time by a task.
+PNGCRUSH_WORKERS = 4
 
 # When True, pre-generate APKs for apps, turn off by default.
 PRE_GENERATE_APKS = False
@@ -1112,6 +1161,36 @@ SOLITUDE_SECRET = ''
 # The timeout we'll give solitude.
 SOLITUDE_TIMEOUT = 10
 
+# Timeouts, in seconds, for the solitude endpoints that need more or less than
+# SOLITUDE_TIMEOUT, by path prefix. The longest matching prefix wins.
+SOLITUDE_ENDPOINT_TIMEOUTS = {
+    '/bango/': 20,
+    '/generic/': 5,
+    '/services/': 5,
+}
+
+# Number of keep-alive connections each process keeps open to solitude.
+SOLITUDE_POOL_SIZE = 10
+
+# After this many consecutive failures, calls to solitude fail right away for
+# SOLITUDE_CIRCUIT_RESET seconds before solitude is tried again.
+SOLITUDE_CIRCUIT_FAILURES = 5
+SOLITUDE_CIRCUIT_RESET = 30
+
+# GET responses from these read-only solitude lookups, by path prefix, are
+# cached for SOLITUDE_CACHE_TIMEOUT seconds. Any write to solitude from
+# zamboni invalidates them.
+SOLITUDE_CACHED_ENDPOINTS = (
+    '/bango/package/',
+    '/bango/product/',
+    '/bango/sbi/agreement/',
+    '/boku/product/',
+    '/generic/product/',
+    '/generic/seller/',
+    '/provider/reference/',
+)
+SOLITUDE_CACHE_TIMEOUT = 30
+
 # The OAuth keys to connect to the solitude host specified above.
 SOLITUDE_OAUTH = {'key': '', 'secret': ''}
 
@@ -1182,6 +1261,11 @@ USE_HEKA_FOR_CEF = False
 
 VALIDATE_ADDONS = True
 
+# Validation results are cached by content, validator version and the settings
+# below. Bump this to drop the cached results when upgrading the validator
+# without a change of its version number.
+VALIDATION_CACHE_VERSION = 1
+
 # Allowed `installs_allowed_from` values for manifest validator.
 VALIDATOR_IAF_URLS = ['https://marketplace.firefox.com']
 
@@ -0,0 +1,32 @@
+import datetime
+
+from django.db.models import Q
+
+import commonware.log
+import cronjobs
+
+from mkt.site.models import MAIL_PENDING, MAIL_SENDING, SpooledMail
+from mkt.site.tasks import deliver_mail_batch, MAIL_LEASE
+
+
+cron_log = commonware.log.getLogger('mkt.site.cron')
+
+
+@cronjobs.register
+def deliver_spooled_mail():
+    """
+    Requeues the delivery of the mail batches that still have pending mails
+    an hour later, or mails claimed by a task which didn't send them in
+    time, e.g. because the worker delivering them was stopped. The mails are
+    claimed before being sent, so a batch still being delivered can safely
+    get a second task.
+    """
+    now = datetime.datetime.now()
+    an_hour_ago = now - datetime.timedelta(hours=1)
+    batch_ids = set(SpooledMail.objects.filter(
+        Q(status=MAIL_PENDING, modified__lt=an_hour_ago) |
+        Q(status=MAIL_SENDING, modified__lt=now - MAIL_LEASE))
+        .values_list('batch_id', flat=True))
+    for batch_id in batch_ids:
+        cron_log.info('Requeuing delivery of mail batch %s.' % batch_id)
+        deliver_mail_batch.delay(batch_id)
@@ -3,12 +3,13 @@ import re
 
 from django.conf import settings
 from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
 
 from jingo import env
 
 from amo import logger_log as log
-from mkt.site.models import FakeEmail
-from mkt.site.tasks import send_email
+from mkt.site.models import FakeEmail, MailBatch, SpooledMail
+from mkt.site.tasks import deliver_mail_batch, send_email
 from mkt.users.models import UserNotification
 from mkt.users.notifications import NOTIFICATIONS_BY_SHORT
 from mkt.zadmin.models import get_config
@@ -27,8 +28,9 @@ class FakeEmailBackend(BaseEmailBackend):
     def send_messages(self, messages):
         """Sends a list of messages (saves `FakeEmail` objects)."""
         maillog.debug('Sending fake mail.')
-        for msg in messages:
-            FakeEmail.objects.create(message=msg.message().as_string())
+        FakeEmail.objects.bulk_create(
+            [FakeEmail(message=msg.message().as_string())
+             for msg in messages])
         return len(messages)
 
     def view_all(self):
@@ -56,6 +58,100 @@ def send_mail(subject, message, from_email=None, recipient_list=None,
     if isinstance(recipient_list, basestring):
         raise ValueError('recipient_list should be a list, not a string.')
 
+    fake_recipient_list, real_recipient_list = _split_recipients(
+        recipient_list, use_blacklist=use_blacklist,
+        perm_setting=perm_setting)
+
+    if not from_email:
+        from_email = settings.DEFAULT_FROM_EMAIL
+
+    if cc:
+        # If not basestring, assume it is already a list.
+        if isinstance(cc, basestring):
+            cc = [cc]
+
+    if not headers:
+        headers = {}
+
+    def send(recipient, message, real_email, **options):
+        kwargs = {
+            'async': async,
+            'attachments': attachments,
+            'cc': cc,
+            'fail_silently': fail_silently,
+            'from_email': from_email,
+            'headers': headers,
+            'html_message': html_message,
+            'max_retries': max_retries,
+            'real_email': real_email,
+        }
+        kwargs.update(options)
+        # Email subject *must not* contain newlines
+        args = (recipient, ' '.join(subject.splitlines()), message)
+        if async:
+            return send_email.delay(*args, **kwargs)
+        else:
+            return send_email(*args, **kwargs)
+
+    if fake_recipient_list:
+        # Send fake emails to these recipients (i.e. don't actually send them).
+        result = send(fake_recipient_list, message=message, real_email=False,
+                      html_message=html_message, attachments=attachments)
+    else:
+        result = True
+
+    if result and real_recipient_list:
+        # And then send emails out to these recipients.
+        result = send(real_recipient_list, message=message, real_email=True,
+                      html_message=html_message, attachments=attachments)
+
+    return result
+
+
+def send_mass_mail(subject, message, recipient_list, from_email=None,
+                   use_blacklist=True, perm_setting=None, html_message=None):
+    """
+    Sends the same message to each of the recipients, separately.
+
+    Notification settings, the blacklist and the whitelist are checked once
+    for all recipients, which are written to the mail spool. The
+    `deliver_mail_batch` task then sends the mails, reusing its connection
+    and retrying failed mails. Returns the MailBatch, or None if no mail
+    needs to be sent.
+    """
+    if isinstance(recipient_list, basestring):
+        raise ValueError('recipient_list should be a list, not a string.')
+
+    fake_recipient_list, real_recipient_list = _split_recipients(
+        [email for email in recipient_list if email],
+        use_blacklist=use_blacklist, perm_setting=perm_setting)
+    if not fake_recipient_list and not real_recipient_list:
+        return None
+
+    with transaction.atomic():
+        batch = MailBatch.objects.create(
+            # Email subject *must not* contain newlines
+            subject=' '.join(subject.splitlines()), message=message,
+            html_message=html_message,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL)
+        SpooledMail.objects.bulk_create(
+            [SpooledMail(batch=batch, recipient=email, real_email=False)
+             for email in fake_recipient_list] +
+            [SpooledMail(batch=batch, recipient=email, real_email=True)
+             for email in real_recipient_list])
+    maillog.info('Spooled mail batch %s for %s recipients.'
+                 % (batch.pk, len(fake_recipient_list) +
+                    len(real_recipient_list)))
+    deliver_mail_batch.delay(batch.pk)
+    return batch
+
+
+def _split_recipients(recipient_list, use_blacklist=True, perm_setting=None):
+    """
+    Returns the recipients that should get fake emails and the recipients
+    that should get real emails, leaving out the ones who don't want this
+    notification and the blacklisted ones.
+    """
     # Check against user notification settings
     if perm_setting:
         if isinstance(perm_setting, str):
@@ -79,8 +175,7 @@ def send_mail(subject, message, from_email=None, recipient_list=None,
                 notblacklisted_list.append(email)
         recipient_list = notblacklisted_list
 
-    # We're going to call send_email twice, once for fake emails, the other
-    # real.
+    # Split the fake emails from the real ones.
     if settings.SEND_REAL_EMAIL:
         # Send emails out to all recipients.
         fake_recipient_list = []
@@ -104,50 +199,7 @@ def send_mail(subject, message, from_email=None, recipient_list=None,
             fake_recipient_list = recipient_list
             real_recipient_list = []
 
-    if not from_email:
-        from_email = settings.DEFAULT_FROM_EMAIL
-
-    if cc:
-        # If not basestring, assume it is already a list.
-        if isinstance(cc, basestring):
-            cc = [cc]
-
-    if not headers:
-        headers = {}
-
-    def send(recipient, message, real_email, **options):
-        kwargs = {
-            'async': async,
-            'attachments': attachments,
-            'cc': cc,
-            'fail_silently': fail_silently,
-            'from_email': from_email,
-            'headers': headers,
-            'html_message': html_message,
-            'max_retries': max_retries,
-            'real_email': real_email,
-        }
-        kwargs.update(options)
-        # Email subject *must not* contain newlines
-        args = (recipient, ' '.join(subject.splitlines()), message)
-        if async:
-            return send_email.delay(*args, **kwargs)
-        else:
-            return send_email(*args, **kwargs)
-
-    if fake_recipient_list:
-        # Send fake emails to these recipients (i.e. don't actually send them).
-        result = send(fake_recipient_list, message=message, real_email=False,
-                      html_message=html_message, attachments=attachments)
-    else:
-        result = True
-
-    if result and real_recipient_list:
-        # And then send emails out to these recipients.
-        result = send(real_recipient_list, message=message, real_email=True,
-                      html_message=html_message, attachments=attachments)
-
-    return result
+    return fake_recipient_list, real_recipient_list
 
 
 def send_mail_jinja(subject, template, context, *args, **kwargs):
@@ -165,6 +217,21 @@ def send_mail_jinja(subject, template, context, *args, **kwargs):
     return msg
 
 
+def send_mass_mail_jinja(subject, template, context, recipient_list,
+                         **kwargs):
+    """
+    Like send_mass_mail, rendering the Jinja template once for all
+    recipients.
+    """
+    autoescape_orig = env.autoescape
+    env.autoescape = False
+    try:
+        message = env.get_template(template).render(context)
+    finally:
+        env.autoescape = autoescape_orig
+    return send_mass_mail(subject, message, recipient_list, **kwargs)
+
+
 def send_html_mail_jinja(subject, html_template, text_template, context,
                          *args, **kwargs):
     """Sends HTML mail using a Jinja template with autoescaping turned off."""
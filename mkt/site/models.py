@@ -358,3 +358,42 @@ class FakeEmail(ModelBase):
 
     class Meta:
         db_table = 'fake_email'
+
+
+MAIL_PENDING = 0
+MAIL_SENT = 1
+MAIL_FAILED = 2
+# Claimed by a task which is sending it.
+MAIL_SENDING = 3
+
+
+class MailBatch(ModelBase):
+    """
+    A message sent to many recipients at once by `send_mass_mail`. Each
+    recipient is spooled as a SpooledMail until delivered.
+    """
+    subject = models.CharField(max_length=255)
+    message = models.TextField()
+    html_message = models.TextField(null=True)
+    from_email = models.CharField(max_length=255)
+
+    objects = UncachedManagerBase()
+
+    class Meta:
+        db_table = 'mail_batches'
+
+
+class SpooledMail(ModelBase):
+    """The delivery state of a MailBatch to one of its recipients."""
+    batch = models.ForeignKey(MailBatch, related_name='mails')
+    recipient = models.CharField(max_length=255)
+    real_email = models.BooleanField(default=False)
+    status = models.PositiveSmallIntegerField(default=MAIL_PENDING,
+                                              db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(default='')
+
+    objects = UncachedManagerBase()
+
+    class Meta:
+        db_table = 'mail_spool'
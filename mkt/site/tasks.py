@@ -2,13 +2,27 @@ import datetime
 
 from django.core.mail import (EmailMessage, EmailMultiAlternatives,
                               get_connection)
+from django.db import transaction
+from django.db.models import F, Q
 
 import commonware.log
 from celeryutils import task
 
+from mkt.site.models import (MAIL_FAILED, MAIL_PENDING, MAIL_SENDING,
+                             MAIL_SENT, MailBatch, SpooledMail)
+
 
 log = commonware.log.getLogger('z.task')
 
+# How many times delivering a spooled mail is attempted before giving up.
+MAIL_MAX_ATTEMPTS = 5
+# How many spooled mails are sent over a single connection.
+MAIL_CHUNK_SIZE = 100
+# How long a chunk of spooled mails stays claimed by the task sending it.
+# Past that, the task is assumed to be dead and the mails can be claimed
+# again.
+MAIL_LEASE = datetime.timedelta(minutes=15)
+
 
 @task
 def send_email(recipient, subject, message, real_email, from_email=None,
@@ -38,6 +52,108 @@ def send_email(recipient, subject, message, real_email, from_email=None,
             return False
 
 
+def _spooled_message(batch, mail, connection):
+    email_class = (EmailMultiAlternatives if batch.html_message
+                   else EmailMessage)
+    message = email_class(batch.subject, batch.message, batch.from_email,
+                          [mail.recipient], connection=connection)
+    if batch.html_message:
+        message.attach_alternative(batch.html_message, 'text/html')
+    return message
+
+
+def _claim_spooled(batch, real_email, after_pk):
+    """
+    Claims the next chunk of mails of `batch` to send, so that other tasks
+    delivering the same batch skip them. Returns them, in order.
+    """
+    now = datetime.datetime.now()
+    with transaction.atomic():
+        mails = list(batch.mails.select_for_update()
+                     .filter(Q(status=MAIL_PENDING) |
+                             Q(status=MAIL_SENDING,
+                               modified__lt=now - MAIL_LEASE),
+                             real_email=real_email, pk__gt=after_pk)
+                     .order_by('pk')[:MAIL_CHUNK_SIZE])
+        SpooledMail.objects.filter(pk__in=[mail.pk for mail in mails]).update(
+            status=MAIL_SENDING, modified=now)
+    return mails
+
+
+def _deliver_spooled(batch, mails, real_email):
+    """
+    Sends `mails` over a single connection and records the outcome of each
+    of them in the spool.
+    """
+    connection = get_connection(None if real_email
+                                else 'mkt.site.mail.FakeEmailBackend')
+    messages = [_spooled_message(batch, mail, connection) for mail in mails]
+    sent, failed = [], []
+    if not real_email:
+        # Fake emails are all saved at once.
+        connection.send_messages(messages)
+        sent = mails
+    else:
+        connection.open()
+        try:
+            for mail, message in zip(mails, messages):
+                try:
+                    message.send()
+                    sent.append(mail)
+                except Exception as e:
+                    log.error('Sending spooled mail %s failed: %s'
+                              % (mail.pk, e))
+                    failed.append((mail, e))
+                    # The connection may be broken, start over with a new
+                    # one for the next messages.
+                    connection.close()
+                    connection.open()
+        finally:
+            connection.close()
+
+    now = datetime.datetime.now()
+    SpooledMail.objects.filter(pk__in=[mail.pk for mail in sent]).update(
+        status=MAIL_SENT, attempts=F('attempts') + 1, error='', modified=now)
+    for mail, e in failed:
+        attempts = mail.attempts + 1
+        SpooledMail.objects.filter(pk=mail.pk).update(
+            status=(MAIL_FAILED if attempts >= MAIL_MAX_ATTEMPTS
+                    else MAIL_PENDING),
+            attempts=attempts, error=unicode(e), modified=now)
+
+
+@task(default_retry_delay=60 * 5, max_retries=MAIL_MAX_ATTEMPTS - 1)
+def deliver_mail_batch(batch_id, **kw):
+    """
+    Delivers the pending mails of a MailBatch, reusing one connection per
+    chunk of recipients. Mails that could not be sent are retried later, up
+    to MAIL_MAX_ATTEMPTS times each.
+
+    Each chunk is claimed before it is sent, several tasks can deliver the
+    same batch without sending a mail twice.
+    """
+    try:
+        batch = MailBatch.objects.get(pk=batch_id)
+    except MailBatch.DoesNotExist:
+        log.error('Mail batch %s does not exist.' % batch_id)
+        return
+
+    pending = batch.mails.filter(status=MAIL_PENDING).order_by('pk')
+    log.info('Delivering %s spooled mails of batch %s.'
+             % (pending.count(), batch_id))
+    for real_email in (False, True):
+        # The mails that fail are pending again, only retry them later.
+        after_pk = 0
+        mails = _claim_spooled(batch, real_email, after_pk)
+        while mails:
+            _deliver_spooled(batch, mails, real_email)
+            after_pk = mails[-1].pk
+            mails = _claim_spooled(batch, real_email, after_pk)
+
+    if pending.exists():
+        deliver_mail_batch.retry(args=[batch_id], kwargs=kw)
+
+
 @task
 def set_modified_on_object(obj, **kw):
     """Sets modified on one object at a time."""
@@ -1,3 +1,4 @@
+import datetime
 import re
 
 from django.conf import settings
@@ -6,13 +7,17 @@ from django.core.mail import EmailMessage
 from django.utils import translation
 
 import mock
-from nose.tools import eq_
+from nose.tools import eq_, ok_
 
 import mkt.users.notifications
 from amo.tests import TestCase
 from mkt.site.fixtures import fixture
-from mkt.site.mail import send_mail, send_html_mail_jinja, _real_email_regexes
-from mkt.site.models import FakeEmail
+from mkt.site.cron import deliver_spooled_mail
+from mkt.site.mail import (send_mail, send_html_mail_jinja, send_mass_mail,
+                           _real_email_regexes)
+from mkt.site.models import (FakeEmail, MAIL_FAILED, MAIL_PENDING,
+                             MAIL_SENDING, MAIL_SENT, MailBatch, SpooledMail)
+from mkt.site.tasks import deliver_mail_batch, MAIL_LEASE, MAIL_MAX_ATTEMPTS
 from mkt.users.models import UserNotification, UserProfile
 from mkt.zadmin.models import set_config
 
@@ -257,3 +262,132 @@ class TestSendMail(TestCase):
                       async=True,
                       max_retries=1,
                       recipient_list=['somebody@mozilla.org'])
+
+
+@mock.patch.object(settings, 'EMAIL_BLACKLIST', ())
+class TestSendMassMail(TestCase):
+    fixtures = fixture('user_999')
+    recipients = ['a@mozilla.org', 'b@mozilla.org', 'c@mozilla.org']
+
+    def test_send_string(self):
+        with self.assertRaises(ValueError):
+            send_mass_mail('subj', 'body', 'f@f.com')
+
+    def test_no_recipients(self):
+        eq_(send_mass_mail('subj', 'body', [None]), None)
+        eq_(MailBatch.objects.count(), 0)
+
+    def test_send(self):
+        batch = send_mass_mail('test\nsubject', 'test body', self.recipients,
+                               from_email='from@mozilla.org')
+        eq_(len(mail.outbox), 3)
+        eq_([msg.to for msg in mail.outbox], [[to] for to in self.recipients])
+        eq_(mail.outbox[0].subject, 'test subject')
+        eq_(mail.outbox[0].body, 'test body')
+        eq_(mail.outbox[0].from_email, 'from@mozilla.org')
+        eq_(list(batch.mails.values_list('status', 'attempts')),
+            [(MAIL_SENT, 1)] * 3)
+
+    def test_html(self):
+        send_mass_mail('subject', 'text', self.recipients[:1],
+                       html_message='<b>html</b>')
+        message = mail.outbox[0].message()
+        eq_(message.get_content_type(), 'multipart/alternative')
+
+    @mock.patch('mkt.site.tasks.get_connection')
+    def test_one_connection(self, get_connection):
+        get_connection.side_effect = mail.get_connection
+        send_mass_mail('subject', 'body', self.recipients)
+        eq_(get_connection.call_count, 1)
+        eq_(len(mail.outbox), 3)
+
+    def test_blacklist(self):
+        with mock.patch.object(settings, 'EMAIL_BLACKLIST',
+                               (self.recipients[0],)):
+            batch = send_mass_mail('subject', 'body', self.recipients)
+        eq_(sorted(batch.mails.values_list('recipient', flat=True)),
+            self.recipients[1:])
+
+    def test_user_setting_unchecked(self):
+        user = UserProfile.objects.get(pk=999)
+        n = mkt.users.notifications.NOTIFICATIONS_BY_SHORT['reply']
+        UserNotification.objects.create(notification_id=n.id, user=user,
+                                        enabled=False)
+        batch = send_mass_mail('subject', 'body',
+                               [user.email] + self.recipients,
+                               perm_setting='reply')
+        eq_(sorted(batch.mails.values_list('recipient', flat=True)),
+            self.recipients)
+
+    @mock.patch.object(settings, 'SEND_REAL_EMAIL', False)
+    def test_fake(self):
+        batch = send_mass_mail('subject', 'test body', self.recipients)
+        eq_(len(mail.outbox), 0)
+        eq_(FakeEmail.objects.count(), 3)
+        ok_(all(m.message.endswith('test body')
+                for m in FakeEmail.objects.all()))
+        eq_(list(batch.mails.values_list('real_email', 'status')),
+            [(False, MAIL_SENT)] * 3)
+
+    @mock.patch('mkt.site.tasks.EmailMessage.send')
+    def test_retry(self, send):
+        send.side_effect = [RuntimeError('uh oh'), 1, 1, 1]
+        batch = send_mass_mail('subject', 'body', self.recipients)
+        eq_(send.call_count, 4)
+        eq_(sorted(batch.mails.values_list('status', 'attempts')),
+            [(MAIL_SENT, 1), (MAIL_SENT, 1), (MAIL_SENT, 2)])
+
+    @mock.patch('mkt.site.tasks.EmailMessage.send')
+    def test_give_up(self, send):
+        send.side_effect = RuntimeError('uh oh')
+        batch = send_mass_mail('subject', 'body', self.recipients[:1])
+        spooled = batch.mails.get()
+        eq_(spooled.status, MAIL_FAILED)
+        eq_(spooled.attempts, MAIL_MAX_ATTEMPTS)
+        eq_(spooled.error, 'uh oh')
+
+    def spool(self, **kw):
+        batch = MailBatch.objects.create(subject='subject', message='body',
+                                         from_email='from@mozilla.org')
+        return SpooledMail.objects.create(batch=batch, real_email=True,
+                                          recipient='a@mozilla.org', **kw)
+
+    def test_claimed_mails_skipped(self):
+        spooled = self.spool(status=MAIL_SENDING)
+        deliver_mail_batch(spooled.batch_id)
+        eq_(len(mail.outbox), 0)
+        eq_(spooled.reload().status, MAIL_SENDING)
+
+    def test_expired_claim(self):
+        spooled = self.spool(status=MAIL_SENDING)
+        SpooledMail.objects.filter(pk=spooled.pk).update(
+            modified=datetime.datetime.now() - MAIL_LEASE * 2)
+        deliver_mail_batch(spooled.batch_id)
+        eq_(len(mail.outbox), 1)
+        eq_(spooled.reload().status, MAIL_SENT)
+
+    @mock.patch('mkt.site.cron.deliver_mail_batch.delay')
+    def test_cron_requeues_expired_claim(self, delay):
+        spooled = self.spool(status=MAIL_SENDING)
+        deliver_spooled_mail()
+        ok_(not delay.called)
+
+        SpooledMail.objects.filter(pk=spooled.pk).update(
+            modified=datetime.datetime.now() - MAIL_LEASE * 2)
+        deliver_spooled_mail()
+        delay.assert_called_with(spooled.batch_id)
+
+    @mock.patch('mkt.site.cron.deliver_mail_batch.delay')
+    def test_cron_requeues_stale(self, delay):
+        batch = MailBatch.objects.create(subject='subject', message='body',
+                                         from_email='from@mozilla.org')
+        spooled = SpooledMail.objects.create(batch=batch,
+                                             recipient='a@mozilla.org')
+        deliver_spooled_mail()
+        ok_(not delay.called)
+
+        SpooledMail.objects.filter(pk=spooled.pk).update(
+            modified=datetime.datetime.now() - datetime.timedelta(hours=2))
+        deliver_spooled_mail()
+        delay.assert_called_with(batch.pk)
+        eq_(spooled.reload().status, MAIL_PENDING)
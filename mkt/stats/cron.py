@@ -7,13 +7,19 @@ from mkt.stats import tasks
 
 
 @cronjobs.register
-def update_monolith_stats(date=None):
-    """Update monolith statistics."""
+def update_monolith_stats(date=None, end=None):
+    """
+    Update monolith statistics.
+
+    Pass an `end` date as well to backfill all the days from `date` to `end`.
+    """
     if date:
         date = datetime.datetime.strptime(date, '%Y-%m-%d').date()
+    if end:
+        end = datetime.datetime.strptime(end, '%Y-%m-%d').date()
     today = date or datetime.date.today()
-    jobs = [{'metric': metric,
-             'date': today} for metric in tasks._get_monolith_jobs(date)]
+    jobs = [{'metric': metric, 'date': today, 'end': end}
+            for metric in tasks._get_monolith_jobs(date)]
 
     ts = [tasks.update_monolith_stats.subtask(kwargs=kw) for kw in jobs]
     TaskSet(ts).apply_async()
@@ -1,6 +1,10 @@
 import json
 import logging
 import datetime
+from functools import partial
+
+from django.db import connection
+from django.db.models import Count
 
 from celeryutils import task
 
@@ -9,6 +13,7 @@ from mkt.constants.regions import REGIONS_CHOICES_SLUG
 from mkt.monolith.models import MonolithRecord
 from mkt.site.decorators import write
 from mkt.ratings.models import Review
+from mkt.versions.models import Version
 from mkt.webapps.models import AddonUser, Webapp
 from mkt.users.models import UserProfile
 
@@ -18,10 +23,10 @@ log = logging.getLogger('z.stats')
 
 @task
 @write
-def update_monolith_stats(metric, date, **kw):
+def update_monolith_stats(metric, date, end=None, **kw):
     log.info('Updating monolith statistics (%s) for (%s)' % (metric, date))
 
-    jobs = _get_monolith_jobs(date)[metric]
+    jobs = _get_monolith_jobs(date, end)[metric]
 
     for job in jobs:
         try:
@@ -32,142 +37,195 @@ def update_monolith_stats(metric, date, **kw):
                 if 'dimensions' in job:
                     value.update(job['dimensions'])
 
-                MonolithRecord.objects.create(recorded=date, key=metric,
+                MonolithRecord.objects.create(recorded=job['date'], key=metric,
                                               value=json.dumps(value))
 
                 log.info('Monolith stats details: (%s) has (%s) for (%s). '
-                         'Value: %s' % (metric, count, date, value))
+                         'Value: %s' % (metric, count, job['date'], value))
             else:
                 log.info('Monolith stat (%s) did not record due to falsy '
-                         'value (%s) for (%s)' % (metric, count, date))
+                         'value (%s) for (%s)' % (metric, count, job['date']))
 
         except Exception as e:
             log.critical('Update of monolith table failed: (%s): %s'
-                         % ([metric, date], e))
+                         % ([metric, job['date']], e))
+
+
+def _column(model, field):
+    """Returns the quoted SQL column of `field` on `model`."""
+    qn = connection.ops.quote_name
+    return '%s.%s' % (qn(model._meta.db_table),
+                      qn(model._meta.get_field(field).column))
+
 
+class _DailyCounts(object):
+    """
+    Counts of the distinct `count` values of a queryset, grouped by the day of
+    the SQL `column` and by `fields`.
+
+    The counts are fetched with a single GROUP BY query, the first time one of
+    them is asked for.
+    """
 
-def _get_monolith_jobs(date=None):
+    def __init__(self, qs, column, fields=(), count='id'):
+        self.qs = qs
+        self.column = column
+        self.fields = fields
+        self.distinct = count
+        self._rows = None
+
+    @property
+    def rows(self):
+        if self._rows is None:
+            self._rows = list(
+                self.qs.extra(select={'day': 'DATE(%s)' % self.column})
+                       .values('day', *self.fields)
+                       .annotate(n=Count(self.distinct, distinct=True))
+                       .order_by())
+        return self._rows
+
+    def count(self, start, end, **filters):
+        """
+        Returns the count for the days from `start` (or the first one if None)
+        to `end` included, for the rows matching `filters`.
+        """
+        return sum(row['n'] for row in self.rows
+                   if (start is None or start <= row['day']) and
+                   row['day'] <= end and
+                   all(row[k] == v for k, v in filters.items()))
+
+
+def _count_in_region(apps, excluded, region, start, end, **filters):
+    """
+    Counts the `apps` not excluded from `region`, `excluded` are the counts of
+    the same apps by excluded region.
+    """
+    return (apps.count(start, end, **filters) -
+            excluded.count(start, end, addonexcludedregion__region=region,
+                           **filters))
+
+
+def _get_monolith_jobs(date=None, end=None):
     """
     Return a dict of Monolith based statistics queries.
 
     The dict is of the form::
 
-        {'<metric_name>': [{'count': <callable>, 'dimensions': <dimensions>}]}
+        {'<metric_name>': [{'count': <callable>, 'date': <date>,
+                            'dimensions': <dimensions>}]}
 
     Where `dimensions` is an optional dict of dimensions we expect to filter on
     via Monolith.
 
-    If a date is specified and applies to the job it will be used.  Otherwise
-    the date will default to today().
+    There is a job per day from `date` to `end` included, which allows
+    backfilling a date range. `date` defaults to today() and `end` to `date`.
+
+    Each metric family is counted with a single GROUP BY query whatever the
+    number of days, regions and types, run by the first `count` called.
     """
     if not date:
         date = datetime.date.today()
+    end = end or date
 
     # If we have a datetime make it a date so H/M/S isn't used.
     if isinstance(date, datetime.datetime):
         date = date.date()
-
-    next_date = date + datetime.timedelta(days=1)
+    if isinstance(end, datetime.datetime):
+        end = end.date()
+
+    next_date = end + datetime.timedelta(days=1)
+    days = [date + datetime.timedelta(days=i)
+            for i in range((end - date).days + 1)]
+
+    def jobs(count, cumulative=False, dimensions=None):
+        """One job per day, counting that day or everything up to it."""
+        daily = []
+        for day in days:
+            job = {'count': partial(count, None if cumulative else day, day),
+                   'date': day}
+            if dimensions:
+                job['dimensions'] = dimensions
+            daily.append(job)
+        return daily
+
+    reviews = _DailyCounts(
+        Review.objects.filter(created__gte=date, created__lt=next_date,
+                              editorreview=0),
+        _column(Review, 'created'))
+    users = _DailyCounts(
+        UserProfile.objects.filter(created__lt=next_date,
+                                   source=amo.LOGIN_SOURCE_MMO_BROWSERID),
+        _column(UserProfile, 'created'))
+    developers = _DailyCounts(
+        AddonUser.objects.filter(user__created__lt=next_date),
+        _column(UserProfile, 'created'), count='user')
+
+    # Apps added and available, by type and by excluded region.
+    types = ('is_packaged', 'premium_type')
+    added = Webapp.objects.filter(created__gte=date, created__lt=next_date)
+    apps_added = _DailyCounts(added, _column(Webapp, 'created'), types)
+    apps_added_excluded = _DailyCounts(
+        added.filter(addonexcludedregion__isnull=False),
+        _column(Webapp, 'created'),
+        types + ('addonexcludedregion__region',))
+
+    available = Webapp.objects.filter(
+        _current_version__reviewed__lt=next_date,
+        status__in=amo.LISTED_STATUSES, disabled_by_user=False)
+    apps_available = _DailyCounts(available, _column(Version, 'reviewed'),
+                                  types)
+    apps_available_excluded = _DailyCounts(
+        available.filter(addonexcludedregion__isnull=False),
+        _column(Version, 'reviewed'),
+        types + ('addonexcludedregion__region',))
 
     stats = {
         # Marketplace reviews.
-        'apps_review_count_new': [{
-            'count': Review.objects.filter(
-                created__range=(date, next_date), editorreview=0).count,
-        }],
+        'apps_review_count_new': jobs(reviews.count),
 
         # New users
-        'mmo_user_count_total': [{
-            'count': UserProfile.objects.filter(
-                created__lt=next_date,
-                source=amo.LOGIN_SOURCE_MMO_BROWSERID).count,
-        }],
-        'mmo_user_count_new': [{
-            'count': UserProfile.objects.filter(
-                created__range=(date, next_date),
-                source=amo.LOGIN_SOURCE_MMO_BROWSERID).count,
-        }],
+        'mmo_user_count_total': jobs(users.count, cumulative=True),
+        'mmo_user_count_new': jobs(users.count),
 
         # New developers.
-        'mmo_developer_count_total': [{
-            'count': AddonUser.objects.filter(
-                user__created__lt=next_date).values('user').distinct().count,
-        }],
+        'mmo_developer_count_total': jobs(developers.count, cumulative=True),
 
         # App counts.
-        'apps_count_new': [{
-            'count': Webapp.objects.filter(
-                created__range=(date, next_date)).count,
-        }],
+        'apps_count_new': jobs(apps_added.count),
     }
 
-    # Add various "Apps Added" for all the dimensions we need.
-    apps = Webapp.objects.filter(created__range=(date, next_date))
-
-    package_counts = []
-    premium_counts = []
-
     # privileged==packaged for our consideration.
     package_types = amo.ADDON_WEBAPP_TYPES.copy()
     package_types.pop(amo.ADDON_WEBAPP_PRIVILEGED)
 
-    for region_slug, region in REGIONS_CHOICES_SLUG:
-        # Apps added by package type and region.
-        for package_type in package_types.values():
-            package_counts.append({
-                'count': (apps
-                          .filter(is_packaged=package_type == 'packaged')
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'package_type': package_type},
-            })
-
-        # Apps added by premium type and region.
-        for premium_type, pt_name in amo.ADDON_PREMIUM_API.items():
-            premium_counts.append({
-                'count': (apps
-                          .filter(premium_type=premium_type)
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'premium_type': pt_name},
-            })
-
-    stats.update({'apps_added_by_package_type': package_counts})
-    stats.update({'apps_added_by_premium_type': premium_counts})
-
-    # Add various "Apps Available" for all the dimensions we need.
-    apps = Webapp.objects.filter(_current_version__reviewed__lt=next_date,
-                                 status__in=amo.LISTED_STATUSES,
-                                 disabled_by_user=False)
-    package_counts = []
-    premium_counts = []
-
-    for region_slug, region in REGIONS_CHOICES_SLUG:
-        # Apps available by package type and region.
-        for package_type in package_types.values():
-            package_counts.append({
-                'count': (apps
-                          .filter(is_packaged=package_type == 'packaged')
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'package_type': package_type},
-            })
-
-        # Apps available by premium type and region.
-        for premium_type, pt_name in amo.ADDON_PREMIUM_API.items():
-            premium_counts.append({
-                'count': (apps
-                          .filter(premium_type=premium_type)
-                          .exclude(addonexcludedregion__region=region.id)
-                          .count),
-                'dimensions': {'region': region_slug,
-                               'premium_type': pt_name},
-            })
-
-    stats.update({'apps_available_by_package_type': package_counts})
-    stats.update({'apps_available_by_premium_type': premium_counts})
+    # Add various "Apps Added" and "Apps Available" for all the dimensions we
+    # need.
+    for name, apps, excluded, cumulative in (
+            ('added', apps_added, apps_added_excluded, False),
+            ('available', apps_available, apps_available_excluded, True)):
+        package_counts = []
+        premium_counts = []
+
+        for region_slug, region in REGIONS_CHOICES_SLUG:
+            # Apps by package type and region.
+            for package_type in package_types.values():
+                package_counts.extend(jobs(
+                    partial(_count_in_region, apps, excluded, region.id,
+                            is_packaged=package_type == 'packaged'),
+                    cumulative=cumulative,
+                    dimensions={'region': region_slug,
+                                'package_type': package_type}))
+
+            # Apps by premium type and region.
+            for premium_type, pt_name in amo.ADDON_PREMIUM_API.items():
+                premium_counts.extend(jobs(
+                    partial(_count_in_region, apps, excluded, region.id,
+                            premium_type=premium_type),
+                    cumulative=cumulative,
+                    dimensions={'region': region_slug,
+                                'premium_type': pt_name}))
+
+        stats['apps_%s_by_package_type' % name] = package_counts
+        stats['apps_%s_by_premium_type' % name] = premium_counts
 
     return stats
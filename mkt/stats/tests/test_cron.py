@@ -120,6 +120,50 @@ class TestMonolithStats(amo.tests.TestCase):
                 'Incorrect count for region %s, premium type %s. '
                 'Got %d, expected %d.' % (r, p, count, expected_count))
 
+    def test_app_counts_fixed_queries(self):
+        app = Webapp.objects.create()
+        app.addonexcludedregion.create(
+            region=dict(REGIONS_CHOICES_SLUG)['br'].id)
+        jobs = tasks._get_monolith_jobs()
+
+        # One query for the apps, one for their excluded regions.
+        with self.assertNumQueries(2):
+            for metric in ('apps_added_by_package_type',
+                           'apps_added_by_premium_type', 'apps_count_new'):
+                for job in jobs[metric]:
+                    job['count']()
+
+    def test_date_range(self):
+        start = datetime.date(2013, 1, 25)
+        end = datetime.date(2013, 1, 27)
+        Webapp.objects.create().update(created=start)
+        Webapp.objects.create().update(
+            created=datetime.datetime(2013, 1, 27, 12, 0))
+        for day in (start, end):
+            p = UserProfile.objects.create(
+                username=str(day), email='%s@example.com' % day,
+                source=amo.LOGIN_SOURCE_MMO_BROWSERID)
+            p.update(created=day)
+
+        jobs = tasks._get_monolith_jobs(start, end)
+        eq_([(job['date'], job['count']()) for job in jobs['apps_count_new']],
+            [(start, 1), (datetime.date(2013, 1, 26), 0), (end, 1)])
+        eq_([job['count']() for job in jobs['mmo_user_count_new']],
+            [1, 0, 1])
+        eq_([job['count']() for job in jobs['mmo_user_count_total']],
+            [1, 1, 2])
+
+    @mock.patch('mkt.stats.tasks.MonolithRecord')
+    def test_date_range_recorded(self, record):
+        start = datetime.date(2013, 1, 25)
+        end = datetime.date(2013, 1, 26)
+        for day in (start, end):
+            Webapp.objects.create().update(created=day)
+
+        tasks.update_monolith_stats('apps_count_new', start, end=end)
+        eq_([c[1]['recorded'] for c in record.objects.create.call_args_list],
+            [start, end])
+
     def test_app_reviews(self):
         addon = Webapp.objects.create()
         user = UserProfile.objects.create(username='foo')
@@ -1,4 +1,5 @@
 import json
+from datetime import date, timedelta
 
 import mock
 import requests
@@ -8,8 +9,10 @@ from rest_framework.reverse import reverse
 from django.conf import settings
 
 import amo
+from lib.metrics import reset_monolith_client
 from mkt.purchase.models import Contribution
 
+from mkt.api.exceptions import ServiceUnavailable
 from mkt.api.tests.test_oauth import RestOAuth
 from mkt.site.fixtures import fixture
 from mkt.stats.views import APP_STATS, STATS, _get_monolith_data
@@ -92,7 +95,9 @@ class TestGlobalStatsResource(GlobalStatsAPITestMixin, RestOAuth):
         res = self.client.get(self.url('apps_added_by_package'), data=data)
         eq_(res.status_code, 200)
         ok_(client.called)
-        eq_(client.call_args[1], {'region': 'br', 'package_type': 'hosted'})
+        # Lines are fetched concurrently, in no particular order.
+        ok_({'region': 'br', 'package_type': 'hosted'} in
+            [c[1] for c in client.call_args_list])
 
     @mock.patch('monolith.client.Client')
     def test_dimensions_default(self, mocked):
@@ -103,7 +108,8 @@ class TestGlobalStatsResource(GlobalStatsAPITestMixin, RestOAuth):
                               data=self.data)
         eq_(res.status_code, 200)
         ok_(client.called)
-        eq_(client.call_args[1], {'region': 'us', 'package_type': 'hosted'})
+        ok_({'region': 'us', 'package_type': 'hosted'} in
+            [c[1] for c in client.call_args_list])
 
     @mock.patch('monolith.client.Client')
     def test_dimensions_default_is_none(self, mocked):
@@ -134,6 +140,72 @@ class TestGlobalStatsResource(GlobalStatsAPITestMixin, RestOAuth):
             '2013-10-10', 'day', {})
         eq_(type(data['objects'][0]['count']), str)
 
+    @mock.patch('monolith.client.Client')
+    def test_lines(self, mocked):
+        client = mock.MagicMock()
+        client.side_effect = lambda *args, **kw: [
+            {'count': 1, 'date': '2013-10-10', 'type': kw['package_type']}]
+        mocked.return_value = client
+
+        data = _get_monolith_data(
+            STATS['apps_added_by_package'], '2013-10-10', '2013-10-10', 'day',
+            {'region': 'us'})
+        eq_(client.call_count, len(amo.ADDON_WEBAPP_TYPES))
+        eq_(sorted(data.keys()), sorted(amo.ADDON_WEBAPP_TYPES.values()))
+        for line_name, objects in data.items():
+            eq_(objects[0]['type'], line_name)
+
+    @mock.patch('monolith.client.Client')
+    def test_cached(self, mocked):
+        client = mock.MagicMock()
+        client.return_value = [{'count': 1.99, 'date': '2013-10-10'}]
+        mocked.return_value = client
+        stat = {'metric': 'foo', 'coerce': {'count': str}}
+
+        data = _get_monolith_data(stat, date(2013, 10, 10),
+                                  date(2013, 10, 11), 'day', {})
+        eq_(client.call_count, 1)
+        eq_(_get_monolith_data(stat, date(2013, 10, 10), date(2013, 10, 11),
+                               'day', {}), data)
+        eq_(client.call_count, 1)
+        eq_(data['objects'][0]['count'], '1.99')
+
+        # Other dimensions are fetched again.
+        _get_monolith_data(stat, date(2013, 10, 10), date(2013, 10, 11),
+                           'day', {'region': 'us'})
+        eq_(client.call_count, 2)
+
+    @mock.patch('monolith.client.Client')
+    def test_cached_monolith_down(self, mocked):
+        mocked.return_value = mock.MagicMock(return_value=[])
+        stat = {'metric': 'foo'}
+        _get_monolith_data(stat, date(2013, 10, 10), date(2013, 10, 11),
+                           'day', {})
+
+        mocked.side_effect = requests.ConnectionError
+        reset_monolith_client()
+        eq_(_get_monolith_data(stat, date(2013, 10, 10), date(2013, 10, 11),
+                               'day', {}), {'objects': []})
+        with self.assertRaises(ServiceUnavailable):
+            _get_monolith_data(stat, date(2013, 10, 10), date(2013, 10, 11),
+                               'day', {'region': 'us'})
+
+    @mock.patch('mkt.stats.views.cache')
+    @mock.patch('monolith.client.Client')
+    def test_cache_timeout(self, mocked, cache):
+        cache.get_many.return_value = {}
+        mocked.return_value = mock.MagicMock()
+        today = date.today()
+
+        _get_monolith_data({'metric': 'foo'}, today - timedelta(days=7),
+                           today - timedelta(days=1), 'day', {})
+        eq_(cache.set_many.call_args[0][1], settings.MONOLITH_CACHE_TIMEOUT)
+
+        _get_monolith_data({'metric': 'foo'}, today - timedelta(days=7),
+                           today, 'day', {})
+        eq_(cache.set_many.call_args[0][1],
+            settings.MONOLITH_CACHE_TIMEOUT_CURRENT)
+
 
 class TestAppStatsResource(StatsAPITestMixin, RestOAuth):
     fixtures = fixture('user_2519')
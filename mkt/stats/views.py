@@ -1,4 +1,10 @@
+import datetime
+import hashlib
+import json
+
 from django import http
+from django.conf import settings
+from django.core.cache import cache
 
 import commonware
 import requests
@@ -9,7 +15,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 import amo
-from lib.metrics import get_monolith_client
+from lib.metrics import get_monolith_client, monolith_map
 from mkt.api.authentication import (RestOAuthAuthentication,
                                     RestSharedSecretAuthentication)
 from mkt.api.authorization import AllowAppOwner, AnyOf, GroupPermission
@@ -145,15 +151,39 @@ APP_STATS_TOTAL = {
 }
 
 
-def _get_monolith_data(stat, start, end, interval, dimensions):
-    # If stat has a 'lines' attribute, it's a multi-line graph. Do a
-    # request for each item in 'lines' and compose them in a single
-    # response.
+def _monolith_cache_key(metric, start, end, interval, dimensions):
+    key = json.dumps([metric, unicode(start), unicode(end), interval,
+                      sorted(dimensions.items())])
+    return 'stats:monolith:%s' % hashlib.md5(key).hexdigest()
+
+
+def _monolith_cache_timeout(end):
+    """
+    Data for date ranges that are over won't change anymore, but the current
+    period is still getting data.
+    """
+    if isinstance(end, datetime.date) and end < datetime.date.today():
+        return settings.MONOLITH_CACHE_TIMEOUT
+    return settings.MONOLITH_CACHE_TIMEOUT_CURRENT
+
+
+def _fetch_monolith_line(args):
+    metric, start, end, interval, dimensions = args
     try:
         client = get_monolith_client()
     except requests.ConnectionError as e:
         log.info('Monolith connection error: {0}'.format(e))
         raise ServiceUnavailable
+    return list(client(metric, start, end, interval, **dimensions))
+
+
+def _get_monolith_data(stat, start, end, interval, dimensions):
+    # If stat has a 'lines' attribute, it's a multi-line graph. Do a
+    # request for each item in 'lines' and compose them in a single
+    # response.
+    #
+    # A ServiceUnavailable raised by `_fetch_monolith_line` when Monolith is
+    # down is raised again here. Cached lines don't need Monolith at all.
 
     def _coerce(data):
         for key, coerce in stat.get('coerce', {}).items():
@@ -162,20 +192,31 @@ def _get_monolith_data(stat, start, end, interval, dimensions):
 
         return data
 
-    try:
-        data = {}
-        if 'lines' in stat:
-            for line_name, line_dimension in stat['lines'].items():
-                dimensions.update(line_dimension)
-                data[line_name] = map(_coerce,
-                                      client(stat['metric'], start, end,
-                                             interval, **dimensions))
-
+    if 'lines' in stat:
+        lines = dict((line_name, dict(dimensions, **line_dimension))
+                     for line_name, line_dimension in stat['lines'].items())
+    else:
+        lines = {'objects': dimensions}
+
+    # Look for cached lines first, then query Monolith for all the others at
+    # the same time.
+    keys = dict((line_name, _monolith_cache_key(stat['metric'], start, end,
+                                                interval, line_dimensions))
+                for line_name, line_dimensions in lines.items())
+    cached = cache.get_many(keys.values())
+    data = {}
+    missing = []
+    for line_name, key in keys.items():
+        if key in cached:
+            data[line_name] = cached[key]
         else:
-            data['objects'] = map(_coerce,
-                                  client(stat['metric'], start, end, interval,
-                                         **dimensions))
+            missing.append(line_name)
 
+    try:
+        results = monolith_map(
+            _fetch_monolith_line,
+            [(stat['metric'], start, end, interval, lines[line_name])
+             for line_name in missing])
     except ValueError as e:
         # This occurs if monolith doesn't have our metric and we get an
         # elasticsearch SearchPhaseExecutionException error.
@@ -183,6 +224,14 @@ def _get_monolith_data(stat, start, end, interval, dimensions):
             stat['metric'], e))
         raise ParseError('Invalid metric at this time. Try again later.')
 
+    timeout = _monolith_cache_timeout(end)
+    cache.set_many(dict((keys[line_name], result) for line_name, result
+                        in zip(missing, results)), timeout)
+    data.update(zip(missing, results))
+
+    for line_name, objects in data.items():
+        data[line_name] = map(_coerce, [dict(obj) for obj in objects])
+
     return data
 
 
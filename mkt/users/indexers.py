@@ -0,0 +1,87 @@
+"""
+Indexer for UserProfile, used by the lookup tool to search for users.
+"""
+from mkt.search.indexers import BaseIndexer
+
+
+# The fields the lookup tool searches on.
+SEARCH_FIELDS = ('username', 'display_name', 'email')
+# All the fields of the document. Saving only other fields doesn't reindex.
+INDEXED_FIELDS = ('id', 'deleted') + SEARCH_FIELDS
+
+
+def get_autocomplete_field():
+    return {
+        'type': 'string',
+        'analyzer': 'exact_lowercase',
+        'fields': {
+            'ngram': {'type': 'string',
+                      'index_analyzer': 'autocomplete',
+                      'search_analyzer': 'lowercase_whitespace'},
+        }
+    }
+
+
+class UserProfileIndexer(BaseIndexer):
+
+    @classmethod
+    def get_model(cls):
+        from mkt.users.models import UserProfile
+        return UserProfile
+
+    @classmethod
+    def get_analysis(cls):
+        """
+        Users are looked up as the support staff types, so on top of the base
+        analysis we index the edge n-grams of every word. This turns a prefix
+        lookup into a simple term match instead of a scan of the whole index.
+        """
+        analysis = super(UserProfileIndexer, cls).get_analysis()
+
+        analysis['filter']['autocomplete_filter'] = {
+            'type': 'edge_ngram',
+            'min_gram': 1,
+            'max_gram': 50,
+        }
+        analysis['analyzer']['autocomplete'] = {
+            'type': 'custom',
+            'tokenizer': 'whitespace',
+            'filter': ['lowercase', 'autocomplete_filter'],
+        }
+        analysis['analyzer']['lowercase_whitespace'] = {
+            'type': 'custom',
+            'tokenizer': 'whitespace',
+            'filter': ['lowercase'],
+        }
+        return analysis
+
+    @classmethod
+    def get_mapping(cls):
+        doc_type = cls.get_mapping_type_name()
+
+        mapping = {
+            doc_type: {
+                '_all': {'enabled': False},
+                'properties': {
+                    'id': {'type': 'long'},
+                    'deleted': {'type': 'boolean'},
+                }
+            }
+        }
+        for field in SEARCH_FIELDS:
+            mapping[doc_type]['properties'][field] = get_autocomplete_field()
+
+        return mapping
+
+    @classmethod
+    def extract_document(cls, pk=None, obj=None):
+        if obj is None:
+            obj = cls.get_model().objects.get(pk=pk)
+
+        return {
+            'id': obj.id,
+            'deleted': obj.deleted,
+            'display_name': obj.display_name,
+            'email': obj.email,
+            'username': obj.username,
+        }
@@ -8,6 +8,7 @@ from django.contrib.auth.models import AbstractBaseUser
 from django.core import validators
 from django.core.urlresolvers import reverse
 from django.db import models
+from django.dispatch import receiver
 from django.utils import translation
 from django.utils.encoding import smart_unicode
 from django.utils.functional import lazy
@@ -102,6 +103,11 @@ class UserProfile(OnChangeMixin, ModelBase, AbstractBaseUser):
     def __unicode__(self):
         return u'%s: %s' % (self.id, self.display_name or self.username)
 
+    @classmethod
+    def get_indexer(cls):
+        from mkt.users.indexers import UserProfileIndexer
+        return UserProfileIndexer
+
     @property
     def is_superuser(self):
         return self.groups.filter(rules='*:*').exists()
@@ -186,7 +192,9 @@ class UserProfile(OnChangeMixin, ModelBase, AbstractBaseUser):
             if self.failed_login_attempts < 16777216:
                 self.failed_login_attempts += 1
 
-        self.save()
+        self.save(update_fields=['last_login_attempt', 'last_login_attempt_ip',
+                                 'last_login_ip', 'failed_login_attempts',
+                                 'modified'])
 
     def purchase_ids(self):
         """
@@ -230,6 +238,27 @@ models.signals.pre_save.connect(save_signal, sender=UserProfile,
                                 dispatch_uid='userprofile_translations')
 
 
+# Maintain ElasticSearch index.
+@receiver(models.signals.post_save, sender=UserProfile,
+          dispatch_uid='userprofile.search.index')
+def update_search_index(sender, instance, **kw):
+    from mkt.users.indexers import INDEXED_FIELDS
+    if kw.get('raw'):
+        return
+    # Saves of some other fields only, e.g. on every login, don't reindex.
+    update_fields = kw.get('update_fields')
+    if update_fields and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    instance.get_indexer().index_ids([instance.id])
+
+
+# Delete ElasticSearch index on delete.
+@receiver(models.signals.post_delete, sender=UserProfile,
+          dispatch_uid='userprofile.search.unindex')
+def delete_search_index(sender, instance, **kw):
+    instance.get_indexer().unindex(instance.id)
+
+
 class UserNotification(ModelBase):
     user = models.ForeignKey(UserProfile, related_name='notifications')
     notification_id = models.IntegerField()
@@ -0,0 +1,63 @@
+from mock import patch
+from nose.tools import eq_
+
+import amo.tests
+from mkt.site.fixtures import fixture
+from mkt.users.indexers import UserProfileIndexer
+from mkt.users.models import UserProfile
+
+
+class TestUserProfileIndexer(amo.tests.TestCase):
+    fixtures = fixture('user_999')
+
+    def setUp(self):
+        self.user = UserProfile.objects.get(pk=999)
+        self.indexer = UserProfileIndexer
+
+    def test_model(self):
+        eq_(self.indexer.get_model(), UserProfile)
+        eq_(self.user.get_indexer(), UserProfileIndexer)
+
+    def test_mapping(self):
+        mapping = self.indexer.get_mapping()
+        props = mapping[self.indexer.get_mapping_type_name()]['properties']
+        for field in ('username', 'display_name', 'email'):
+            eq_(props[field]['fields']['ngram']['index_analyzer'],
+                'autocomplete')
+
+    def test_analysis(self):
+        analysis = self.indexer.get_analysis()
+        assert 'autocomplete' in analysis['analyzer']
+        assert 'lowercase_whitespace' in analysis['analyzer']
+        assert 'autocomplete_filter' in analysis['filter']
+
+    def test_extract(self):
+        doc = self.indexer.extract_document(self.user.pk, self.user)
+        eq_(doc, {
+            'id': self.user.pk,
+            'deleted': False,
+            'display_name': self.user.display_name,
+            'email': 'regular@mozilla.com',
+            'username': self.user.username,
+        })
+
+    @patch('mkt.search.indexers.BaseIndexer.index_ids')
+    def test_index_on_save(self, index_ids):
+        self.user.update(display_name='Kumar')
+        index_ids.assert_called_with([self.user.pk])
+
+    @patch('mkt.search.indexers.BaseIndexer.index_ids')
+    def test_index_on_create(self, index_ids):
+        user = UserProfile.objects.create(email='new@mozilla.com')
+        index_ids.assert_called_with([user.pk])
+
+    @patch('mkt.search.indexers.BaseIndexer.index_ids')
+    def test_index_on_plain_save(self, index_ids):
+        self.user.save()
+        index_ids.assert_called_with([self.user.pk])
+
+    @patch('mkt.search.indexers.BaseIndexer.index_ids')
+    def test_no_index_on_login(self, index_ids):
+        self.user.log_login_attempt(True)
+        self.user.save(update_fields=['last_login'])
+        assert not index_ids.called
@@ -10,18 +10,17 @@ from django.db.models import Q
 
 import commonware.log
 import cronjobs
-from celery import chord
 
 import amo
 from amo.utils import chunked, walkfiles
 from mkt.api.models import Nonce
 from mkt.developers.models import ActivityLog
-from mkt.files.models import File, FileUpload
+from mkt.files.models import CachedValidation, File, FileUpload
 from mkt.site.decorators import write
 
-from .models import Installed, Webapp
-from .tasks import (delete_logs, dump_user_installs, update_downloads,
-                    update_trending, zip_users)
+from .models import Webapp
+from .tasks import (delete_logs, export_user_installs, update_downloads,
+                    update_trending)
 
 
 log = commonware.log.getLogger('z.cron')
@@ -151,23 +150,7 @@ def dump_user_installs_cron():
     """
     Sets up tasks to do user install dumps.
     """
-    chunk_size = 100
-    # Get valid users to dump.
-    user_ids = set(Installed.objects.filter(user__enable_recommendations=True)
-                   .values_list('user', flat=True))
-
-    # Remove old dump data before running.
-    user_dir = os.path.join(settings.DUMPED_USERS_PATH, 'users')
-    if os.path.exists(user_dir):
-        shutil.rmtree(user_dir)
-
-    grouping = []
-    for chunk in chunked(user_ids, chunk_size):
-        grouping.append(dump_user_installs.subtask(args=[chunk]))
-
-    post = zip_users.subtask(immutable=True)
-    ts = chord(grouping, post)
-    ts.apply_async()
+    export_user_installs.delay()
 
 
 @cronjobs.register
@@ -217,6 +200,9 @@ def mkt_gc(**kw):
     # clearing those that are more than 1 day old.
     Nonce.objects.filter(created__lt=days_ago(1)).delete()
 
+    # Validation results are cached for 90 days.
+    CachedValidation.objects.filter(created__lt=days_ago(90)).delete()
+
     # Delete the dump apps over 30 days.
     _remove_stale_files(settings.DUMPED_APPS_PATH,
                         settings.DUMPED_APPS_DAYS_DELETE,
@@ -234,6 +220,10 @@ def mkt_gc(**kw):
     _remove_stale_files(os.path.join(settings.TMP_PATH, 'icon'),
                         settings.TMP_PATH_DAYS_DELETE,
                         'Deleting TMP_PATH file: {0}')
+    if os.path.isdir(settings.IMAGE_CACHE_PATH):
+        _remove_stale_files(settings.IMAGE_CACHE_PATH,
+                            settings.TMP_PATH_DAYS_DELETE,
+                            'Deleting cached image: {0}')
 
     # Delete stale FileUploads.
     for fu in FileUpload.objects.filter(created__lte=days_ago(90)):
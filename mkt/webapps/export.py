@@ -0,0 +1,279 @@
+"""
+Streaming export of the public data dumps.
+
+The objects to export are split in chunks, serialized in parallel by the
+`export_chunk` task into gzipped NDJSON parts, which `finish_export` then
+streams into the final tarball and NDJSON files. No file is written per
+object.
+
+Exports can be incremental: only the objects modified since the previous
+export are serialized, and the objects that are gone since then are listed
+as tombstones.
+"""
+import datetime
+import gzip
+import json
+import os
+import StringIO
+import tarfile
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import Q
+from django.test.client import RequestFactory
+
+import pytz
+
+from amo.utils import JSONEncoder
+from mkt.constants.regions import RESTOFWORLD
+from mkt.users.models import UserProfile
+from mkt.webapps.models import Installed, Webapp
+
+
+# Where the state of the last export is kept, in the export root.
+EXPORT_STATE_FILE = 'export-state.json'
+
+
+def export_request():
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    request.REGION = RESTOFWORLD
+    return request
+
+
+class BaseExporter(object):
+    """
+    Subclasses define which objects of a `kind` are exported, and how they
+    are serialized.
+    """
+    kind = None
+
+    def get_ids(self):
+        """The ids of all the objects to export, in order."""
+        raise NotImplementedError
+
+    def get_changed_ids(self, since):
+        """The ids of the objects to export modified since `since`."""
+        raise NotImplementedError
+
+    def get_records(self, ids):
+        """Yields a (path, data) tuple for each object of `ids`."""
+        raise NotImplementedError
+
+    def tombstone(self, pk):
+        return {'id': pk, 'deleted': True}
+
+
+class AppExporter(BaseExporter):
+    kind = 'apps'
+
+    def get_ids(self):
+        return (Webapp.objects.visible().no_cache().order_by('pk')
+                .values_list('pk', flat=True))
+
+    def get_changed_ids(self, since):
+        return self.get_ids().filter(modified__gte=since)
+
+    def get_records(self, ids):
+        from mkt.webapps.serializers import AppSerializer
+        context = {'request': export_request()}
+        for app in Webapp.objects.no_cache().filter(pk__in=ids):
+            path = os.path.join('apps', str(app.pk / 1000),
+                                '%s.json' % app.pk)
+            yield path, AppSerializer(app, context=context).data
+
+
+class CollectionExporter(BaseExporter):
+    kind = 'collections'
+
+    def get_ids(self):
+        from mkt.collections.models import Collection
+        return (Collection.public.no_cache().order_by('pk')
+                .values_list('pk', flat=True))
+
+    def get_changed_ids(self, since):
+        return self.get_ids().filter(modified__gte=since)
+
+    def get_records(self, ids):
+        from mkt.collections.models import Collection
+        from mkt.collections.tasks import collection_data, object_path
+        for collection in Collection.public.no_cache().filter(pk__in=ids):
+            yield (os.path.join('collections', object_path(collection)),
+                   collection_data(collection))
+
+
+def user_installs_data(user):
+    """The apps installed by `user`, for the recommendations dump."""
+    installed = []
+    zone = pytz.timezone(settings.TIME_ZONE)
+    for install in user.installed_set.all():
+        try:
+            app = install.addon
+        except Webapp.DoesNotExist:
+            continue
+
+        installed.append({
+            'id': app.id,
+            'slug': app.app_slug,
+            'installed': pytz.utc.normalize(
+                zone.localize(install.created)).strftime(
+                    '%Y-%m-%dT%H:%M:%S')
+        })
+
+    return {
+        'user': user.recommendation_hash,
+        'region': user.region,
+        'lang': user.lang,
+        'installed_apps': installed,
+    }
+
+
+class UserInstallsExporter(BaseExporter):
+    """
+    The installed apps of the users who allow recommendations. Users are
+    only identified by their recommendation hash.
+
+    Incremental exports pick up users who installed apps or changed their
+    settings since the last export, but not uninstalls.
+    """
+    kind = 'users'
+
+    def installs(self):
+        return Installed.objects.filter(user__enable_recommendations=True)
+
+    def get_ids(self):
+        return sorted(set(self.installs().values_list('user', flat=True)))
+
+    def get_changed_ids(self, since):
+        return sorted(set(self.installs()
+                          .filter(Q(created__gte=since) |
+                                  Q(user__modified__gte=since))
+                          .values_list('user', flat=True)))
+
+    def get_records(self, ids):
+        for user in UserProfile.objects.filter(enable_recommendations=True,
+                                               id__in=ids):
+            hash = user.recommendation_hash
+            yield (os.path.join('users', hash[0], '%s.json' % hash),
+                   user_installs_data(user))
+
+    def tombstone(self, pk):
+        return {'user': UserProfile(id=pk).recommendation_hash,
+                'deleted': True}
+
+
+EXPORTERS = dict((exporter.kind, exporter) for exporter in
+                 (AppExporter(), CollectionExporter(),
+                  UserInstallsExporter()))
+
+
+def write_part(kind, ids, filename):
+    """
+    Serializes the objects of `ids` into the gzipped part `filename`, one
+    "<path>\\t<json>" line per object. Returns the number of objects and the
+    time it took.
+    """
+    start = time.time()
+    count = 0
+    with closing(gzip.open(filename, 'wb')) as part:
+        for path, data in EXPORTERS[kind].get_records(ids):
+            part.write('%s\t%s\n' % (path, json.dumps(data, cls=JSONEncoder)))
+            count += 1
+    return count, time.time() - start
+
+
+def read_part(filename):
+    """Yields the (path, json) tuples of a part."""
+    with closing(gzip.open(filename, 'rb')) as part:
+        for line in part:
+            path, content = line.rstrip('\n').split('\t', 1)
+            yield path, content
+
+
+def load_state(root):
+    try:
+        with open(os.path.join(root, EXPORT_STATE_FILE)) as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def save_state(root, state):
+    filename = os.path.join(root, EXPORT_STATE_FILE)
+    with open(filename + '.tmp', 'w') as f:
+        json.dump(state, f)
+    os.rename(filename + '.tmp', filename)
+
+
+def get_since(state):
+    if state and state.get('started'):
+        return datetime.datetime.fromtimestamp(state['started'])
+    return None
+
+
+class ExportWriter(object):
+    """
+    Streams the exported objects into a gzipped tarball, with one JSON file
+    per object, and into one gzipped NDJSON file per kind, with one line per
+    object.
+    """
+
+    def __init__(self, target_dir, name, formats):
+        if not os.path.exists(target_dir):
+            os.makedirs(target_dir)
+        self.target_dir = target_dir
+        self.name = name
+        self.files = []
+        self.tarball = None
+        self.ndjson = {} if 'ndjson' in formats else None
+        self.mtime = time.time()
+        if 'tar' in formats:
+            filename = os.path.join(target_dir, name + '.tgz')
+            self.tarball = tarfile.open(filename, 'w:gz')
+            self.files.append(filename)
+
+    def _add_tar(self, path, content):
+        info = tarfile.TarInfo(path)
+        info.size = len(content)
+        info.mtime = self.mtime
+        self.tarball.addfile(info, StringIO.StringIO(content))
+
+    def _add_ndjson(self, kind, line):
+        if kind not in self.ndjson:
+            filename = os.path.join(self.target_dir, '%s-%s.ndjson.gz'
+                                    % (self.name, kind))
+            self.ndjson[kind] = gzip.open(filename, 'wb')
+            self.files.append(filename)
+        self.ndjson[kind].write(line + '\n')
+
+    def add(self, kind, path, content):
+        """Adds the JSON `content` of an object of `kind` at `path`."""
+        if self.tarball:
+            self._add_tar(path, content)
+        if self.ndjson is not None:
+            self._add_ndjson(kind, content)
+
+    def add_tombstones(self, kind, tombstones):
+        """
+        Adds the objects of `kind` deleted since the previous export, as a
+        single deleted.json file in the tarball.
+        """
+        if self.tarball:
+            self._add_tar(os.path.join(kind, 'deleted.json'),
+                          json.dumps(tombstones))
+        if self.ndjson is not None:
+            for tombstone in tombstones:
+                self._add_ndjson(kind, json.dumps(tombstone))
+
+    def add_file(self, filename, arcname):
+        if self.tarball:
+            self.tarball.add(filename, arcname=arcname)
+
+    def close(self):
+        if self.tarball:
+            self.tarball.close()
+        for ndjson in (self.ndjson or {}).values():
+            ndjson.close()
+        return self.files
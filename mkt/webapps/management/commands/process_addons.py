@@ -8,12 +8,10 @@ from celery import chord, group
 import amo
 from amo.utils import chunked
 from mkt.webapps.models import Webapp
-from mkt.webapps.tasks import (add_uuids, clean_apps, dump_apps,
-                               fix_missing_icons, import_manifests,
+from mkt.webapps.tasks import (add_uuids, fix_missing_icons, import_manifests,
                                populate_is_offline,
                                regenerate_icons_and_thumbnails,
-                               update_manifests, update_supported_locales,
-                               zip_apps)
+                               update_manifests, update_supported_locales)
 
 
 tasks = {
@@ -30,10 +28,6 @@ tasks = {
         'qs': [Q(disabled_by_user=False,
                  status__in=[amo.STATUS_PENDING, amo.STATUS_PUBLIC,
                              amo.STATUS_APPROVED])]},
-    'dump_apps': {'method': dump_apps,
-                  'qs': [Q(status=amo.STATUS_PUBLIC, disabled_by_user=False)],
-                  'pre': clean_apps,
-                  'post': zip_apps},
     'fix_missing_icons': {'method': fix_missing_icons,
                           'qs': [Q(status__in=[amo.STATUS_PENDING,
                                                amo.STATUS_PUBLIC,
@@ -23,7 +23,6 @@ from django.utils.translation import trans_real as translation
 import caching.base as caching
 import commonware.log
 import json_field
-from cache_nuggets.lib import memoize, memoize_key
 from jinja2.filters import do_dictsort
 from tower import ugettext as _
 from tower import ugettext_lazy as _lazy
@@ -35,6 +34,7 @@ from amo.utils import (JSONEncoder, slugify, smart_path, sorted_groupby,
 from lib.crypto import packaged
 from lib.iarc.client import get_iarc_client
 from lib.iarc.utils import get_iarc_app_title, render_xml
+from lib.post_request_task.task import call_after_request
 from lib.utils import static_url
 from mkt.access import acl
 from mkt.constants import APP_FEATURES, apps, iarc_mappings
@@ -220,6 +220,59 @@ class AddonUser(caching.CachingMixin, models.Model):
         unique_together = (('addon', 'user'), )
 
 
+# How long, in seconds, the apps of an author are cached for. Saving or
+# deleting one of their AddonUser rows invalidates the cache.
+AUTHOR_ROLES_TIMEOUT = 60 * 60
+
+# Bumped when AddonUser rows are saved or deleted in this process, to drop
+# the roles kept on user objects.
+_author_roles_generation = 0
+
+
+def author_roles_key(user_id):
+    return 'webapps:author_roles:%s' % user_id
+
+
+def get_author_roles(user):
+    """
+    Returns an {app id: role} dict of all the apps `user` is an author of.
+
+    The dict is cached, and kept on the user object so that all the checks
+    made during a request, e.g. for every app of a listing, only fetch it
+    once.
+    """
+    if user is None or user.is_anonymous():
+        return {}
+    generation, roles = getattr(user, '_author_roles', (None, None))
+    if generation != _author_roles_generation:
+        key = author_roles_key(user.pk)
+        roles = cache.get(key)
+        if roles is None:
+            roles = dict(AddonUser.objects.no_cache().filter(user=user)
+                                  .values_list('addon_id', 'role'))
+            cache.set(key, roles, AUTHOR_ROLES_TIMEOUT)
+        user._author_roles = (_author_roles_generation, roles)
+    return roles
+
+
+@receiver(models.signals.post_save, sender=AddonUser,
+          dispatch_uid='addonuser.post_save.author_roles')
+@receiver(models.signals.post_delete, sender=AddonUser,
+          dispatch_uid='addonuser.post_delete.author_roles')
+def invalidate_author_roles(sender, instance, **kw):
+    user_ids = tuple(set(pk for pk in (instance.user_id,
+                                       instance._original_user_id) if pk))
+    _invalidate_author_roles(*user_ids)
+    # Other processes may cache the roles again before the commit.
+    call_after_request(_invalidate_author_roles, *user_ids)
+
+
+def _invalidate_author_roles(*user_ids):
+    global _author_roles_generation
+    _author_roles_generation += 1
+    cache.delete_many([author_roles_key(pk) for pk in user_ids])
+
+
 class Preview(ModelBase):
     addon = models.ForeignKey('Webapp', related_name='previews')
     filetype = models.CharField(max_length=25)
@@ -811,12 +864,10 @@ class Webapp(UUIDModelMixin, OnChangeMixin, ModelBase):
         ``roles`` should be a list of valid roles (see amo.AUTHOR_ROLE_*). If
         not specified, has_author will return true if the user has any role.
         """
-        if user is None or user.is_anonymous():
+        role = get_author_roles(user).get(self.pk)
+        if role is None:
             return False
-        if roles is None:
-            roles = dict(amo.AUTHOR_CHOICES).keys()
-        return AddonUser.objects.filter(addon=self, user=user,
-                                        role__in=roles).exists()
+        return roles is None or role in roles
 
     @property
     def thumbnail_url(self):
@@ -962,7 +1013,8 @@ class Webapp(UUIDModelMixin, OnChangeMixin, ModelBase):
     def has_installed(self, user):
         if not user or not isinstance(user, UserProfile):
             return False
-        return self.installed.filter(user=user).exists()
+        return any(app_id == self.pk
+                   for app_id, install_type in get_installed(user))
 
     @amo.cached_property
     def upsold(self):
@@ -2132,8 +2184,12 @@ class Webapp(UUIDModelMixin, OnChangeMixin, ModelBase):
         if not created:
             ri.update(**create_kwargs)
 
-    def set_iarc_storefront_data(self, disable=False):
-        """Send app data to IARC for them to verify."""
+    def set_iarc_storefront_data(self, disable=False, client=None):
+        """
+        Send app data to IARC for them to verify.
+
+        Pass an IARC `client` to reuse it when sending data for many apps.
+        """
         try:
             iarc_info = self.iarc_info
         except IARCInfo.DoesNotExist:
@@ -2159,8 +2215,9 @@ class Webapp(UUIDModelMixin, OnChangeMixin, ModelBase):
 
         log.debug('Calling SET_STOREFRONT_DATA for app:%s' % self.id)
 
+        content_ratings = list(self.content_ratings.all())
         xmls = []
-        for cr in self.content_ratings.all():
+        for cr in content_ratings:
             xmls.append(render_xml('set_storefront_data.xml', {
                 'app_url': self.get_url_path(),
                 'submission_id': iarc_info.submission_id,
@@ -2176,8 +2233,10 @@ class Webapp(UUIDModelMixin, OnChangeMixin, ModelBase):
                     self.rating_interactives.iarc_deserialize(),
             }))
 
-        for xml in xmls:
-            r = get_iarc_client('services').Set_Storefront_Data(XMLString=xml)
+        client = client or get_iarc_client('services')
+        responses = client.call_many('Set_Storefront_Data',
+                                     [{'XMLString': xml} for xml in xmls])
+        for cr, r in zip(content_ratings, responses):
             log.debug('IARC result app:%s, rating_body:%s: %s' % (
                 self.id, cr.get_body().iarc_name, r))
 
@@ -2385,6 +2444,71 @@ def add_uuid(sender, **kw):
             install.save()
 
 
+# How long, in seconds, the apps installed by a user are cached for. Saving
+# or deleting one of their Installed rows updates the cache in place.
+INSTALLED_TIMEOUT = 60 * 60
+
+
+def installed_key(user_id):
+    return 'webapps:installed:%s' % user_id
+
+
+def get_installed(user):
+    """Returns the set of (app id, install type) installed by `user`."""
+    key = installed_key(user.pk)
+    installed = cache.get(key)
+    if installed is None:
+        installed = set(Installed.objects.no_cache().filter(user=user)
+                                 .values_list('addon_id', 'install_type'))
+        cache.set(key, installed, INSTALLED_TIMEOUT)
+    return installed
+
+
+@receiver(models.signals.post_save, sender=Installed,
+          dispatch_uid='installed.post_save.update')
+@receiver(models.signals.post_delete, sender=Installed,
+          dispatch_uid='installed.post_delete.update')
+def update_installed(sender, instance, **kw):
+    """
+    Adds or removes an install from the cached set of its user, if it is
+    cached: a new install doesn't reload all the installs of the user.
+
+    New installs are only added after the request, once committed. Removed
+    installs are discarded right away too: missing from the set, they are
+    only looked up again.
+    """
+    install = (instance.addon_id, instance.install_type)
+    if 'created' in kw:
+        call_after_request(_change_installed, instance.user_id, install,
+                           True)
+    else:
+        _change_installed(instance.user_id, install, False)
+        call_after_request(_change_installed, instance.user_id, install,
+                           False)
+
+
+def _change_installed(user_id, install, added):
+    key = installed_key(user_id)
+    if cache.get(key) is None:
+        return
+    lock_key = 'webapps:installed:lock:%s' % user_id
+    if not cache.add(lock_key, 1, 10):
+        # Someone else is changing it, rather than losing a change drop it.
+        cache.delete(key)
+        return
+    try:
+        installed = cache.get(key)
+        if installed is None:
+            return
+        if added:
+            installed.add(install)
+        else:
+            installed.discard(install)
+        cache.set(key, installed, INSTALLED_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+
 class AddonExcludedRegion(ModelBase):
     """
     Apps are listed in all regions by default.
@@ -2398,6 +2522,11 @@ class AddonExcludedRegion(ModelBase):
         db_table = 'addons_excluded_regions'
         unique_together = ('addon', 'region')
 
+    def __init__(self, *args, **kw):
+        super(AddonExcludedRegion, self).__init__(*args, **kw)
+        # To update the region exclusions when the region changes.
+        self._initial_region = self.region
+
     def __unicode__(self):
         region = self.get_region()
         return u'%s: %s' % (self.addon, region.slug if region else None)
@@ -2406,38 +2535,133 @@ class AddonExcludedRegion(ModelBase):
         return mkt.regions.REGIONS_CHOICES_ID_DICT.get(self.region)
 
 
-@memoize(prefix='get_excluded_in')
+# How long the exclusions of a region are kept in the cache. They are
+# invalidated on every change, this only bounds how long a stale set lasts.
+REGION_EXCLUSIONS_TIMEOUT = 60 * 60
+
+
+class RegionExclusions(object):
+    """
+    An index of the ids of the apps excluded from each region, by an
+    AddonExcludedRegion or by Geodata flags.
+
+    The set of a region is built from the database on the first lookup and
+    kept in the cache. Changes to AddonExcludedRegion and Geodata that
+    exclude or include an app drop the set of the region, again once the
+    change is committed, and bump a version stamp. Processes keep a local
+    copy of the sets until the stamp changes.
+    """
+    version_key = 'region-exclusions:version'
+
+    def __init__(self):
+        # Region id to a (version, frozenset of app ids) tuple.
+        self.local = {}
+
+    def key(self, region_id):
+        return 'region-exclusions:%s' % region_id
+
+    def shared_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            version = uuid.uuid4().hex
+            if not cache.add(self.version_key, version):
+                version = cache.get(self.version_key) or version
+        return version
+
+    def bump(self):
+        cache.set(self.version_key, uuid.uuid4().hex)
+
+    def querysets(self, region_id):
+        """
+        Returns the querysets of AddonExcludedRegion and Geodata excluding
+        apps from a region. The Geodata one is None if no flag applies to
+        the region.
+        """
+        aers = AddonExcludedRegion.objects.no_cache().filter(region=region_id)
+
+        # For pre-IARC unrated games in Brazil/Germany.
+        geodata_qs = Q()
+        region = parse_region(region_id)
+        if region in (mkt.regions.BR, mkt.regions.DE):
+            geodata_qs |= Q(**{'region_%s_iarc_exclude' % region.slug: True})
+        # For USK_RATING_REFUSED apps in Germany.
+        if region == mkt.regions.DE:
+            geodata_qs |= Q(**{'region_de_usk_exclude': True})
+
+        geodata = None
+        if geodata_qs:
+            geodata = Geodata.objects.no_cache().filter(geodata_qs)
+        return aers, geodata
+
+    def build(self, region_id):
+        aers, geodata = self.querysets(region_id)
+        ids = set(aers.values_list('addon', flat=True))
+        if geodata is not None:
+            ids.update(geodata.values_list('addon', flat=True))
+        return ids
+
+    def get(self, region_id):
+        """Returns the frozenset of app ids excluded from a region."""
+        version = self.shared_version()
+        local = self.local.get(region_id)
+        if local and local[0] == version:
+            return local[1]
+
+        ids = cache.get(self.key(region_id))
+        if ids is None:
+            ids = self.build(region_id)
+            cache.set(self.key(region_id), ids, REGION_EXCLUSIONS_TIMEOUT)
+        ids = frozenset(ids)
+        self.local[region_id] = (version, ids)
+        return ids
+
+    def invalidate(self, region_id):
+        """Drops the set of a region, to be rebuilt on the next lookup."""
+        cache.delete(self.key(region_id))
+        self.bump()
+
+    def update(self, app_id, region_id):
+        """
+        Invalidates the set of a region unless it already says whether an
+        app is excluded from it. Until the change is committed, other
+        processes can still cache the previous set: the set is invalidated
+        again after the request.
+        """
+        ids = cache.get(self.key(region_id))
+        if ids is not None:
+            aers, geodata = self.querysets(region_id)
+            excluded = (aers.filter(addon=app_id).exists() or
+                        (geodata is not None and
+                         geodata.filter(addon=app_id).exists()))
+            if (app_id in ids) == excluded:
+                return
+        self.invalidate(region_id)
+        call_after_request(self.invalidate, region_id)
+
+
+region_exclusions = RegionExclusions()
+
+
 def get_excluded_in(region_id):
     """
     Return IDs of Webapp objects excluded from a particular region or excluded
     due to Geodata flags.
     """
-    aers = list(AddonExcludedRegion.objects.filter(region=region_id)
-                .values_list('addon', flat=True))
-
-    # For pre-IARC unrated games in Brazil/Germany.
-    geodata_qs = Q()
-    region = parse_region(region_id)
-    if region in (mkt.regions.BR, mkt.regions.DE):
-        geodata_qs |= Q(**{'region_%s_iarc_exclude' % region.slug: True})
-    # For USK_RATING_REFUSED apps in Germany.
-    if region == mkt.regions.DE:
-        geodata_qs |= Q(**{'region_de_usk_exclude': True})
-
-    geodata_exclusions = []
-    if geodata_qs:
-        geodata_exclusions = list(Geodata.objects.filter(geodata_qs)
-                                  .values_list('addon', flat=True))
-    return set(aers + geodata_exclusions)
+    return region_exclusions.get(region_id)
 
 
 @receiver(models.signals.post_save, sender=AddonExcludedRegion,
-          dispatch_uid='clean_memoized_exclusions')
-def clean_memoized_exclusions(sender, **kw):
-    if not kw.get('raw'):
-        for k in mkt.regions.ALL_REGION_IDS:
-            cache.delete_many([memoize_key('get_excluded_in', k)
-                               for k in mkt.regions.ALL_REGION_IDS])
+          dispatch_uid='update_region_exclusions')
+@receiver(models.signals.post_delete, sender=AddonExcludedRegion,
+          dispatch_uid='delete_region_exclusions')
+def update_region_exclusions(sender, instance, **kw):
+    if kw.get('raw'):
+        return
+    region_exclusions.update(instance.addon_id, instance.region)
+    # The app isn't excluded anymore from the region the row was moved from.
+    if instance._initial_region not in (None, instance.region):
+        region_exclusions.update(instance.addon_id, instance._initial_region)
+    instance._initial_region = instance.region
 
 
 class IARCInfo(ModelBase):
@@ -2820,3 +3044,14 @@ for region in (mkt.regions.BR, mkt.regions.DE):
 # Save geodata translations when a Geodata instance is saved.
 models.signals.pre_save.connect(save_signal, sender=Geodata,
                                 dispatch_uid='geodata_translations')
+
+
+@receiver(models.signals.post_save, sender=Geodata,
+          dispatch_uid='geodata_region_exclusions')
+@receiver(models.signals.post_delete, sender=Geodata,
+          dispatch_uid='delete_geodata_region_exclusions')
+def update_geodata_region_exclusions(sender, instance, **kw):
+    if not kw.get('raw'):
+        # Only these regions have Geodata exclusion flags.
+        for region in (mkt.regions.BR, mkt.regions.DE):
+            region_exclusions.update(instance.addon_id, region.id)
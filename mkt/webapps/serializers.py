@@ -245,8 +245,7 @@ class AppSerializer(serializers.ModelSerializer):
         if request and request.user.is_authenticated():
             user = request.user
             return {
-                'developed': app.addonuser_set.filter(
-                    user=user, role=amo.AUTHOR_ROLE_OWNER).exists(),
+                'developed': app.has_author(user, [amo.AUTHOR_ROLE_OWNER]),
                 'installed': app.has_installed(user),
                 'purchased': app.pk in user.purchase_ids(),
             }
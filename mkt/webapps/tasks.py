@@ -1,40 +1,43 @@
+import collections
 import datetime
 import hashlib
 import itertools
 import json
 import logging
+import multiprocessing
 import os
 import random
 import shutil
 import StringIO
-import subprocess
 import tempfile
+import threading
 import time
+import urlparse
+from multiprocessing.pool import ThreadPool
 
 from django.conf import settings
-from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.template import Context, loader
-from django.test.client import RequestFactory
 
-import pytz
 import requests
 from celery import chord
 from celery.exceptions import RetryTaskError
 from celeryutils import task
+from django_statsd.clients import statsd
 from PIL import Image
 from requests.exceptions import RequestException
 from tower import ugettext as _
 
 import amo
 import mkt
-from amo.utils import chunked, days_ago, JSONEncoder, slugify
+from amo.utils import bulk_update, chunked, days_ago, slugify
 from lib.metrics import get_monolith_client
 from lib.post_request_task.task import task as post_request_task
 from mkt.abuse.models import AbuseReport
 from mkt.constants.categories import CATEGORY_CHOICES
-from mkt.constants.regions import RESTOFWORLD
 from mkt.developers.models import ActivityLog, AppLog
 from mkt.developers.tasks import (_fetch_manifest, fetch_icon, pngcrush_image,
                                   resize_preview, save_icon, validator)
@@ -48,12 +51,18 @@ from mkt.site.mail import send_mail_jinja
 from mkt.users.models import UserProfile
 from mkt.users.utils import get_task_user
 from mkt.webapps.indexers import WebappIndexer
-from mkt.webapps.models import AppManifest, Preview, Webapp
+from mkt.webapps.export import (EXPORTERS, ExportWriter, get_since,
+                                load_state, read_part, save_state,
+                                write_part)
+from mkt.webapps.models import AppManifest, Preview, Trending, Webapp
 from mkt.webapps.utils import get_locale_properties
 
 
 task_log = logging.getLogger('z.task')
 
+# How long the ETag and Last-Modified of manifest responses are kept.
+MANIFEST_VALIDATORS_TIMEOUT = 60 * 60 * 24 * 30
+
 
 @task
 @write
@@ -102,6 +111,83 @@ def _log(webapp, message, rereview=False, exc_info=False):
                   exc_info=exc_info)
 
 
+class ManifestDeadlineExceeded(Exception):
+    pass
+
+
+def _manifest_validators_key(id):
+    return 'webapps:manifest-validators:%s' % id
+
+
+def _fetch_manifests(webapps, check_hash):
+    """
+    Fetches the manifests of the hosted apps in `webapps`, a list of
+    (webapp, file) tuples, at the same time.
+
+    At most `settings.MANIFEST_FETCH_WORKERS` manifests are fetched at once,
+    and at most `settings.MANIFEST_FETCH_PER_HOST` from the same host.
+    Fetches still running `settings.MANIFEST_FETCH_DEADLINE` seconds after
+    the start fail with `ManifestDeadlineExceeded`.
+
+    When `check_hash` is set, a conditional request is made with the ETag and
+    Last-Modified of the response that returned the current manifest.
+
+    Returns a dict of {webapp id: (content, exception)}. The content is None
+    if the fetch failed, or if the manifest was not modified.
+    """
+    deadline = time.time() + settings.MANIFEST_FETCH_DEADLINE
+    stored = cache.get_many([_manifest_validators_key(webapp.id)
+                             for webapp, file_ in webapps])
+    hosts = dict((urlparse.urlparse(webapp.manifest_url).netloc,
+                  threading.BoundedSemaphore(
+                      settings.MANIFEST_FETCH_PER_HOST))
+                 for webapp, file_ in webapps)
+
+    def fetch(webapp, file_):
+        validators = {}
+        if check_hash:
+            validators = dict(
+                stored.get(_manifest_validators_key(webapp.id), {}))
+            # Only ask for the manifest to be sent if it changed when it is the
+            # one we already have.
+            if validators.pop('hash', None) != file_.hash:
+                validators = {}
+        with hosts[urlparse.urlparse(webapp.manifest_url).netloc]:
+            if time.time() > deadline:
+                return None, ManifestDeadlineExceeded(), validators
+            try:
+                content = _fetch_manifest(webapp.manifest_url,
+                                          validators=validators)
+            except Exception, e:
+                task_log.info(u'[Webapp:%s] Failed to get manifest'
+                              % webapp.id, exc_info=True)
+                return None, e, validators
+        validators['hash'] = (_get_content_hash(content) if content
+                              else file_.hash)
+        return content, None, validators
+
+    pool = ThreadPool(min(len(webapps), settings.MANIFEST_FETCH_WORKERS) or 1)
+    results = [(webapp, pool.apply_async(fetch, (webapp, file_)))
+               for webapp, file_ in webapps]
+    pool.close()
+
+    fetched, validators = {}, {}
+    for webapp, result in results:
+        try:
+            content, error, webapp_validators = result.get(
+                max(deadline - time.time(), 0))
+        except multiprocessing.TimeoutError:
+            fetched[webapp.id] = None, ManifestDeadlineExceeded()
+            continue
+        fetched[webapp.id] = content, error
+        if not error:
+            validators[_manifest_validators_key(webapp.id)] = (
+                webapp_validators)
+
+    cache.set_many(validators, MANIFEST_VALIDATORS_TIMEOUT)
+    return fetched
+
+
 @task
 @write
 def update_manifests(ids, **kw):
@@ -114,8 +200,16 @@ def update_manifests(ids, **kw):
     # we'll need to log in as user.
     amo.set_user(get_task_user())
 
+    # Fetch all the manifests first, only the changed ones get validated.
+    webapps = []
+    for webapp in Webapp.objects.filter(pk__in=ids):
+        file_ = webapp.versions.latest().files.latest()
+        if file_:
+            webapps.append((webapp, file_))
+    fetched = _fetch_manifests(webapps, check_hash)
+
     for id in ids:
-        _update_manifest(id, check_hash, retries)
+        _update_manifest(id, check_hash, retries, fetched=fetched.get(id))
     if retries:
         try:
             update_manifests.retry(args=(retries.keys(),),
@@ -158,7 +252,13 @@ def notify_developers_of_failure(app, error_message, has_link=False):
                             context, recipient_list=to)
 
 
-def _update_manifest(id, check_hash, failed_fetches):
+def _update_manifest(id, check_hash, failed_fetches, fetched=None):
+    """
+    Updates the webapp `id` from its manifest if it changed.
+
+    `fetched` is the (content, exception) tuple returned by `_fetch_manifests`
+    when the manifest was already fetched.
+    """
     webapp = Webapp.objects.get(pk=id)
     version = webapp.versions.latest()
     file_ = version.files.latest()
@@ -168,10 +268,16 @@ def _update_manifest(id, check_hash, failed_fetches):
         _log(webapp, u'Ignoring, no existing file')
         return
 
-    # Fetch manifest, catching and logging any exception.
-    try:
-        content = _fetch_manifest(webapp.manifest_url)
-    except Exception, e:
+    if fetched is None:
+        fetched = _fetch_manifests([(webapp, file_)], check_hash)[id]
+    content, e = fetched
+
+    if isinstance(e, ManifestDeadlineExceeded):
+        # Not the app's fault, try again without counting it as a failure.
+        _log(webapp, u'Manifest fetch deadline exceeded')
+        failed_fetches[id] = failed_fetches.get(id, 0)
+        return
+    elif e:
         msg = u'Failed to get manifest from %s. Error: %s' % (
             webapp.manifest_url, e)
         failed_fetches[id] = failed_fetches.get(id, 0) + 1
@@ -182,13 +288,16 @@ def _update_manifest(id, check_hash, failed_fetches):
         elif failed_fetches[id] >= 4:
             # This is our 4th attempt, we should already have notified the
             # developer(s). Let's put the app in the re-review queue.
-            _log(webapp, msg, rereview=True, exc_info=True)
+            _log(webapp, msg, rereview=True)
             if webapp.status in amo.WEBAPPS_APPROVED_STATUSES:
                 RereviewQueue.flag(webapp, amo.LOG.REREVIEW_MANIFEST_CHANGE,
                                    msg)
             del failed_fetches[id]
         else:
-            _log(webapp, msg, rereview=False, exc_info=True)
+            _log(webapp, msg, rereview=False)
+        return
+    elif content is None:
+        _log(webapp, u'Manifest not modified')
         return
 
     # Check hash.
@@ -351,65 +460,12 @@ def unindex_webapps(ids, **kw):
     WebappIndexer.unindexer(ids)
 
 
-@task
-def dump_app(id, **kw):
-    from mkt.webapps.serializers import AppSerializer
-    # Because @robhudson told me to.
-    # Note: not using storage because all these operations should be local.
-    target_dir = os.path.join(settings.DUMPED_APPS_PATH, 'apps',
-                              str(id / 1000))
-    target_file = os.path.join(target_dir, str(id) + '.json')
-
-    try:
-        obj = Webapp.objects.get(pk=id)
-    except Webapp.DoesNotExist:
-        task_log.info(u'Webapp does not exist: {0}'.format(id))
-        return
-
-    req = RequestFactory().get('/')
-    req.user = AnonymousUser()
-    req.REGION = RESTOFWORLD
-
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
-
-    task_log.info('Dumping app {0} to {1}'.format(id, target_file))
-    res = AppSerializer(obj, context={'request': req}).data
-    json.dump(res, open(target_file, 'w'), cls=JSONEncoder)
-    return target_file
-
-
-@task
-def clean_apps(pks, **kw):
-    app_dir = os.path.join(settings.DUMPED_APPS_PATH, 'apps')
-    rm_directory(app_dir)
-    return pks
-
-
-@task(ignore_result=False)
-def dump_apps(ids, **kw):
-    task_log.info(u'Dumping apps {0} to {1}. [{2}]'
-                  .format(ids[0], ids[-1], len(ids)))
-    for id in ids:
-        dump_app(id)
-
-
-@task
-def zip_apps(*args, **kw):
-    today = datetime.datetime.today().strftime('%Y-%m-%d')
-    files = ['apps'] + compile_extra_files(date=today)
-    tarball = compress_export(filename=today, files=files)
-    link_latest_export(tarball)
-    return tarball
-
-
 def link_latest_export(tarball):
     """
-    Atomically links basename(tarball) to
-    DUMPED_APPS_PATH/tarballs/latest.tgz.
+    Atomically links basename(tarball) to latest.tgz, next to it.
     """
     tarball_name = os.path.basename(tarball)
-    target_dir = os.path.join(settings.DUMPED_APPS_PATH, 'tarballs')
+    target_dir = os.path.dirname(tarball)
     target_file = os.path.join(target_dir, 'latest.tgz')
     tmp_file = os.path.join(target_dir, '.latest.tgz')
     if os.path.lexists(tmp_file):
@@ -426,129 +482,153 @@ def rm_directory(path):
         shutil.rmtree(path)
 
 
-def dump_all_apps_tasks():
-    all_pks = (Webapp.objects.visible()
-                             .values_list('pk', flat=True)
-                             .order_by('pk'))
-    return [dump_apps.si(pks) for pks in chunked(all_pks, 100)]
-
+def _start_export(root, name, kinds, extra_dir='', incremental=False,
+                  template_dir='apps'):
+    """
+    Exports the objects of `kinds` to `root`/tarballs. The objects are
+    serialized in parallel in chunks of EXPORT_CHUNK_SIZE, which are then
+    streamed into the export by `finish_export`.
 
-@task
-def export_data(name=None):
-    from mkt.collections.tasks import dump_all_collections_tasks
-    today = datetime.datetime.today().strftime('%Y-%m-%d')
-    if name is None:
-        name = today
-    root = settings.DUMPED_APPS_PATH
-    directories = ['apps', 'collections']
-    for directory in directories:
-        rm_directory(os.path.join(root, directory))
-    files = directories + compile_extra_files(date=today)
-    chord(dump_all_apps_tasks() + dump_all_collections_tasks(),
-          compress_export.si(filename=name, files=files)).apply_async()
+    If `incremental`, only the objects modified since the previous export are
+    exported, along with the ids of those which were removed since then, and
+    the export is named `name`-incremental.
+    """
+    # The database only keeps whole seconds, so round down to export
+    # again rather than miss what changes during the current second.
+    started = int(time.time())
+    state = load_state(root) if incremental else None
+    since = get_since(state)
+    if since:
+        name += '-incremental'
+    parts_dir = os.path.join(root, 'parts', name)
+    rm_directory(parts_dir)
+    os.makedirs(parts_dir)
+
+    pending = {'started': started, 'ids': {}, 'deleted': {}}
+    chunks = []
+    for kind in kinds:
+        exporter = EXPORTERS[kind]
+        ids = list(exporter.get_ids())
+        pending['ids'][kind] = ids
+        previous = state['ids'].get(kind) if since else None
+        if previous is None:
+            changed = ids
+        else:
+            # Objects which were hidden at the time of the previous export
+            # are exported whether they were modified since or not.
+            changed = sorted(set(exporter.get_changed_ids(since)) |
+                             (set(ids) - set(previous)))
+            pending['deleted'][kind] = sorted(set(previous) - set(ids))
+        for i, chunk in enumerate(chunked(changed,
+                                          settings.EXPORT_CHUNK_SIZE)):
+            part = os.path.join(parts_dir, '%s-%05d.gz' % (kind, i))
+            chunks.append(export_chunk.si(kind, chunk, part))
+    save_state(parts_dir, pending)
+
+    date = datetime.datetime.today().strftime('%Y-%m-%d')
+    kwargs = {'root': root, 'name': name, 'date': date,
+              'extra_dir': extra_dir, 'template_dir': template_dir}
+    if chunks:
+        chord(chunks, finish_export.s(**kwargs)).apply_async()
+    else:
+        finish_export.delay([], **kwargs)
 
 
-def compile_extra_files(date):
-    # Put some .txt files in place.
-    context = Context({'date': date, 'url': settings.SITE_URL})
-    files = ['license.txt', 'readme.txt']
-    if not os.path.exists(settings.DUMPED_APPS_PATH):
-        os.makedirs(settings.DUMPED_APPS_PATH)
-    created_files = []
-    for f in files:
-        template = loader.get_template('webapps/dump/apps/' + f)
-        dest = os.path.join(settings.DUMPED_APPS_PATH, f)
-        open(dest, 'w').write(template.render(context))
-        created_files.append(f)
-    return created_files
+@task(ignore_result=False)
+def export_chunk(kind, ids, filename, **kw):
+    task_log.info(u'Exporting {0} {1} to {2}. [{3}]'
+                  .format(kind, ids[0], ids[-1], len(ids)))
+    count, seconds = write_part(kind, ids, filename)
+    return kind, count, seconds
 
 
 @task
-def compress_export(filename, files):
-    # Note: not using storage because all these operations should be local.
-    target_dir = os.path.join(settings.DUMPED_APPS_PATH, 'tarballs')
-    target_file = os.path.join(target_dir, filename + '.tgz')
-
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
-
-    # Put some .txt files in place.
-    cmd = ['tar', 'czf', target_file, '-C',
-           settings.DUMPED_APPS_PATH] + files
-    task_log.info(u'Creating dump {0}'.format(target_file))
-    subprocess.call(cmd)
-    return target_file
-
-
-@task(ignore_result=False)
-def dump_user_installs(ids, **kw):
-    task_log.info(u'Dumping user installs {0} to {1}. [{2}]'
-                  .format(ids[0], ids[-1], len(ids)))
-
-    users = (UserProfile.objects.filter(enable_recommendations=True)
-             .filter(id__in=ids))
-    for user in users:
-        hash = user.recommendation_hash
-        target_dir = os.path.join(settings.DUMPED_USERS_PATH, 'users', hash[0])
-        target_file = os.path.join(target_dir, '%s.json' % hash)
-
-        if not os.path.exists(target_dir):
-            try:
-                os.makedirs(target_dir)
-            except OSError:
-                pass  # Catch race condition if file exists now.
-
-        # Gather data about user.
-        installed = []
-        zone = pytz.timezone(settings.TIME_ZONE)
-        for install in user.installed_set.all():
-            try:
-                app = install.addon
-            except Webapp.DoesNotExist:
-                continue
+def finish_export(results, root, name, date, extra_dir='',
+                  template_dir='apps', **kw):
+    """
+    Streams the parts written by `export_chunk` and the extra files into the
+    export, then records its state for the next incremental export. Full
+    exports are also linked as latest.tgz.
+    """
+    parts_dir = os.path.join(root, 'parts', name)
+    pending = load_state(parts_dir)
+    writer = ExportWriter(os.path.join(root, 'tarballs'), name,
+                          settings.EXPORT_FORMATS)
+    for filename in sorted(os.listdir(parts_dir)):
+        if not filename.endswith('.gz'):
+            continue
+        kind = filename.split('-')[0]
+        for path, content in read_part(os.path.join(parts_dir, filename)):
+            writer.add(kind, path, content)
+
+    for kind, ids in pending['deleted'].items():
+        writer.add_tombstones(kind, [EXPORTERS[kind].tombstone(pk)
+                                     for pk in ids])
+
+    extra_files = compile_extra_files(
+        date, template_dir=template_dir, root=root,
+        incremental=bool(pending['deleted']))
+    for filename in extra_files:
+        writer.add_file(os.path.join(root, filename),
+                        os.path.join(extra_dir, filename))
+    files = writer.close()
+    if writer.tarball and not pending['deleted']:
+        link_latest_export(files[0])
+
+    save_state(root, {'started': pending['started'], 'ids': pending['ids']})
+    rm_directory(parts_dir)
+
+    totals = collections.defaultdict(lambda: [0, 0])
+    for kind, count, seconds in results:
+        totals[kind][0] += count
+        totals[kind][1] += seconds
+    for kind, (count, seconds) in totals.items():
+        statsd.incr('mkt.export.%s' % kind, count)
+        task_log.info(u'Exported {0} {1} in {2:.2f}s of work ({3:.1f}/s).'
+                      .format(count, kind, seconds,
+                              count / seconds if seconds else 0))
+    elapsed = time.time() - pending['started']
+    statsd.timing('mkt.export.%s' % template_dir, elapsed * 1000)
+    task_log.info(u'Export {0} written in {1:.2f}s: {2}'
+                  .format(name, elapsed, ', '.join(files)))
+    return files
 
-            installed.append({
-                'id': app.id,
-                'slug': app.app_slug,
-                'installed': pytz.utc.normalize(
-                    zone.localize(install.created)).strftime(
-                        '%Y-%m-%dT%H:%M:%S')
-            })
-
-        data = {
-            'user': hash,
-            'region': user.region,
-            'lang': user.lang,
-            'installed_apps': installed,
-        }
 
-        task_log.info('Dumping user {0} to {1}'.format(user.id, target_file))
-        json.dump(data, open(target_file, 'w'), cls=JSONEncoder)
+@task
+def export_data(name=None, incremental=False):
+    if name is None:
+        name = datetime.datetime.today().strftime('%Y-%m-%d')
+    _start_export(settings.DUMPED_APPS_PATH, name, ['apps', 'collections'],
+                  incremental=incremental)
 
 
 @task
-def zip_users(*args, **kw):
-    # Note: not using storage because all these operations should be local.
-    today = datetime.datetime.utcnow().strftime('%Y-%m-%d')
-    target_dir = os.path.join(settings.DUMPED_USERS_PATH, 'tarballs')
-    target_file = os.path.join(target_dir, '{0}.tgz'.format(today))
+def export_user_installs(name=None, incremental=False):
+    if name is None:
+        name = datetime.datetime.utcnow().strftime('%Y-%m-%d')
+    _start_export(settings.DUMPED_USERS_PATH, name, ['users'],
+                  extra_dir='users', incremental=incremental,
+                  template_dir='users')
 
-    if not os.path.exists(target_dir):
-        os.makedirs(target_dir)
 
+def compile_extra_files(date, template_dir='apps', root=None,
+                        incremental=False):
     # Put some .txt files in place.
-    context = Context({'date': today, 'url': settings.SITE_URL})
+    if root is None:
+        root = settings.DUMPED_APPS_PATH
+    context = Context({'date': date, 'url': settings.SITE_URL,
+                       'incremental': incremental})
     files = ['license.txt', 'readme.txt']
+    if not os.path.exists(root):
+        os.makedirs(root)
+    created_files = []
     for f in files:
-        template = loader.get_template('webapps/dump/users/' + f)
-        dest = os.path.join(settings.DUMPED_USERS_PATH, 'users', f)
+        template = loader.get_template(
+            'webapps/dump/%s/%s' % (template_dir, f))
+        dest = os.path.join(root, f)
         open(dest, 'w').write(template.render(context))
-
-    cmd = ['tar', 'czf', target_file, '-C',
-           settings.DUMPED_USERS_PATH, 'users']
-    task_log.info(u'Creating user dump {0}'.format(target_file))
-    subprocess.call(cmd)
-    return target_file
+        created_files.append(f)
+    return created_files
 
 
 def _fix_missing_icons(id):
@@ -630,169 +710,174 @@ def import_manifests(ids, **kw):
                               '%s: %s' % (app.id, version.id, e))
 
 
-def _get_trending(app_id, region=None):
+def _installs_facet(ids, start=None, end=None, region=None):
+    """
+    Returns a Monolith facet summing the installs of each app in `ids`,
+    between `start` and `end` and restricted to `region` if given.
     """
-    Calculate trending.
+    filters = [{'terms': {'app-id': list(ids)}}]
+    if start and end:
+        filters.append({'range': {'date': {
+            'gte': start.date().strftime('%Y-%m-%d'),
+            'lte': end.date().strftime('%Y-%m-%d'),
+        }}})
+    if region:
+        filters.append({'term': {'region': region.slug}})
+
+    return {
+        'terms_stats': {
+            'key_field': 'app-id',
+            'value_field': 'app_installs',
+            'size': len(ids),
+        },
+        'facet_filter': {'and': filters},
+    }
+
+
+def _installs_by_app(resp, facet):
+    """Returns a dict of {app_id: installs} from a `_installs_facet`."""
+    terms = resp.get('facets', {}).get(facet, {}).get('terms', [])
+    return dict((int(t['term']), float(t.get('total') or 0)) for t in terms)
+
+
+def _get_trending(ids):
+    """
+    Calculate trending for all the apps in `ids`, globally and for each
+    region, with a single Monolith query.
 
     a = installs from 7 days ago to now
     b = installs from 28 days ago to 8 days ago, averaged per week
 
     trending = (a - b) / b if a > 100 and b > 1 else 0
 
+    Returns a dict of {(app_id, region_id): trending}, where region_id is 0
+    for global trending. Apps that aren't trending are left out.
+
     """
     client = get_monolith_client()
-
-    kwargs = {'app-id': app_id}
-    if region:
-        kwargs['region'] = region.slug
-
     today = datetime.datetime.today()
+    regions = [(0, None)] + [(region.id, region) for region in
+                             mkt.regions.REGIONS_DICT.values()]
+
+    facets = {}
+    for region_id, region in regions:
+        facets['week_%s' % region_id] = _installs_facet(
+            ids, days_ago(7), today, region)
+        facets['prior_%s' % region_id] = _installs_facet(
+            ids, days_ago(28), days_ago(8), region)
 
-    # If we query monolith with interval=week and the past 7 days
-    # crosses a Monday, Monolith splits the counts into two. We want
-    # the sum over the past week so we need to `sum` these.
     try:
-        count_1 = sum(
-            c['count'] for c in
-            client('app_installs', days_ago(7), today, 'week', **kwargs)
-            if c.get('count'))
-    except ValueError as e:
+        resp = client.raw({'query': {'match_all': {}}, 'facets': facets,
+                           'size': 0})
+    except Exception as e:
         task_log.info('Call to ES failed: {0}'.format(e))
-        count_1 = 0
+        return {}
 
-    # If count_1 isn't more than 100, stop here to avoid extra Monolith calls.
-    if not count_1 > 100:
-        return 0.0
+    trending = {}
+    for region_id, region in regions:
+        prior = _installs_by_app(resp, 'prior_%s' % region_id)
+        for app_id, count_1 in _installs_by_app(
+                resp, 'week_%s' % region_id).items():
+            # Average the installs of the prior 3 weeks.
+            count_3 = prior.get(app_id, 0) / 3
+            if count_1 > 100 and count_3 > 1:
+                value = (count_1 - count_3) / count_3
+                if value:
+                    trending[(app_id, region_id)] = value
 
-    # Get the average installs for the prior 3 weeks. Don't use the `len` of
-    # the returned counts because of week boundaries.
-    try:
-        count_3 = sum(
-            c['count'] for c in
-            client('app_installs', days_ago(28), days_ago(8), 'week', **kwargs)
-            if c.get('count')) / 3
-    except ValueError as e:
-        task_log.info('Call to ES failed: {0}'.format(e))
-        count_3 = 0
+    return trending
 
-    if count_3 > 1:
-        return (count_1 - count_3) / count_3
-    else:
-        return 0.0
 
+def _save_trending(trending):
+    """
+    Insert or update all the `trending` values, as returned by
+    `_get_trending`, with a single query.
+    """
+    if not trending:
+        return
 
-@task
-@write
-def update_trending(ids, **kw):
-    count = 0
-    times = []
+    # We are bypassing the ORM, so invalidate the cached rows ourselves.
+    existing = list(Trending.objects.no_cache().filter(
+        addon__in=set(app_id for app_id, region_id in trending)))
 
-    for app in Webapp.objects.filter(id__in=ids).no_transforms():
+    now = datetime.datetime.now()
+    rows = [(app_id, region_id, value, now, now)
+            for (app_id, region_id), value in trending.items()]
+    cursor = connection.cursor()
+    cursor.execute(
+        'INSERT INTO addons_trending (addon_id, region, value, created, '
+        'modified) VALUES %s ON DUPLICATE KEY UPDATE value=VALUES(value), '
+        'modified=VALUES(modified)' % ', '.join(['(%s, %s, %s, %s, %s)'] *
+                                               len(rows)),
+        list(itertools.chain(*rows)))
 
-        count += 1
-        t_start = time.time()
+    if existing:
+        Trending.objects.invalidate(*existing)
 
-        # Calculate global trending, then per-region trending below.
-        value = _get_trending(app.id)
-        if value:
-            trending, created = app.trending.get_or_create(
-                region=0, defaults={'value': value})
-            if not created:
-                trending.update(value=value)
 
-        for region in mkt.regions.REGIONS_DICT.values():
-            value = _get_trending(app.id, region)
-            if value:
-                trending, created = app.trending.get_or_create(
-                    region=region.id, defaults={'value': value})
-                if not created:
-                    trending.update(value=value)
+@task
+@write
+def update_trending(ids, **kw):
+    t_start = time.time()
 
-        times.append(time.time() - t_start)
+    # Only keep ids of apps that still exist.
+    ids = list(Webapp.objects.filter(id__in=ids)
+               .values_list('id', flat=True))
+    if not ids:
+        return
+
+    trending = _get_trending(ids)
+    _save_trending(trending)
 
-    task_log.info('Trending calculated for %s apps. Avg time overall: '
-                  '%0.2fs' % (count, sum(times) / count))
+    task_log.info('Trending calculated for %s apps (%s values) in %0.2fs.'
+                  % (len(ids), len(trending), time.time() - t_start))
 
 
 @task
 @write
 def update_downloads(ids, **kw):
     client = get_monolith_client()
-    count = 0
-
-    for app in Webapp.objects.filter(id__in=ids).no_transforms():
-
-        appid = {'app-id': app.id}
-
-        # Get weekly downloads.
-        query = {
-            'query': {'match_all': {}},
-            'facets': {
-                'installs': {
-                    'date_histogram': {
-                        'value_field': 'app_installs',
-                        'interval': 'week',
-                        'key_field': 'date',
-                    },
-                    'facet_filter': {
-                        'and': [
-                            {'term': appid},
-                            {'range': {'date': {
-                                'gte': days_ago(8).date().strftime('%Y-%m-%d'),
-                                'lte': days_ago(1).date().strftime('%Y-%m-%d'),
-                            }}}
-                        ]
-                    }
-                }
-            },
-            'size': 0}
 
-        try:
-            resp = client.raw(query)
-            # If we query monolith with interval=week and the past 7 days
-            # crosses a Monday, Monolith splits the counts into two. We want
-            # the sum over the past week so we need to `sum` these.
-            weekly = sum(
-                c['total'] for c in
-                resp.get('facets', {}).get('installs', {}).get('entries')
-                if c.get('total'))
-        except Exception as e:
-            task_log.info('Call to ES failed: {0}'.format(e))
-            weekly = 0
-
-        # Get total downloads.
-        query = {'query': {'match_all': {}},
-                 'facets': {
-                     'installs': {
-                         'statistical': {'field': 'app_installs'},
-                         'facet_filter': {'term': appid}}},
-                 'size': 0}
-        try:
-            resp = client.raw(query)
-            total = resp.get('facets', {}).get('installs', {}).get('total', 0)
-        except Exception as e:
-            task_log.info('Call to ES failed: {0}'.format(e))
-            total = 0
-
-        # Update Webapp object, if needed.
-        update = False
-        signal = False
-        if weekly != app.weekly_downloads:
-            update = True
-            signal = True
-        if total != app.total_downloads:
-            update = True
-
-        if update:
-            # Note: Calling `update` will trigger a reindex on the app if
-            # `_signal` is True. Since we only index `weekly_downloads`, we
-            # can skip reindexing if this hasn't changed.
-            count += 1
-            app.update(weekly_downloads=weekly, total_downloads=total,
-                       _signal=signal)
+    # Get weekly and total downloads of all the apps in one query.
+    query = {
+        'query': {'match_all': {}},
+        'facets': {
+            'weekly': _installs_facet(ids, days_ago(8), days_ago(1)),
+            'total': _installs_facet(ids),
+        },
+        'size': 0}
+    try:
+        resp = client.raw(query)
+    except Exception as e:
+        task_log.info('Call to ES failed: {0}'.format(e))
+        return
+    weekly = _installs_by_app(resp, 'weekly')
+    total = _installs_by_app(resp, 'total')
+
+    # Only update the apps that changed.
+    apps = list(Webapp.objects.filter(id__in=ids).no_transforms())
+    changed = {}
+    for app in apps:
+        values = {'weekly_downloads': int(weekly.get(app.id, 0)),
+                  'total_downloads': int(total.get(app.id, 0))}
+        if (values['weekly_downloads'] != app.weekly_downloads or
+                values['total_downloads'] != app.total_downloads):
+            changed[app] = values
+
+    if changed:
+        bulk_update(Webapp, dict((app.id, values)
+                                 for app, values in changed.items()))
+        Webapp.objects.invalidate(*changed)
+
+        # We only index `weekly_downloads`, so only reindex the apps where
+        # this has changed.
+        reindex = [app.id for app, values in changed.items()
+                   if values['weekly_downloads'] != app.weekly_downloads]
+        if reindex:
+            WebappIndexer.index_ids(reindex)
 
     task_log.info('App downloads updated for %s out of %s apps.'
-                  % (count, len(ids)))
+                  % (len(changed), len(ids)))
 
 
 class PreGenAPKError(Exception):
@@ -128,25 +128,20 @@ class TestWeeklyDownloads(amo.tests.TestCase):
     def get_app(self):
         return Webapp.objects.get(pk=self.app.pk)
 
+    def facets(self, weekly=None, total=None):
+        facets = {'weekly': {'_type': 'terms_stats', 'terms': []},
+                  'total': {'_type': 'terms_stats', 'terms': []}}
+        for facet, value in (('weekly', weekly), ('total', total)):
+            if value is not None:
+                facets[facet]['terms'].append(
+                    {'term': self.app.pk, 'count': 3, 'total': value})
+        return {'facets': facets}
+
+    @mock.patch('mkt.webapps.tasks.WebappIndexer.index_ids')
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_weekly_downloads(self, _mock):
+    def test_weekly_downloads(self, _mock, index_ids):
         client = mock.Mock()
-        raw = {
-            'facets': {
-                'installs': {
-                    '_type': 'date_histogram',
-                    'entries': [
-                        {'count': 3,
-                         'time': 1390780800000,
-                         'total': 19.0},
-                        {'count': 62,
-                         'time': 1391385600000,
-                         'total': 236.0}
-                    ]
-                }
-            }
-        }
-        client.raw.return_value = raw
+        client.raw.return_value = self.facets(weekly=255.0, total=255.0)
         _mock.return_value = client
 
         eq_(self.app.weekly_downloads, 0)
@@ -155,20 +150,13 @@ class TestWeeklyDownloads(amo.tests.TestCase):
 
         self.app.reload()
         eq_(self.app.weekly_downloads, 255)
+        index_ids.assert_called_with([self.app.pk])
 
+    @mock.patch('mkt.webapps.tasks.WebappIndexer.index_ids')
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_total_downloads(self, _mock):
+    def test_total_downloads(self, _mock, index_ids):
         client = mock.Mock()
-        raw = {
-            'facets': {
-                'installs': {
-                    u'_type': u'statistical',
-                    u'count': 49,
-                    u'total': 6638.0
-                }
-            }
-        }
-        client.raw.return_value = raw
+        client.raw.return_value = self.facets(total=6638.0)
         _mock.return_value = client
 
         eq_(self.app.total_downloads, 0)
@@ -177,9 +165,42 @@ class TestWeeklyDownloads(amo.tests.TestCase):
 
         self.app.reload()
         eq_(self.app.total_downloads, 6638)
+        # Total downloads aren't indexed.
+        assert not index_ids.called
+
+    @mock.patch('mkt.webapps.tasks.WebappIndexer.index_ids')
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_unchanged(self, _mock, index_ids):
+        self.app.update(weekly_downloads=10, total_downloads=20)
+        client = mock.Mock()
+        client.raw.return_value = self.facets(weekly=10.0, total=20.0)
+        _mock.return_value = client
+
+        update_downloads([self.app.pk])
+        assert not index_ids.called
+
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_many_apps(self, _mock):
+        app2 = Webapp.objects.create(status=amo.STATUS_PUBLIC)
+        raw = self.facets(weekly=5.0, total=50.0)
+        raw['facets']['weekly']['terms'].append(
+            {'term': app2.pk, 'count': 1, 'total': 7.0})
+        raw['facets']['total']['terms'].append(
+            {'term': app2.pk, 'count': 1, 'total': 70.0})
+        client = mock.Mock()
+        client.raw.return_value = raw
+        _mock.return_value = client
+
+        update_downloads([self.app.pk, app2.pk])
+
+        eq_(client.raw.call_count, 1)
+        app, app2 = self.get_app(), app2.reload()
+        eq_((app.weekly_downloads, app.total_downloads), (5, 50))
+        eq_((app2.weekly_downloads, app2.total_downloads), (7, 70))
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_monolith_error(self, _mock):
+        self.app.update(weekly_downloads=10, total_downloads=20)
         client = mock.Mock()
         client.side_effect = ValueError
         client.raw.side_effect = Exception
@@ -187,9 +208,10 @@ class TestWeeklyDownloads(amo.tests.TestCase):
 
         update_downloads([self.app.pk])
 
+        # Downloads are left untouched.
         self.app.reload()
-        eq_(self.app.weekly_downloads, 0)
-        eq_(self.app.total_downloads, 0)
+        eq_(self.app.weekly_downloads, 10)
+        eq_(self.app.total_downloads, 20)
 
 
 class TestCleanup(amo.tests.TestCase):
@@ -249,56 +271,91 @@ class TestUpdateTrending(amo.tests.TestCase):
 
     def setUp(self):
         self.app = Webapp.objects.create(status=amo.STATUS_PUBLIC)
+        self.regions = mkt.regions.REGIONS_DICT.values()
+
+    def trending(self, value):
+        trending = {(self.app.id, 0): value}
+        for region in self.regions:
+            trending[(self.app.id, region.id)] = value
+        return trending
 
     @mock.patch('mkt.webapps.tasks._get_trending')
     def test_trending_saved(self, _mock):
-        _mock.return_value = 12.0
+        _mock.return_value = self.trending(12.0)
         update_app_trending()
 
         eq_(self.app.get_trending(), 12.0)
-        for region in mkt.regions.REGIONS_DICT.values():
+        for region in self.regions:
             eq_(self.app.get_trending(region=region), 12.0)
 
         # Test running again updates the values as we'd expect.
-        _mock.return_value = 2.0
+        _mock.return_value = self.trending(2.0)
         update_app_trending()
         eq_(self.app.get_trending(), 2.0)
-        for region in mkt.regions.REGIONS_DICT.values():
+        for region in self.regions:
             eq_(self.app.get_trending(region=region), 2.0)
 
+    @mock.patch('mkt.webapps.tasks._get_trending')
+    def test_trending_batched(self, _mock):
+        app2 = Webapp.objects.create(status=amo.STATUS_PUBLIC)
+        _mock.return_value = {(self.app.id, 0): 3.0, (app2.id, 0): 4.0}
+        update_app_trending()
+
+        eq_(_mock.call_count, 1)
+        eq_(set(_mock.call_args[0][0]), set([self.app.id, app2.id]))
+        eq_(self.app.get_trending(), 3.0)
+        eq_(app2.get_trending(), 4.0)
+
+    def facets(self, week, prior, region_id=0):
+        return {'facets': {
+            'week_%s' % region_id: {'terms': [
+                {'term': self.app.id, 'count': 2, 'total': week}]},
+            'prior_%s' % region_id: {'terms': [
+                {'term': self.app.id, 'count': 3, 'total': prior}]},
+        }}
+
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_get_trending(self, _mock):
         client = mock.Mock()
-        client.return_value = [
-            {'count': 133.0, 'date': date(2013, 8, 26)},
-            {'count': 122.0, 'date': date(2013, 9, 2)},
-        ]
+        # 1st week count: 255
+        # Prior 3 weeks get averaged: 255 / 3 = 85
+        # (255 - 85) / 85 = 2.0
+        client.raw.return_value = self.facets(255.0, 255.0)
         _mock.return_value = client
 
-        # 1st week count: 133 + 122 = 255
-        # Prior 3 weeks get averaged: (133 + 122) / 3 = 85
-        # (255 - 85) / 85 = 2.0
-        eq_(_get_trending(self.app.id), 2.0)
+        eq_(_get_trending([self.app.id]), {(self.app.id, 0): 2.0})
+
+        # All the regions and weeks are fetched in one query.
+        eq_(client.raw.call_count, 1)
+        facets = client.raw.call_args[0][0]['facets']
+        eq_(len(facets), 2 * (len(self.regions) + 1))
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
-    def test_get_trending_threshold(self, _mock):
+    def test_get_trending_region(self, _mock):
         client = mock.Mock()
-        client.return_value = [
-            {'count': 49.0, 'date': date(2013, 8, 26)},
-            {'count': 50.0, 'date': date(2013, 9, 2)},
-        ]
+        region = mkt.regions.BR
+        client.raw.return_value = self.facets(255.0, 255.0, region.id)
         _mock.return_value = client
 
-        # 1st week count: 49 + 50 = 99
-        # 99 is less than 100 so we return 0.0.
-        eq_(_get_trending(self.app.id), 0.0)
+        eq_(_get_trending([self.app.id]), {(self.app.id, region.id): 2.0})
+        facet = client.raw.call_args[0][0]['facets']['week_%s' % region.id]
+        assert {'term': {'region': region.slug}} in (
+            facet['facet_filter']['and'])
+
+    @mock.patch('mkt.webapps.tasks.get_monolith_client')
+    def test_get_trending_threshold(self, _mock):
+        client = mock.Mock()
+        # 1st week count: 99 is less than 100 so it is not trending.
+        client.raw.return_value = self.facets(99.0, 255.0)
+        _mock.return_value = client
+        eq_(_get_trending([self.app.id]), {})
 
     @mock.patch('mkt.webapps.tasks.get_monolith_client')
     def test_get_trending_monolith_error(self, _mock):
         client = mock.Mock()
-        client.side_effect = ValueError
+        client.raw.side_effect = ValueError
         _mock.return_value = client
-        eq_(_get_trending(self.app.id), 0.0)
+        eq_(_get_trending([self.app.id]), {})
 
 
 @mock.patch('os.stat')
@@ -15,6 +15,7 @@ from django import forms
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from django.core import mail
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.urlresolvers import reverse
 from django.db.models.signals import post_delete, post_save
@@ -53,12 +54,14 @@ from mkt.translations.models import Translation
 from mkt.users.models import UserProfile
 from mkt.versions.models import update_status, Version
 from mkt.webapps.indexers import WebappIndexer
-from mkt.webapps.models import (AddonDeviceType, AddonExcludedRegion,
-                                AddonUpsell, AppFeatures, AppManifest,
-                                BlacklistedSlug, ContentRating, Geodata,
-                                get_excluded_in, IARCInfo, Installed, Preview,
+from mkt.webapps.models import (_invalidate_author_roles, AddonDeviceType,
+                                AddonExcludedRegion, AddonUpsell, AddonUser,
+                                AppFeatures, AppManifest, BlacklistedSlug,
+                                ContentRating,
+                                Geodata, get_author_roles, get_excluded_in,
+                                IARCInfo, Installed, Preview,
                                 RatingDescriptors, RatingInteractives,
-                                version_changed, Webapp)
+                                region_exclusions, version_changed, Webapp)
 from mkt.webapps.signals import version_changed as version_changed_signal
 
 
@@ -1937,6 +1940,79 @@ class TestAddonExcludedRegion(amo.tests.WebappTestCase):
         eq_(unicode(self.er), '%s: %s' % (self.app, mkt.regions.UK.slug))
 
 
+class TestRegionExclusions(amo.tests.WebappTestCase):
+
+    def test_cached(self):
+        AddonExcludedRegion.objects.create(addon=self.app,
+                                           region=mkt.regions.UK.id)
+        self.assertSetEqual(get_excluded_in(mkt.regions.UK.id), [self.app.id])
+        with self.assertNumQueries(0):
+            self.assertSetEqual(get_excluded_in(mkt.regions.UK.id),
+                                [self.app.id])
+
+    def test_invalidated(self):
+        eq_(get_excluded_in(mkt.regions.UK.id), set())
+        eq_(get_excluded_in(mkt.regions.US.id), set())
+        aer = AddonExcludedRegion.objects.create(addon=self.app,
+                                                 region=mkt.regions.UK.id)
+        ok_(cache.get(region_exclusions.key(mkt.regions.UK.id)) is None)
+        self.assertSetEqual(get_excluded_in(mkt.regions.UK.id),
+                            [self.app.id])
+        with self.assertNumQueries(0):
+            eq_(get_excluded_in(mkt.regions.US.id), set())
+        aer.delete()
+        eq_(get_excluded_in(mkt.regions.UK.id), set())
+
+    def test_unchanged_not_invalidated(self):
+        AddonExcludedRegion.objects.create(addon=self.app,
+                                           region=mkt.regions.DE.id)
+        self.assertSetEqual(get_excluded_in(mkt.regions.DE.id),
+                            [self.app.id])
+        # Already excluded by the AddonExcludedRegion.
+        self.app.geodata.update(region_de_usk_exclude=True)
+        ok_(cache.get(region_exclusions.key(mkt.regions.DE.id)) is not None)
+
+    @mock.patch('mkt.webapps.models.call_after_request')
+    def test_invalidated_after_request(self, call_after_request):
+        eq_(get_excluded_in(mkt.regions.UK.id), set())
+        AddonExcludedRegion.objects.create(addon=self.app,
+                                           region=mkt.regions.UK.id)
+        # Other processes may cache the exclusions again before the commit.
+        call_after_request.assert_called_with(region_exclusions.invalidate,
+                                              mkt.regions.UK.id)
+
+    def test_region_changed(self):
+        aer = AddonExcludedRegion.objects.create(addon=self.app,
+                                                 region=mkt.regions.UK.id)
+        self.assertSetEqual(get_excluded_in(mkt.regions.UK.id),
+                            [self.app.id])
+        eq_(get_excluded_in(mkt.regions.US.id), set())
+        aer.update(region=mkt.regions.US.id)
+        eq_(get_excluded_in(mkt.regions.UK.id), set())
+        self.assertSetEqual(get_excluded_in(mkt.regions.US.id),
+                            [self.app.id])
+
+    def test_geodata(self):
+        eq_(get_excluded_in(mkt.regions.DE.id), set())
+        AddonExcludedRegion.objects.create(addon=self.app,
+                                           region=mkt.regions.DE.id)
+        self.app.geodata.update(region_de_usk_exclude=True)
+        self.assertSetEqual(get_excluded_in(mkt.regions.DE.id), [self.app.id])
+        # Still excluded by the AddonExcludedRegion.
+        self.app.geodata.update(region_de_usk_exclude=False)
+        self.assertSetEqual(get_excluded_in(mkt.regions.DE.id), [self.app.id])
+        AddonExcludedRegion.objects.filter(addon=self.app).delete()
+        eq_(get_excluded_in(mkt.regions.DE.id), set())
+
+    def test_other_process(self):
+        self.assertSetEqual(get_excluded_in(mkt.regions.UK.id), [])
+        # Another process changed the exclusions, bumping the version.
+        cache.set(region_exclusions.key(mkt.regions.UK.id),
+                  set([self.app.id]))
+        region_exclusions.bump()
+        self.assertSetEqual(get_excluded_in(mkt.regions.UK.id), [self.app.id])
+
+
 class TestContentRating(amo.tests.WebappTestCase):
 
     def setUp(self):
@@ -2493,3 +2569,55 @@ class TestSearchSignals(amo.tests.ESTestCase):
         eq_(WebappIndexer.search().count(), 1)
         eq_(WebappIndexer.search().query('term', name=prev_name).count(), 0)
         eq_(WebappIndexer.search().query('term', name='yolo').count(), 1)
+
+
+class TestAuthorRoles(amo.tests.WebappTestCase):
+    fixtures = fixture('webapp_337141', 'user_999')
+
+    def setUp(self):
+        super(TestAuthorRoles, self).setUp()
+        self.user = UserProfile.objects.get(pk=999)
+        self.addon_user = AddonUser.objects.create(
+            addon=self.app, user=self.user, role=amo.AUTHOR_ROLE_DEV)
+
+    def test_has_author(self):
+        ok_(self.app.has_author(self.user))
+        ok_(self.app.has_author(self.user, [amo.AUTHOR_ROLE_DEV]))
+        ok_(not self.app.has_author(self.user, [amo.AUTHOR_ROLE_OWNER]))
+        ok_(not self.app.has_author(None))
+        ok_(not self.app.has_author(AnonymousUser()))
+
+    def test_loaded_once(self):
+        eq_(get_author_roles(self.user), {self.app.pk: amo.AUTHOR_ROLE_DEV})
+        # Another object for the same user, as in another request.
+        user = UserProfile.objects.get(pk=999)
+        with self.assertNumQueries(0):
+            ok_(self.app.has_author(self.user))
+            ok_(self.app.has_author(user))
+
+    def test_invalidated(self):
+        ok_(not self.app.has_author(self.user, [amo.AUTHOR_ROLE_OWNER]))
+        addon_user = AddonUser.objects.get(pk=self.addon_user.pk)
+        addon_user.role = amo.AUTHOR_ROLE_OWNER
+        addon_user.save()
+        ok_(self.app.has_author(self.user, [amo.AUTHOR_ROLE_OWNER]))
+
+        addon_user.delete()
+        ok_(not self.app.has_author(self.user))
+
+    @mock.patch('mkt.webapps.models.call_after_request')
+    def test_invalidated_after_request(self, call_after_request):
+        self.addon_user.role = amo.AUTHOR_ROLE_OWNER
+        self.addon_user.save()
+        call_after_request.assert_called_with(_invalidate_author_roles,
+                                              self.user.pk)
+
+    def test_user_changed(self):
+        other = UserProfile.objects.create(email='other@example.com')
+        ok_(self.app.has_author(self.user))
+        ok_(not self.app.has_author(other))
+        addon_user = AddonUser.objects.get(pk=self.addon_user.pk)
+        addon_user.user = other
+        addon_user.save()
+        ok_(not self.app.has_author(self.user))
+        ok_(self.app.has_author(other))
@@ -536,7 +536,8 @@ class TestESAppSerializer(amo.tests.ESTestCase):
 
     def test_not_paid(self):
         self.make_premium(self.app)
-        PriceCurrency.objects.update(paid=False)
+        for price_currency in PriceCurrency.objects.all():
+            price_currency.update(paid=False)
         self.app.save()
         self.refresh('webapp')
 
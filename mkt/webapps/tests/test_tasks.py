@@ -1,16 +1,17 @@
 # -*- coding: utf-8 -*-
 import collections
 import datetime
+import gzip
 import hashlib
 import json
 import os
-import stat
 import tarfile
 from copy import deepcopy
 from tempfile import mkdtemp
 
 from django.conf import settings
 from django.core import mail
+from django.core.cache import cache
 from django.core.files.storage import default_storage as storage
 from django.core.management import call_command
 from django.core.urlresolvers import reverse
@@ -29,12 +30,14 @@ from mkt.site.fixtures import fixture
 from mkt.site.helpers import absolutify
 from mkt.users.models import UserProfile
 from mkt.versions.models import Version
+from mkt.webapps.export import user_installs_data
 from mkt.webapps.models import AddonUser, Preview, Webapp
-from mkt.webapps.tasks import (dump_app, dump_user_installs, export_data,
+from mkt.webapps.tasks import (_fetch_manifests, _manifest_validators_key,
+                               export_data, export_user_installs,
                                fake_app_names, fix_excluded_regions,
                                generate_app_data, notify_developers_of_failure,
                                pre_generate_apk, PreGenAPKError, rm_directory,
-                               update_manifests, zip_apps)
+                               update_manifests)
 
 
 original = {
@@ -309,6 +312,54 @@ class TestUpdateManifest(amo.tests.TestCase):
         assert not retry.called
         assert RereviewQueue.objects.filter(addon=self.addon).exists()
 
+    def test_conditional_request(self):
+        self._hash = ohash
+        self.response_mock.headers['etag'] = '"abc"'
+        self.response_mock.headers['last-modified'] = 'Wed, 21 Oct 2015'
+        self._run()
+        ok_('If-None-Match' not in self.req_mock.call_args[1]['headers'])
+
+        self.response_mock.status_code = 304
+        self._run()
+        headers = self.req_mock.call_args[1]['headers']
+        eq_(headers['If-None-Match'], '"abc"')
+        eq_(headers['If-Modified-Since'], 'Wed, 21 Oct 2015')
+        assert not self.validator.called
+        eq_(ActivityLog.objects.for_apps([self.addon]).count(), 0)
+
+    def test_conditional_request_other_manifest(self):
+        # The stored ETag isn't for the manifest we have, fetch it again.
+        cache.set(_manifest_validators_key(self.addon.pk),
+                  {'etag': '"abc"', 'hash': nhash})
+        self._run()
+        ok_('If-None-Match' not in self.req_mock.call_args[1]['headers'])
+
+    def test_conditional_request_no_check_hash(self):
+        cache.set(_manifest_validators_key(self.addon.pk),
+                  {'etag': '"abc"', 'hash': ohash})
+        self._run(check_hash=False)
+        ok_('If-None-Match' not in self.req_mock.call_args[1]['headers'])
+
+    @mock.patch('mkt.webapps.tasks.update_manifests.retry')
+    def test_deadline_exceeded(self, retry):
+        with self.settings(MANIFEST_FETCH_DEADLINE=-1):
+            self._run()
+        assert not self.validator.called
+        # Retried, without counting it as a failed fetch.
+        eq_(retry.call_args[1]['kwargs'], {'check_hash': True,
+                                           'retries': {self.addon.pk: 0}})
+        eq_(len(mail.outbox), 0)
+
+    @mock.patch('mkt.webapps.tasks._fetch_manifest')
+    def test_fetch_manifests(self, fetch):
+        other = Webapp.objects.create(
+            manifest_url='http://nowhere.allizom.org/other.webapp')
+        fetch.side_effect = lambda url, **kw: (
+            '{}' if url == other.manifest_url else None)
+        fetched = _fetch_manifests([(self.addon, self.file), (other, None)],
+                                   check_hash=False)
+        eq_(fetched, {self.addon.pk: (None, None), other.pk: ('{}', None)})
+
     @mock.patch('mkt.webapps.models.Webapp.set_iarc_storefront_data')
     def test_manifest_validation_failure(self, _iarc):
         # We are already mocking validator, but this test needs to make sure
@@ -501,51 +552,6 @@ class TestUpdateManifest(amo.tests.TestCase):
         ok_(_iarc.called)
 
 
-class TestDumpApps(amo.tests.TestCase):
-    fixtures = fixture('webapp_337141')
-
-    def test_dump_app(self):
-        fn = dump_app(337141)
-        result = json.load(open(fn, 'r'))
-        eq_(result['id'], 337141)
-
-    def test_zip_apps(self):
-        dump_app(337141)
-        fn = zip_apps()
-        for f in ['license.txt', 'readme.txt']:
-            ok_(os.path.exists(os.path.join(settings.DUMPED_APPS_PATH, f)))
-        ok_(os.stat(fn)[stat.ST_SIZE])
-
-        latest_tgz = os.path.join(os.path.dirname(fn), 'latest.tgz')
-        ok_(os.readlink(latest_tgz) == os.path.basename(fn))
-
-    @mock.patch('mkt.webapps.tasks.dump_app')
-    def test_not_public(self, dump_app):
-        app = Webapp.objects.get(pk=337141)
-        app.update(status=amo.STATUS_PENDING)
-        call_command('process_addons', task='dump_apps')
-        assert not dump_app.called
-
-    def test_removed(self):
-        # At least one public app must exist for dump_apps to run.
-        amo.tests.app_factory(name='second app', status=amo.STATUS_PUBLIC)
-        app_path = os.path.join(settings.DUMPED_APPS_PATH, 'apps', '337',
-                                '337141.json')
-        app = Webapp.objects.get(pk=337141)
-        app.update(status=amo.STATUS_PUBLIC)
-        call_command('process_addons', task='dump_apps')
-        assert os.path.exists(app_path)
-
-        app.update(status=amo.STATUS_PENDING)
-        call_command('process_addons', task='dump_apps')
-        assert not os.path.exists(app_path)
-
-    @mock.patch('mkt.webapps.tasks.dump_app')
-    def test_public(self, dump_app):
-        call_command('process_addons', task='dump_apps')
-        assert dump_app.called
-
-
 class TestDumpUserInstalls(amo.tests.TestCase):
     fixtures = fixture('user_2519', 'webapp_337141')
 
@@ -557,22 +563,9 @@ class TestDumpUserInstalls(amo.tests.TestCase):
         self.app.installed.create(user=self.user)
         self.hash = hashlib.sha256('%s%s' % (str(self.user.pk),
                                              settings.SECRET_KEY)).hexdigest()
-        self.path = os.path.join(settings.DUMPED_USERS_PATH, 'users',
-                                 self.hash[0], '%s.json' % self.hash)
-
-    def tearDown(self):
-        try:
-            os.unlink(self.path)
-        except OSError:
-            pass
-        super(TestDumpUserInstalls, self).tearDown()
-
-    def dump_and_load(self):
-        dump_user_installs([self.user.pk])
-        return json.load(open(self.path, 'r'))
 
     def test_dump_user_installs(self):
-        data = self.dump_and_load()
+        data = user_installs_data(self.user)
         eq_(data['user'], self.hash)
         eq_(data['region'], self.user.region)
         eq_(data['lang'], self.user.lang)
@@ -590,16 +583,46 @@ class TestDumpUserInstalls(amo.tests.TestCase):
         app.installed.create(user=self.user)
         app.delete()
 
-        data = self.dump_and_load()
+        data = user_installs_data(self.user)
         eq_(len(data['installed_apps']), 1)
         installed = data['installed_apps'][0]
         eq_(installed['id'], self.app.id)
 
-    def test_dump_recommendation_opt_out(self):
+    def test_export_recommendation_opt_out(self):
         self.user.update(enable_recommendations=False)
-        with self.assertRaises(IOError):
-            # File shouldn't exist b/c we didn't write it.
-            self.dump_and_load()
+        export_directory = mkdtemp()
+        self.addCleanup(rm_directory, export_directory)
+        with self.settings(DUMPED_USERS_PATH=export_directory):
+            export_user_installs(name='users')
+        tarball = tarfile.open(os.path.join(export_directory, 'tarballs',
+                                            'users.tgz'))
+        eq_([name for name in tarball.getnames()
+             if not name.endswith('.txt')], [])
+
+    def test_export_user_installs(self):
+        export_directory = mkdtemp()
+        self.addCleanup(rm_directory, export_directory)
+        with self.settings(DUMPED_USERS_PATH=export_directory):
+            export_user_installs(name='users')
+        tarball = tarfile.open(os.path.join(export_directory, 'tarballs',
+                                            'users.tgz'))
+        path = 'users/%s/%s.json' % (self.hash[0], self.hash)
+        data = json.loads(tarball.extractfile(path).read())
+        eq_(data['user'], self.hash)
+        eq_(data['installed_apps'][0]['id'], self.app.id)
+        assert 'users/readme.txt' in tarball.getnames()
+
+    def test_export_user_installs_opt_out(self):
+        export_directory = mkdtemp()
+        self.addCleanup(rm_directory, export_directory)
+        with self.settings(DUMPED_USERS_PATH=export_directory):
+            export_user_installs(name='full')
+            self.user.update(enable_recommendations=False)
+            export_user_installs(name='full', incremental=True)
+        tarball = tarfile.open(os.path.join(export_directory, 'tarballs',
+                                            'full-incremental.tgz'))
+        eq_(json.loads(tarball.extractfile('users/deleted.json').read()),
+            [{'user': self.hash, 'deleted': True}])
 
 
 class TestFixMissingIcons(amo.tests.TestCase):
@@ -699,9 +722,11 @@ class TestExportData(amo.tests.TestCase):
     def tearDown(self):
         rm_directory(self.export_directory)
 
-    def create_export(self, name):
+    def create_export(self, name, incremental=False):
         with self.settings(DUMPED_APPS_PATH=self.export_directory):
-            export_data(name=name)
+            export_data(name=name, incremental=incremental)
+        if incremental:
+            name += '-incremental'
         tarball_path = os.path.join(self.export_directory,
                                     'tarballs',
                                     name + '.tgz')
@@ -725,6 +750,61 @@ class TestExportData(amo.tests.TestCase):
         collection_data = json.loads(collection_file.read())
         eq_(collection_data['apps'][0]['filepath'], self.app_path)
 
+    def test_ndjson_export(self):
+        self.create_export('tarball-name')
+        filename = os.path.join(self.export_directory, 'tarballs',
+                                'tarball-name-apps.ndjson.gz')
+        lines = gzip.open(filename).readlines()
+        eq_(len(lines), 1)
+        eq_(json.loads(lines[0])['id'], 337141)
+
+    def test_latest_is_linked(self):
+        self.create_export('full')
+        latest = os.path.join(self.export_directory, 'tarballs', 'latest.tgz')
+        eq_(os.readlink(latest), 'full.tgz')
+
+        # Incremental exports are distinct and don't replace the latest.
+        self.create_export('full', incremental=True)
+        eq_(os.readlink(latest), 'full.tgz')
+        assert os.path.exists(os.path.join(self.export_directory, 'tarballs',
+                                           'full-incremental.tgz'))
+
+    def test_state_is_saved(self):
+        self.create_export('tarball-name')
+        state = json.load(open(os.path.join(self.export_directory,
+                                            'export-state.json')))
+        eq_(state['ids'], {'apps': [337141], 'collections': [81721]})
+        assert not os.path.exists(os.path.join(self.export_directory,
+                                               'parts', 'tarball-name'))
+
+    def test_incremental_export(self):
+        self.create_export('full')
+        tarball = self.create_export('full', incremental=True)
+        actual_files = tarball.getnames()
+        assert self.app_path not in actual_files
+        assert self.collection_path not in actual_files
+        eq_(json.loads(tarball.extractfile('apps/deleted.json').read()), [])
+
+    def test_incremental_export_modified(self):
+        self.create_export('full')
+        Webapp.objects.get(pk=337141).save()
+        tarball = self.create_export('full', incremental=True)
+        actual_files = tarball.getnames()
+        assert self.app_path in actual_files
+        assert self.collection_path not in actual_files
+
+    def test_incremental_export_deleted(self):
+        self.create_export('full')
+        Webapp.objects.get(pk=337141).update(status=amo.STATUS_PENDING)
+        tarball = self.create_export('full', incremental=True)
+        assert self.app_path not in tarball.getnames()
+        eq_(json.loads(tarball.extractfile('apps/deleted.json').read()),
+            [{'id': 337141, 'deleted': True}])
+        filename = os.path.join(self.export_directory, 'tarballs',
+                                'full-incremental-apps.ndjson.gz')
+        eq_(json.loads(gzip.open(filename).read()),
+            {'id': 337141, 'deleted': True})
+
 
 class AppGeneratorTests(amo.tests.TestCase):
     def test_tinyset(self):
@@ -63,8 +63,8 @@ def dehydrate_content_ratings(content_ratings):
     return content_ratings
 
 
-def iarc_get_app_info(app):
-    client = lib.iarc.client.get_iarc_client('services')
+def iarc_get_app_info(app, client=None):
+    client = client or lib.iarc.client.get_iarc_client('services')
     iarc = app.iarc_info
     iarc_id = iarc.submission_id
     iarc_code = iarc.security_code
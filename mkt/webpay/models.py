@@ -1,11 +1,16 @@
 import os
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import models
+from django.dispatch import receiver
 
+import amo
 from lib.utils import static_url
+from mkt.purchase.models import Contribution
 from mkt.site.helpers import absolutify
 from mkt.site.models import ModelBase
+from mkt.webpay.utils import PAYMENT_STATUS_TIMEOUT, payment_status_key
 
 
 class ProductIcon(ModelBase):
@@ -35,3 +40,27 @@ class ProductIcon(ModelBase):
 
     class Meta:
         db_table = 'payment_assets'
+
+
+@receiver(models.signals.post_save, sender=Contribution,
+          dispatch_uid='webpay_payment_status')
+def update_payment_status(sender, instance, **kw):
+    """
+    Remember pending contributions so that StatusPayView can answer the
+    polls for them without a query. The postback completing a payment
+    updates the contribution, which clears it.
+    """
+    if kw.get('raw') or not instance.uuid:
+        return
+    if instance.type == amo.CONTRIB_PENDING:
+        cache.set(payment_status_key(instance.uuid), True,
+                  PAYMENT_STATUS_TIMEOUT)
+    else:
+        cache.delete(payment_status_key(instance.uuid))
+
+
+@receiver(models.signals.post_delete, sender=Contribution,
+          dispatch_uid='webpay_payment_status_delete')
+def clear_payment_status(sender, instance, **kw):
+    if instance.uuid:
+        cache.delete(payment_status_key(instance.uuid))
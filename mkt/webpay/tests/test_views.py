@@ -275,6 +275,29 @@ class TestStatus(BaseAPI):
         data = self.get_status(url=self.get_contribution_url(contribution))
         eq_(data['status'], 'incomplete')
 
+    def test_pending_cached(self):
+        contribution = self.get_contribution()
+        contribution.update(type=CONTRIB_PENDING)
+        url = self.get_contribution_url(contribution)
+        with patch('mkt.webpay.views.StatusPayView.get_object') as get:
+            data = self.get_status(url=url)
+        eq_(data['status'], 'incomplete')
+        ok_(not get.called)
+
+        # The postback completes the payment.
+        contribution.update(type=CONTRIB_PURCHASE)
+        data = self.get_status(url=url)
+        eq_(data['status'], 'complete')
+
+    @patch('mkt.receipts.utils.create_inapp_receipt')
+    def test_inapp_receipt_cached(self, create_inapp_receipt):
+        create_inapp_receipt.return_value = 'receipt'
+        contribution = self.get_contribution(inapp=self.get_inapp_product())
+        url = self.get_contribution_url(contribution)
+        eq_(self.get_status(url=url)['receipt'], 'receipt')
+        eq_(self.get_status(url=url)['receipt'], 'receipt')
+        eq_(create_inapp_receipt.call_count, 1)
+
     def test_not_owner(self):
         user2 = UserProfile.objects.get(pk=31337)
         contribution = self.get_contribution(user=user2)
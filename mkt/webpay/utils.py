@@ -3,6 +3,15 @@ from django.conf import settings
 import bleach
 
 
+# How long a pending payment is known as such by the status endpoint, without
+# looking it up. The postback completing the payment clears it sooner.
+PAYMENT_STATUS_TIMEOUT = 60 * 10
+
+
+def payment_status_key(contrib_uuid):
+    return 'webpay:pending:%s' % contrib_uuid
+
+
 def strip_tags(text):
     # Until atob() supports encoded HTML we are stripping all tags.
     # See bug 83152422
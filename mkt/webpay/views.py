@@ -3,6 +3,7 @@ import time
 import uuid
 
 from django.conf import settings
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from django.http import Http404
 
@@ -24,13 +25,14 @@ from mkt.api.authentication import (RestAnonymousAuthentication,
 from mkt.api.authorization import AllowReadOnly, AnyOf, GroupPermission
 from mkt.api.base import CORSMixin, MarketplaceView
 from mkt.purchase.models import Contribution
-from mkt.receipts.utils import create_inapp_receipt
+from mkt.receipts.utils import get_inapp_receipt
 from mkt.site.mail import send_mail_jinja
 from mkt.site.helpers import absolutify
 from mkt.webpay.forms import FailureForm, PrepareInAppForm, PrepareWebAppForm
 from mkt.webpay.models import ProductIcon
 from mkt.webpay.serializers import (ContributionSerializer,
                                     ProductIconSerializer)
+from mkt.webpay.utils import payment_status_key
 from mkt.webpay.webpay_jwt import (get_product_jwt, InAppProduct,
                                    sign_webpay_jwt, SimulatedInAppProduct,
                                    WebAppProduct)
@@ -179,11 +181,16 @@ class StatusPayView(CORSMixin, MarketplaceView, GenericAPIView):
         return obj
 
     def get(self, request, *args, **kwargs):
+        # Apps poll this until the payment is complete, don't look up
+        # contributions known to be pending.
+        if cache.get(payment_status_key(kwargs[self.lookup_field])):
+            return Response({'status': 'incomplete', 'receipt': None})
+
         self.object = contrib = self.get_object()
         data = {'status': 'complete' if self.object else 'incomplete',
                 'receipt': None}
         if getattr(contrib, 'inapp_product', None):
-            data['receipt'] = create_inapp_receipt(contrib)
+            data['receipt'] = get_inapp_receipt(contrib)
         return Response(data)
 
 
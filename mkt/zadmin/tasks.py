@@ -4,7 +4,7 @@ from django.conf import settings
 
 from celeryutils import task
 
-from mkt.site.mail import send_mail
+from mkt.site.mail import send_mass_mail
 from mkt.zadmin.models import EmailPreviewTopic
 
 
@@ -19,7 +19,8 @@ def admin_email(all_recipients, subject, body, preview_only=False,
              % (len(all_recipients), admin_email.rate_limit, subject))
     if preview_only:
         send = EmailPreviewTopic(topic=preview_topic).send_mail
+        for recipient in all_recipients:
+            send(subject, body, recipient_list=[recipient],
+                 from_email=from_email)
     else:
-        send = send_mail
-    for recipient in all_recipients:
-        send(subject, body, recipient_list=[recipient], from_email=from_email)
+        send_mass_mail(subject, body, all_recipients, from_email=from_email)
@@ -8,6 +8,8 @@ HOME=/tmp
 # Once per hour.
 20 * * * * %(z_cron)s addon_last_updated
 50 * * * * %(z_cron)s cleanup_extracted_file
+55 * * * * %(z_cron)s deliver_spooled_mail
+35 * * * * %(z_cron)s retry_fulfillments
 
 # 2014-06-23: Disabled to stop sending 2MB emails for old AMO files.
 # TODO: Determine if we need this. If not, remove. If so, re-enable after removing AMO files.
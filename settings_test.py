@@ -41,11 +41,15 @@ TMP_PATH = _polite_tmpdir()
 COLLECTIONS_ICON_PATH = _polite_tmpdir()
 REVIEWER_ATTACHMENTS_PATH = _polite_tmpdir()
 DUMPED_APPS_PATH = _polite_tmpdir()
+IMAGE_CACHE_PATH = _polite_tmpdir()
 
 AUTHENTICATION_BACKENDS = (
     'django_browserid.auth.BrowserIDBackend',
 )
 CELERY_ALWAYS_EAGER = True
+
+# Save MonolithRecords right away.
+MONOLITH_BUFFER_SIZE = 0
 DEBUG = False
 TEMPLATE_DEBUG = False
 